@@ -0,0 +1,106 @@
+import csv
+import io
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from django.db import transaction
+from schoolmanagement.batching import batch_size, lookup_in_chunks
+from students.models import Student
+from .models import Result, grade_for_percentage
+
+# Result.marks_obtained has two decimal places
+MARKS_PRECISION = Decimal('0.01')
+
+
+def parse_results_csv(uploaded_file):
+    """
+    Read student_id, marks_obtained[, remarks] rows from an uploaded CSV file.
+
+    Raises ValueError when the file is not UTF-8 text or not valid CSV.
+    """
+    text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig')
+    try:
+        return [
+            {key.strip(): (value or '').strip() for key, value in row.items() if key}
+            for row in csv.DictReader(text)
+        ]
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ValueError(f'Could not read CSV file: {e}') from e
+
+
+def _student_id(row):
+    value = row.get('student_id')
+    return str(value) if value not in (None, '') else None
+
+
+def import_results(exam, rows):
+    """
+    Upsert results for one exam in bulk.
+
+    Marks are rounded to the stored two decimal places first, so percentage, pass
+    flag and letter grade are derived for the whole batch exactly as Result.save()
+    does on the stored row, without re-fetching the exam per row. Returns
+    (results, accepted, rejected) where rejected rows carry the reason.
+    """
+    student_map = lookup_in_chunks(
+        Student.objects.all(), 'student_id',
+        {_student_id(row) for row in rows if isinstance(row, dict) and _student_id(row)}, 'id',
+    )
+    total_marks, passing_marks = exam.total_marks, exam.passing_marks
+
+    results, accepted, rejected = [], [], []
+    seen = set()
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            rejected.append({'row': index, 'student_id': None, 'error': 'Row must be an object'})
+            continue
+        student_id = _student_id(row)
+        try:
+            marks = Decimal(str(row.get('marks_obtained')))
+        except InvalidOperation:
+            marks = None
+
+        if not student_id:
+            error = 'student_id is required'
+        elif student_id not in student_map:
+            error = 'Student not found'
+        elif marks is None or not marks.is_finite():
+            error = 'marks_obtained must be a number'
+        elif marks < 0:
+            error = 'Marks obtained cannot be negative'
+        elif marks > total_marks:
+            error = 'Marks obtained cannot be greater than total marks'
+        elif student_id in seen:
+            error = 'Duplicate student_id in request'
+        else:
+            error = None
+
+        if error:
+            rejected.append({'row': index, 'student_id': student_id, 'error': error})
+            continue
+
+        seen.add(student_id)
+        marks = marks.quantize(MARKS_PRECISION, rounding=ROUND_HALF_UP)
+        percentage = (marks / total_marks) * 100
+        results.append(Result(
+            student_id=student_map[student_id],
+            exam=exam,
+            marks_obtained=marks,
+            percentage=percentage,
+            grade=grade_for_percentage(percentage),
+            is_passed=marks >= passing_marks,
+            remarks=row.get('remarks', ''),
+        ))
+        accepted.append({'row': index, 'student_id': student_id, 'marks_obtained': marks})
+
+    if results:
+        fields = ['student_id', 'exam_id', 'marks_obtained', 'percentage', 'grade', 'is_passed',
+                  'remarks', 'published_at', 'created_at']
+        with transaction.atomic():
+            Result.objects.bulk_create(
+                results,
+                batch_size=batch_size(fields, results),
+                update_conflicts=True,
+                unique_fields=['student', 'exam'],
+                update_fields=['marks_obtained', 'percentage', 'grade', 'is_passed', 'remarks'],
+            )
+
+    return results, accepted, rejected
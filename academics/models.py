@@ -1,6 +1,20 @@
+from bisect import bisect_right
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+# Lower percentage bound of each letter grade, ascending; anything below 50 is an F
+GRADE_BOUNDARIES = [
+    (50, 'D'), (55, 'C-'), (60, 'C'), (65, 'C+'), (70, 'B-'),
+    (75, 'B'), (80, 'B+'), (85, 'A-'), (90, 'A'), (95, 'A+'),
+]
+_GRADE_THRESHOLDS = [threshold for threshold, _ in GRADE_BOUNDARIES]
+
+
+def grade_for_percentage(percentage):
+    index = bisect_right(_GRADE_THRESHOLDS, percentage)
+    return GRADE_BOUNDARIES[index - 1][1] if index else 'F'
+
+
 class ExamType(models.Model):
     name = models.CharField(max_length=50, unique=True)
     description = models.TextField(blank=True)
@@ -47,34 +61,17 @@ class Result(models.Model):
 
     class Meta:
         unique_together = ['student', 'exam']
+        indexes = [
+            models.Index(fields=['exam', 'grade'], name='result_exam_grade_idx'),
+            models.Index(fields=['-created_at', '-id'], name='result_keyset_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         self.percentage = (self.marks_obtained / self.exam.total_marks) * 100
         self.is_passed = self.marks_obtained >= self.exam.passing_marks
         
         # Calculate grade based on percentage
-        if self.percentage >= 95:
-            self.grade = 'A+'
-        elif self.percentage >= 90:
-            self.grade = 'A'
-        elif self.percentage >= 85:
-            self.grade = 'A-'
-        elif self.percentage >= 80:
-            self.grade = 'B+'
-        elif self.percentage >= 75:
-            self.grade = 'B'
-        elif self.percentage >= 70:
-            self.grade = 'B-'
-        elif self.percentage >= 65:
-            self.grade = 'C+'
-        elif self.percentage >= 60:
-            self.grade = 'C'
-        elif self.percentage >= 55:
-            self.grade = 'C-'
-        elif self.percentage >= 50:
-            self.grade = 'D'
-        else:
-            self.grade = 'F'
+        self.grade = grade_for_percentage(self.percentage)
         
         super().save(*args, **kwargs)
 
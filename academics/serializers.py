@@ -1,5 +1,8 @@
 from rest_framework import serializers
+from django.db.models import Count, Q, Sum
+from schoolmanagement.reference_cache import ReferenceNameField
 from .models import ExamType, Exam, Result, Assignment, Submission
+from .statistics import average_marks, pass_rate, exam_statistics
 
 class ExamTypeSerializer(serializers.ModelSerializer):
     exams_count = serializers.SerializerMethodField()
@@ -12,9 +15,9 @@ class ExamTypeSerializer(serializers.ModelSerializer):
         return obj.exams.count()
 
 class ExamSerializer(serializers.ModelSerializer):
-    exam_type_name = serializers.CharField(source='exam_type.name', read_only=True)
-    grade_name = serializers.CharField(source='grade.name', read_only=True)
-    subject_name = serializers.CharField(source='subject.name', read_only=True)
+    exam_type_name = ReferenceNameField('academics.ExamType', source='exam_type_id')
+    grade_name = ReferenceNameField('students.Grade', source='grade_id')
+    subject_name = ReferenceNameField('courses.Subject', source='subject_id')
     results_count = serializers.SerializerMethodField()
     average_marks = serializers.SerializerMethodField()
     pass_rate = serializers.SerializerMethodField()
@@ -30,21 +33,28 @@ class ExamSerializer(serializers.ModelSerializer):
             'average_marks', 'pass_rate'
         ]
     
+    def _result_stats(self, obj):
+        # Prefer the annotations from with_result_stats(); fall back for unannotated instances
+        if not hasattr(obj, 'results_count'):
+            stats = obj.results.aggregate(
+                results_count=Count('id'),
+                results_marks_total=Sum('marks_obtained'),
+                results_passed=Count('id', filter=Q(is_passed=True)),
+            )
+            for name, value in stats.items():
+                setattr(obj, name, value)
+        return obj.results_count, obj.results_marks_total, obj.results_passed
+    
     def get_results_count(self, obj):
-        return obj.results.count()
+        return self._result_stats(obj)[0]
     
     def get_average_marks(self, obj):
-        results = obj.results.all()
-        if results.exists():
-            return round(sum(r.marks_obtained for r in results) / results.count(), 2)
-        return 0
+        results_count, marks_total, _ = self._result_stats(obj)
+        return average_marks(marks_total, results_count)
     
     def get_pass_rate(self, obj):
-        results = obj.results.all()
-        if results.exists():
-            passed = results.filter(is_passed=True).count()
-            return round((passed / results.count()) * 100, 2)
-        return 0
+        results_count, _, passed = self._result_stats(obj)
+        return pass_rate(passed, results_count)
     
     def validate(self, data):
         # Validate that passing marks is not greater than total marks
@@ -68,8 +78,8 @@ class ResultSerializer(serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.user.get_full_name', read_only=True)
     student_roll_number = serializers.CharField(source='student.roll_number', read_only=True)
     exam_name = serializers.CharField(source='exam.name', read_only=True)
-    subject_name = serializers.CharField(source='exam.subject.name', read_only=True)
-    exam_type_name = serializers.CharField(source='exam.exam_type.name', read_only=True)
+    subject_name = ReferenceNameField('courses.Subject', source='exam.subject_id')
+    exam_type_name = ReferenceNameField('academics.ExamType', source='exam.exam_type_id')
     total_marks = serializers.IntegerField(source='exam.total_marks', read_only=True)
     
     class Meta:
@@ -100,7 +110,7 @@ class ResultSerializer(serializers.ModelSerializer):
 
 class AssignmentSerializer(serializers.ModelSerializer):
     course_name = serializers.CharField(source='course.name', read_only=True)
-    subject_name = serializers.CharField(source='subject.name', read_only=True)
+    subject_name = ReferenceNameField('courses.Subject', source='subject_id')
     teacher_name = serializers.CharField(source='teacher.user.get_full_name', read_only=True)
     submissions_count = serializers.SerializerMethodField()
     graded_submissions_count = serializers.SerializerMethodField()
@@ -210,43 +220,36 @@ class ExamResultSummarySerializer(serializers.ModelSerializer):
             'average_marks', 'pass_rate', 'grade_distribution'
         ]
     
+    def _exam_stats(self, obj):
+        # A batch of exams can share one precomputed exam_statistics() map via context
+        batch = self.context.setdefault('exam_statistics', {})
+        if obj.pk not in batch:
+            batch.update(exam_statistics([obj.pk]))
+        return batch[obj.pk]
+    
     def get_results_count(self, obj):
-        return obj.results.count()
+        return self._exam_stats(obj)['total']
     
     def get_highest_marks(self, obj):
-        result = obj.results.order_by('-marks_obtained').first()
-        return result.marks_obtained if result else 0
+        return self._exam_stats(obj)['highest_marks'] or 0
     
     def get_lowest_marks(self, obj):
-        result = obj.results.order_by('marks_obtained').first()
-        return result.marks_obtained if result else 0
+        return self._exam_stats(obj)['lowest_marks'] or 0
     
     def get_average_marks(self, obj):
-        results = obj.results.all()
-        if results.exists():
-            return round(sum(r.marks_obtained for r in results) / results.count(), 2)
-        return 0
+        return self._exam_stats(obj)['average_marks']
     
     def get_pass_rate(self, obj):
-        results = obj.results.all()
-        if results.exists():
-            passed = results.filter(is_passed=True).count()
-            return round((passed / results.count()) * 100, 2)
-        return 0
+        return self._exam_stats(obj)['pass_rate']
     
     def get_grade_distribution(self, obj):
-        distribution = {}
-        for grade_choice in Result.GRADE_CHOICES:
-            grade_code = grade_choice[0]
-            count = obj.results.filter(grade=grade_code).count()
-            distribution[grade_code] = count
-        return distribution
+        return self._exam_stats(obj)['grade_distribution']
 
 class StudentResultSerializer(serializers.ModelSerializer):
     """Serializer for student's individual results"""
     exam_name = serializers.CharField(source='exam.name', read_only=True)
-    subject_name = serializers.CharField(source='exam.subject.name', read_only=True)
-    exam_type_name = serializers.CharField(source='exam.exam_type.name', read_only=True)
+    subject_name = ReferenceNameField('courses.Subject', source='exam.subject_id')
+    exam_type_name = ReferenceNameField('academics.ExamType', source='exam.exam_type_id')
     exam_date = serializers.DateField(source='exam.exam_date', read_only=True)
     total_marks = serializers.IntegerField(source='exam.total_marks', read_only=True)
     
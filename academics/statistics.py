@@ -0,0 +1,82 @@
+from django.db.models import Count, Max, Min, Q, Sum
+from .models import Result
+
+GRADE_CODES = [code for code, _ in Result.GRADE_CHOICES]
+
+
+def with_result_stats(queryset):
+    """Annotate an Exam queryset with result count, marks total and pass count"""
+    return queryset.annotate(
+        results_count=Count('results'),
+        results_marks_total=Sum('results__marks_obtained'),
+        results_passed=Count('results', filter=Q(results__is_passed=True)),
+    )
+
+
+def average_marks(marks_total, results_count):
+    if results_count:
+        return round(marks_total / results_count, 2)
+    return 0
+
+
+def pass_rate(passed, results_count):
+    if results_count:
+        return round((passed / results_count) * 100, 2)
+    return 0
+
+
+def _empty_stats():
+    return {
+        'total': 0,
+        'passed': 0,
+        'failed': 0,
+        'marks_total': 0,
+        'highest_marks': None,
+        'lowest_marks': None,
+        'percentage_total': 0,
+        'percentage_count': 0,
+        'grade_distribution': {code: 0 for code in GRADE_CODES},
+    }
+
+
+def exam_statistics(exam_ids):
+    """
+    Result statistics for many exams from one query grouped by (exam, grade).
+
+    Returns {exam_id: stats} with totals, pass/fail counts, marks range and averages
+    and the full grade histogram. Exams without results get zeroed stats.
+    """
+    stats = {exam_id: _empty_stats() for exam_id in exam_ids}
+    if not stats:
+        return stats
+
+    rows = Result.objects.filter(exam_id__in=list(stats)).values('exam_id', 'grade').annotate(
+        count=Count('id'),
+        passed=Count('id', filter=Q(is_passed=True)),
+        marks_total=Sum('marks_obtained'),
+        highest=Max('marks_obtained'),
+        lowest=Min('marks_obtained'),
+        percentage_total=Sum('percentage'),
+        percentage_count=Count('percentage'),
+    ).order_by()
+
+    for row in rows:
+        exam = stats[row['exam_id']]
+        exam['total'] += row['count']
+        exam['passed'] += row['passed']
+        exam['marks_total'] += row['marks_total']
+        exam['percentage_total'] += row['percentage_total'] or 0
+        exam['percentage_count'] += row['percentage_count']
+        if exam['highest_marks'] is None or row['highest'] > exam['highest_marks']:
+            exam['highest_marks'] = row['highest']
+        if exam['lowest_marks'] is None or row['lowest'] < exam['lowest_marks']:
+            exam['lowest_marks'] = row['lowest']
+        if row['grade'] in exam['grade_distribution']:
+            exam['grade_distribution'][row['grade']] += row['count']
+
+    for exam in stats.values():
+        exam['failed'] = exam['total'] - exam['passed']
+        exam['average_marks'] = average_marks(exam['marks_total'], exam['total'])
+        exam['average_percentage'] = average_marks(exam['percentage_total'], exam['percentage_count'])
+        exam['pass_rate'] = pass_rate(exam['passed'], exam['total'])
+    return stats
@@ -1,7 +1,250 @@
+from datetime import date, time
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
-from .models import Subject
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from courses.models import Subject
+from schoolmanagement.reference_cache import reference_cache
+from students.models import Grade, Section, Student
+from .models import ExamType, Exam, Result
+from .serializers import ExamSerializer
+
 
 class SubjectModelTest(TestCase):
     def test_subject_creation(self):
         subject = Subject.objects.create(name="Math", code="MATH101")
         self.assertEqual(subject.name, "Math")
+
+
+class ExamFixtureMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='teacher', password='pass')
+        cls.grade = Grade.objects.create(name='Grade 5', level=5)
+        cls.section = Section.objects.create(name='A', grade=cls.grade)
+        cls.subject = Subject.objects.create(name='Math', code='MATH5')
+        cls.exam_type = ExamType.objects.create(name='Midterm')
+        cls.students = [cls.create_student(i) for i in range(4)]
+
+    @classmethod
+    def create_student(cls, index):
+        user = User.objects.create_user(username=f'student{index}', first_name='Student', last_name=str(index))
+        return Student.objects.create(
+            user=user, student_id=f'S{index}', grade=cls.grade, section=cls.section,
+            roll_number=str(index), admission_number=f'ADM{index}', admission_date=date(2024, 4, 1),
+            date_of_birth=date(2014, 1, 1), gender='F', phone_number='9800000000', address='Street',
+            emergency_contact='9800000000', parent_name='Parent', parent_email='parent@example.com',
+            parent_phone='9800000000',
+        )
+
+    @classmethod
+    def create_exam(cls, name, marks=()):
+        exam = Exam.objects.create(
+            name=name, exam_type=cls.exam_type, grade=cls.grade, subject=cls.subject,
+            exam_date=date(2026, 11, 1), start_time=time(9, 0), duration_minutes=90,
+            total_marks=100, passing_marks=40,
+        )
+        for student, mark in zip(cls.students, marks):
+            Result.objects.create(student=student, exam=exam, marks_obtained=Decimal(mark))
+        return exam
+
+
+class ExamSerializerStatisticsTest(ExamFixtureMixin, TestCase):
+    def setUp(self):
+        reference_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_annotated_statistics_match_per_row_statistics(self):
+        exam = self.create_exam('Unit 1', ['35.50', '72.25', '88', '41'])
+        empty_exam = self.create_exam('Unit 2')
+        response = self.client.get('/api/academics/api/exams/')
+        rows = {row['id']: row for row in response.json()['results']}
+
+        for instance in (exam, empty_exam):
+            expected = ExamSerializer(Exam.objects.get(pk=instance.pk)).data
+            for field in ('results_count', 'average_marks', 'pass_rate'):
+                self.assertEqual(rows[instance.pk][field], float(expected[field]))
+
+        self.assertEqual(rows[exam.pk]['results_count'], 4)
+        self.assertEqual(rows[exam.pk]['average_marks'], 59.19)
+        self.assertEqual(rows[exam.pk]['pass_rate'], 75.0)
+        self.assertEqual(rows[empty_exam.pk]['average_marks'], 0)
+
+    def test_exam_list_query_count_is_constant(self):
+        for i in range(3):
+            self.create_exam(f'Quiz {i}', ['50', '60', '70'])
+        # Warm the reference cache so only the page itself is counted
+        self.client.get('/api/academics/api/exams/')
+        with self.assertNumQueries(2):
+            self.client.get('/api/academics/api/exams/')
+
+        for i in range(3, 12):
+            self.create_exam(f'Quiz {i}', ['45', '95'])
+        with self.assertNumQueries(2):
+            self.client.get('/api/academics/api/exams/')
+
+
+class ExamStatisticsTest(ExamFixtureMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_statistics_endpoint(self):
+        exam = self.create_exam('Final', ['96', '91', '40', '12.5'])
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/academics/api/exams/{exam.pk}/statistics/')
+        stats = response.json()
+        self.assertEqual(stats['total_students'], 4)
+        self.assertEqual(stats['passed_students'], 3)
+        self.assertEqual(stats['failed_students'], 1)
+        self.assertEqual(stats['average_marks'], 59.88)
+        self.assertEqual(stats['average_percentage'], 59.88)
+        self.assertEqual(stats['grade_distribution']['A+'], 1)
+        self.assertEqual(stats['grade_distribution']['A'], 1)
+        self.assertEqual(stats['grade_distribution']['F'], 2)
+        self.assertEqual(sum(stats['grade_distribution'].values()), 4)
+
+    def test_results_summary_batches_exams(self):
+        self.create_exam('Unit 1', ['80', '55'])
+        self.create_exam('Unit 2')
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/academics/api/exams/results_summary/')
+        summaries = {row['name']: row for row in response.json()['results']}
+        self.assertEqual(summaries['Unit 1']['results_count'], 2)
+        self.assertEqual(summaries['Unit 1']['highest_marks'], 80.0)
+        self.assertEqual(summaries['Unit 1']['lowest_marks'], 55.0)
+        self.assertEqual(summaries['Unit 1']['average_marks'], 67.5)
+        self.assertEqual(summaries['Unit 1']['pass_rate'], 100.0)
+        self.assertEqual(summaries['Unit 2']['results_count'], 0)
+        self.assertEqual(summaries['Unit 2']['grade_distribution']['F'], 0)
+
+
+class ResultBulkImportTest(ExamFixtureMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_import_matches_result_save(self):
+        marks = ['95', '89.99', '50', '49.99']
+        saved_exam = self.create_exam('Saved', marks)
+        imported_exam = self.create_exam('Imported')
+
+        response = self.client.post('/api/academics/api/results/bulk_import/', {
+            'exam': imported_exam.pk,
+            'results': [
+                {'student_id': student.student_id, 'marks_obtained': mark}
+                for student, mark in zip(self.students, marks)
+            ] + [{'student_id': 'UNKNOWN', 'marks_obtained': '10'},
+                 {'student_id': 'S0', 'marks_obtained': '101'}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['count'], 4)
+        self.assertEqual([row['row'] for row in response.json()['rejected']], [4, 5])
+
+        fields = ('student_id', 'marks_obtained', 'percentage', 'grade', 'is_passed')
+        self.assertEqual(
+            list(saved_exam.results.order_by('student_id').values_list(*fields)),
+            list(imported_exam.results.order_by('student_id').values_list(*fields)),
+        )
+
+    def test_csv_import_updates_existing_results(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        exam = self.create_exam('Resit', ['30'])
+        upload = SimpleUploadedFile('marks.csv', b'student_id,marks_obtained,remarks\nS0,72,Improved\nS1,88,\n')
+
+        response = self.client.post('/api/academics/api/results/bulk_import/', {
+            'exam': exam.pk, 'file': upload,
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        result = exam.results.get(student__student_id='S0')
+        self.assertEqual((result.grade, result.is_passed, result.remarks), ('B-', True, 'Improved'))
+        self.assertEqual(exam.results.count(), 2)
+
+    def test_non_utf8_csv_is_rejected(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        exam = self.create_exam('Retake')
+        upload = SimpleUploadedFile('marks.csv', 'student_id,marks_obtained\nS0,72\n'.encode('utf-16'))
+        response = self.client.post('/api/academics/api/results/bulk_import/', {
+            'exam': exam.pk, 'file': upload,
+        }, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(exam.results.exists())
+
+    def test_marks_are_rounded_before_grading(self):
+        exam = self.create_exam('Boundary')
+        response = self.client.post('/api/academics/api/results/bulk_import/', {
+            'exam': exam.pk, 'results': [{'student_id': 'S0', 'marks_obtained': '49.995'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        imported = exam.results.get()
+        stored = (imported.marks_obtained, imported.percentage, imported.grade, imported.is_passed)
+        imported.save()
+        imported.refresh_from_db()
+        self.assertEqual(stored, (imported.marks_obtained, imported.percentage, imported.grade, imported.is_passed))
+        self.assertEqual(imported.marks_obtained, Decimal('50.00'))
+
+    def test_malformed_rows_are_rejected_not_fatal(self):
+        exam = self.create_exam('Quiz')
+        response = self.client.post('/api/academics/api/results/bulk_import/', {
+            'exam': exam.pk,
+            'results': [{'student_id': 'S0', 'marks_obtained': '70'}, 'S1,80', ['S2', 90],
+                        {'student_id': ['S3'], 'marks_obtained': {'value': 1}}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['count'], 1)
+        self.assertEqual(
+            [(row['row'], row['error']) for row in response.json()['rejected']],
+            [(1, 'Row must be an object'), (2, 'Row must be an object'), (3, 'Student not found')],
+        )
+
+    def test_bad_exam_id_is_a_client_error(self):
+        rows = [{'student_id': 'S0', 'marks_obtained': '70'}]
+        for exam, expected in (('abc', 400), (None, 400), (999, 404)):
+            with self.subTest(exam=exam):
+                payload = {'results': rows} if exam is None else {'exam': exam, 'results': rows}
+                response = self.client.post('/api/academics/api/results/bulk_import/', payload, format='json')
+                self.assertEqual(response.status_code, expected)
+
+
+class ResultKeysetPaginationTest(ExamFixtureMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            self.create_exam(f'Weekly {i}', ['50', '60', '70', '80'])
+        # Share timestamps so the id tiebreaker decides the order
+        Result.objects.filter(exam__name='Weekly 1').update(created_at=Result.objects.first().created_at)
+
+    def test_cursor_walk_matches_offset_ordering(self):
+        expected = list(Result.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        seen = []
+        url = '/api/academics/api/results/?pagination=keyset&page_size=5'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                page = self.client.get(url).json()
+            self.assertNotIn('count', page)
+            self.assertFalse([q for q in queries.captured_queries if 'COUNT(' in q['sql']])
+            seen.extend(row['id'] for row in page['results'])
+            last_page, url = page, page['next']
+        self.assertEqual(seen, expected)
+
+        back = []
+        url = last_page['previous']
+        while url:
+            page = self.client.get(url).json()
+            back = [row['id'] for row in page['results']] + back
+            url = page['previous']
+        self.assertEqual(back, expected[:len(back)])
+        self.assertEqual(len(back), 10)
+
+    def test_page_numbers_remain_the_default(self):
+        page = self.client.get('/api/academics/api/results/').json()
+        self.assertEqual(page['count'], 12)
+        self.assertEqual(self.client.get('/api/academics/api/results/?cursor=bogus').status_code, 404)
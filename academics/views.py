@@ -11,10 +11,13 @@ from django.urls import reverse_lazy
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from schoolmanagement.pagination import OptInKeysetPagination
 from .models import ExamType, Exam, Result, Assignment, Submission
+from .statistics import with_result_stats, exam_statistics
+from .importers import import_results, parse_results_csv
 from .serializers import (
     ExamTypeSerializer, ExamSerializer, ResultSerializer, 
-    AssignmentSerializer, SubmissionSerializer
+    AssignmentSerializer, SubmissionSerializer, ExamResultSummarySerializer
 )
 
 
@@ -38,6 +41,8 @@ class ExamViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = Exam.objects.select_related('exam_type', 'grade', 'subject')
+        if self.action != 'results_summary':
+            queryset = with_result_stats(queryset)
         
         # Filter by grade
         grade_id = self.request.query_params.get('grade', None)
@@ -71,29 +76,40 @@ class ExamViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
         exam = self.get_object()
-        results = exam.results.all()
+        exam_stats = exam_statistics([exam.pk])[exam.pk]
         
         stats = {
-            'total_students': results.count(),
-            'passed_students': results.filter(is_passed=True).count(),
-            'failed_students': results.filter(is_passed=False).count(),
-            'average_marks': results.aggregate(Avg('marks_obtained'))['marks_obtained__avg'] or 0,
-            'average_percentage': results.aggregate(Avg('percentage'))['percentage__avg'] or 0,
-            'grade_distribution': {}
+            'total_students': exam_stats['total'],
+            'passed_students': exam_stats['passed'],
+            'failed_students': exam_stats['failed'],
+            'average_marks': exam_stats['average_marks'],
+            'average_percentage': exam_stats['average_percentage'],
+            'grade_distribution': exam_stats['grade_distribution']
         }
         
-        # Calculate grade distribution
-        for grade_choice in Result.GRADE_CHOICES:
-            grade_code = grade_choice[0]
-            count = results.filter(grade=grade_code).count()
-            stats['grade_distribution'][grade_code] = count
-        
         return Response(stats)
 
+    @action(detail=False, methods=['get'])
+    def results_summary(self, request):
+        """Result summaries for a page of exams, computed in one grouped query"""
+        exams = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(exams)
+        exams = page if page is not None else list(exams)
+        
+        context = self.get_serializer_context()
+        context['exam_statistics'] = exam_statistics([exam.pk for exam in exams])
+        serializer = ExamResultSummarySerializer(exams, many=True, context=context)
+        
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
 class ResultViewSet(viewsets.ModelViewSet):
     queryset = Result.objects.all()
     serializer_class = ResultSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptInKeysetPagination
+    keyset_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         queryset = Result.objects.select_related('student', 'exam')
@@ -115,6 +131,34 @@ class ResultViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('-created_at')
 
+    @action(detail=False, methods=['post'])
+    def bulk_import(self, request):
+        """Upsert many results for one exam from a JSON list or an uploaded CSV file"""
+        try:
+            exam = get_object_or_404(Exam, pk=int(request.data.get('exam')))
+        except (TypeError, ValueError):
+            return Response({'error': 'exam must be an exam id'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if 'file' in request.FILES:
+            try:
+                rows = parse_results_csv(request.FILES['file'])
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            rows = request.data.get('results', [])
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {'error': 'Provide a non-empty results list or a CSV file'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        results, accepted, rejected = import_results(exam, rows)
+        return Response({
+            'message': f'Imported {len(results)} results for {exam.name}',
+            'count': len(results),
+            'accepted': accepted,
+            'rejected': rejected
+        }, status=status.HTTP_201_CREATED if results else status.HTTP_400_BAD_REQUEST)
+
     @action(detail=False, methods=['get'])
     def my_results(self, request):
         if hasattr(request.user, 'student_profile'):
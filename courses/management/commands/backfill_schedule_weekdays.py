@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from courses.timetables import backfill_weekday_numbers
+
+
+class Command(BaseCommand):
+    help = 'Set day_of_week_num from day_of_week on schedules that predate it and rebuild their timetables'
+
+    def handle(self, *args, **options):
+        count = backfill_weekday_numbers()
+        self.stdout.write(self.style.SUCCESS(f'Backfilled the weekday number of {count} schedule(s)'))
@@ -51,6 +51,8 @@ class Schedule(models.Model):
     teacher = models.ForeignKey('teachers.Teacher', on_delete=models.CASCADE)
     section = models.ForeignKey('students.Section', on_delete=models.CASCADE)
     day_of_week = models.CharField(max_length=3, choices=DAYS_OF_WEEK)
+    # Monday=0 ... Sunday=6 (datetime.weekday()), kept in step with day_of_week by save()
+    day_of_week_num = models.PositiveSmallIntegerField(default=0, editable=False)
     start_time = models.TimeField()
     end_time = models.TimeField()
     room_number = models.CharField(max_length=20)
@@ -59,6 +61,23 @@ class Schedule(models.Model):
 
     class Meta:
         unique_together = ['teacher', 'day_of_week', 'start_time']
+        indexes = [
+            models.Index(fields=['teacher', 'day_of_week', 'is_active'], name='schedule_teacher_day_idx'),
+            # Interval lookups for the room and section conflict checks (courses.conflicts)
+            models.Index(fields=['room_number', 'day_of_week', 'start_time'], name='schedule_room_slot_idx'),
+            models.Index(fields=['section', 'day_of_week', 'start_time'], name='schedule_section_slot_idx'),
+            models.Index(fields=['day_of_week_num', 'start_time'], name='schedule_weekday_start_idx'),
+        ]
+
+    @classmethod
+    def weekday_number(cls, day_of_week):
+        return [code for code, _ in cls.DAYS_OF_WEEK].index(day_of_week)
+
+    def save(self, *args, **kwargs):
+        self.day_of_week_num = self.weekday_number(self.day_of_week)
+        if kwargs.get('update_fields') is not None and 'day_of_week' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'day_of_week_num'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.subject.name} - {self.day_of_week} {self.start_time}"
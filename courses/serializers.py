@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from schoolmanagement.reference_cache import ReferenceNameField
+from .conflicts import find_conflicts, slot_for
 from .models import Subject, Course, Schedule
 
 class SubjectSerializer(serializers.ModelSerializer):
@@ -16,7 +18,7 @@ class SubjectSerializer(serializers.ModelSerializer):
         return obj.teachers.count()
 
 class CourseSerializer(serializers.ModelSerializer):
-    grade_name = serializers.CharField(source='grade.name', read_only=True)
+    grade_name = ReferenceNameField('students.Grade', source='grade_id')
     subjects_list = serializers.StringRelatedField(source='subjects', many=True, read_only=True)
     subjects_count = serializers.SerializerMethodField()
     schedules_count = serializers.SerializerMethodField()
@@ -33,11 +35,25 @@ class CourseSerializer(serializers.ModelSerializer):
 
 class ScheduleSerializer(serializers.ModelSerializer):
     course_name = serializers.CharField(source='course.name', read_only=True)
-    subject_name = serializers.CharField(source='subject.name', read_only=True)
+    subject_name = ReferenceNameField('courses.Subject', source='subject_id')
     teacher_name = serializers.CharField(source='teacher.user.get_full_name', read_only=True)
-    section_name = serializers.CharField(source='section.name', read_only=True)
-    grade_name = serializers.CharField(source='section.grade.name', read_only=True)
+    section_name = ReferenceNameField('students.Section', source='section_id')
+    grade_name = ReferenceNameField('students.Grade', source='section.grade_id')
 
     class Meta:
         model = Schedule
         fields = '__all__'
+
+    def validate(self, attrs):
+        values = {**(slot_for(self.instance) if self.instance else {}), **{
+            name: value for name, value in slot_for(attrs).items() if value is not None
+        }}
+        if values['start_time'] and values['end_time'] and values['start_time'] >= values['end_time']:
+            raise serializers.ValidationError({'end_time': 'End time must be after start time'})
+        is_active = attrs.get('is_active', self.instance.is_active if self.instance else True)
+        # Batch imports check the whole timetable at once (conflicts.validate_timetable)
+        if is_active and self.context.get('check_conflicts', True):
+            conflicts = find_conflicts(values, exclude_pk=getattr(self.instance, 'pk', None))
+            if conflicts:
+                raise serializers.ValidationError({'conflicts': conflicts})
+        return attrs
@@ -0,0 +1,57 @@
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Schedule
+from .timetables import SCOPES, rebuild_timetables, schedule_timetable_keys, timetable_keys
+
+
+@receiver(pre_save, sender=Schedule)
+def remember_timetable_keys(sender, instance, **kwargs):
+    instance._timetables_before = set()
+    if not instance._state.adding:
+        before = Schedule.objects.filter(pk=instance.pk).values(*SCOPES.values()).first()
+        if before:
+            instance._timetables_before = timetable_keys(before)
+
+
+@receiver(post_save, sender=Schedule)
+def rebuild_timetables_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # A moved schedule leaves its old section/teacher/room timetables too
+    keys = getattr(instance, '_timetables_before', set()) | schedule_timetable_keys(instance)
+    transaction.on_commit(partial(rebuild_timetables, keys))
+
+
+@receiver(post_delete, sender=Schedule)
+def rebuild_timetables_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(partial(rebuild_timetables, schedule_timetable_keys(instance)))
+
+
+# Models whose names a timetable document embeds: the Schedule lookup reaching
+# their rows and the fields that feed the rendered names
+NAME_SOURCES = {
+    'courses.Course': ('course', {'name'}),
+    'courses.Subject': ('subject', {'name'}),
+    'students.Section': ('section', {'name'}),
+    'students.Grade': ('section__grade', {'name'}),
+    'teachers.Teacher': ('teacher', {'user', 'user_id'}),
+    'auth.User': ('teacher__user', {'first_name', 'last_name'}),
+}
+
+
+def rebuild_timetables_on_rename(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    lookup, fields = NAME_SOURCES[sender._meta.label]
+    if raw or created or (update_fields is not None and not fields & set(update_fields)):
+        return
+    rows = Schedule.objects.filter(is_active=True, **{lookup: instance.pk}).values(*SCOPES.values()).distinct()
+    keys = set()
+    for row in rows:
+        keys |= timetable_keys(row)
+    if keys:
+        transaction.on_commit(partial(rebuild_timetables, keys))
+
+
+for _label in NAME_SOURCES:
+    post_save.connect(rebuild_timetables_on_rename, sender=_label, dispatch_uid=f'timetable_rename_{_label}')
@@ -1,3 +1,223 @@
+from datetime import date, time
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from students.models import Grade, Section
+from teachers.models import Department, Teacher
+from .conflicts import TimetableIndex, validate_timetable
+from .models import Course, Schedule, Subject
+from .timetables import backfill_weekday_numbers
 
-# Create your tests here.
+
+class ScheduleFixtureMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin')
+        cls.grade = Grade.objects.create(name='Grade 5', level=5)
+        cls.section_a = Section.objects.create(name='A', grade=cls.grade)
+        cls.section_b = Section.objects.create(name='B', grade=cls.grade)
+        cls.subject = Subject.objects.create(name='Math', code='MATH5')
+        cls.course = Course.objects.create(name='Grade 5 Core', code='G5', grade=cls.grade)
+        department = Department.objects.create(name='Science', code='SCI')
+        cls.teachers = [cls.create_teacher(department, index) for index in range(2)]
+        cls.schedule = Schedule.objects.create(
+            course=cls.course, subject=cls.subject, teacher=cls.teachers[0], section=cls.section_a,
+            day_of_week='MON', start_time=time(9, 0), end_time=time(10, 0), room_number='101',
+        )
+
+    @classmethod
+    def create_teacher(cls, department, index):
+        user = User.objects.create_user(username=f'teacher{index}')
+        return Teacher.objects.create(
+            user=user, teacher_id=f'T{index}', department=department, employee_id=f'E{index}',
+            date_of_birth=date(1990, 1, 1), gender='F', phone_number='9800000000', emergency_contact='9800000000',
+            address='Street', qualification='MSc', joining_date=date(2020, 1, 1), salary=1000,
+        )
+
+    def slot(self, teacher, section, room, start, end, day='MON', ref=None):
+        return {
+            'ref': ref, 'teacher_id': teacher.pk, 'section_id': section.pk, 'room_number': room,
+            'day_of_week': day, 'start_time': start, 'end_time': end,
+        }
+
+    def payload(self, teacher, section, room, start, end, day='MON'):
+        return {
+            'course': self.course.pk, 'subject': self.subject.pk, 'teacher': teacher.pk, 'section': section.pk,
+            'day_of_week': day, 'start_time': start, 'end_time': end, 'room_number': room,
+        }
+
+
+class TimetableIndexTest(ScheduleFixtureMixin, TestCase):
+    def test_probe_finds_only_overlapping_intervals(self):
+        index = TimetableIndex()
+        index.add(self.slot(self.teachers[0], self.section_a, '101', time(9, 0), time(10, 0), ref=1))
+        index.add(self.slot(self.teachers[0], self.section_a, '101', time(10, 0), time(11, 0), ref=2))
+
+        back_to_back = self.slot(self.teachers[1], self.section_b, '101', time(11, 0), time(12, 0))
+        self.assertEqual(index.conflicts(back_to_back), [])
+
+        clash = index.conflicts(self.slot(self.teachers[1], self.section_b, '101', time(9, 30), time(10, 30)))
+        self.assertEqual(sorted(conflict['conflicts_with'] for conflict in clash), [1, 2])
+        self.assertEqual({conflict['dimension'] for conflict in clash}, {'room'})
+
+    def test_batch_reports_every_conflict_in_one_query(self):
+        slots = [
+            self.slot(self.teachers[0], self.section_b, '102', time(9, 30), time(10, 30), ref='row 0'),
+            self.slot(self.teachers[1], self.section_b, '101', time(10, 0), time(11, 0), ref='row 1'),
+            self.slot(self.teachers[1], self.section_a, '103', time(9, 0), time(9, 45), day='TUE', ref='row 2'),
+        ]
+        with self.assertNumQueries(1):
+            conflicts = validate_timetable(slots)
+        found = {(conflict['schedule'], conflict['conflicts_with'], conflict['dimension']) for conflict in conflicts}
+        self.assertEqual(found, {
+            ('row 0', self.schedule.pk, 'teacher'),
+            ('row 1', 'row 0', 'section'),
+        })
+
+
+class ScheduleConflictApiTest(ScheduleFixtureMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_overlapping_write_is_rejected(self):
+        response = self.client.post(
+            '/api/courses/schedules/', self.payload(self.teachers[1], self.section_b, '101', '09:30', '10:30'),
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['conflicts'][0]['dimension'], 'room')
+
+    def test_update_does_not_conflict_with_itself(self):
+        response = self.client.patch(
+            f'/api/courses/schedules/{self.schedule.pk}/', {'end_time': '10:15'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_import_is_all_or_nothing(self):
+        rows = [
+            self.payload(self.teachers[1], self.section_b, '102', '09:00', '10:00'),
+            self.payload(self.teachers[1], self.section_b, '103', '09:30', '10:30'),
+        ]
+        response = self.client.post('/api/courses/schedules/bulk_import/', {'schedules': rows}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual({conflict['dimension'] for conflict in response.data['conflicts']}, {'teacher', 'section'})
+        self.assertEqual(Schedule.objects.count(), 1)
+
+        rows[1].update(start_time='10:00', end_time='11:00')
+        response = self.client.post('/api/courses/schedules/bulk_import/', {'schedules': rows}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Schedule.objects.count(), 3)
+
+
+class TimetableSnapshotTest(ScheduleFixtureMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/courses/schedules/section_schedule/?section_id={self.section_a.pk}'
+
+    def test_unchanged_timetable_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([day['day_of_week'] for day in response.data['days']], ['MON'])
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_schedule_change_rebuilds_timetables(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                f'/api/courses/schedules/{self.schedule.pk}/', {'section': self.section_b.pk}, format='json',
+            )
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['days'], [])
+        moved = self.client.get(f'/api/courses/schedules/section_schedule/?section_id={self.section_b.pk}')
+        self.assertEqual(moved.data['days'][0]['periods'][0]['id'], self.schedule.pk)
+
+    def test_renames_rebuild_timetables(self):
+        etag = self.client.get(self.url)['ETag']
+        teacher_user = self.teachers[0].user
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.name = 'Grade 5 Science'
+            self.course.save()
+            self.section_a.name = 'Alpha'
+            self.section_a.save()
+            teacher_user.first_name, teacher_user.last_name = 'Ada', 'Lovelace'
+            teacher_user.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        period = response.data['days'][0]['periods'][0]
+        self.assertEqual(
+            (period['course_name'], period['section_name'], period['teacher_name']),
+            ('Grade 5 Science', 'Alpha', 'Ada Lovelace'),
+        )
+
+    def test_padded_ids_share_the_canonical_timetable(self):
+        padded_url = f'/api/courses/schedules/section_schedule/?section_id=0{self.section_a.pk}'
+        self.assertEqual(len(self.client.get(padded_url).data['days']), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Schedule.objects.get(pk=self.schedule.pk).delete()
+        self.assertEqual(self.client.get(padded_url).data['days'], [])
+        response = self.client.get('/api/courses/schedules/teacher_schedule/?teacher_id=abc')
+        self.assertEqual(response.status_code, 400)
+
+    def test_login_does_not_rebuild_timetables(self):
+        teacher_user = self.teachers[0].user
+        with self.captureOnCommitCallbacks() as callbacks:
+            teacher_user.save(update_fields=['last_login'])
+        self.assertEqual(callbacks, [])
+
+
+class CurrentPeriodTest(ScheduleFixtureMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for day, start, end in [('MON', time(10, 0), time(11, 0)), ('WED', time(8, 0), time(9, 0))]:
+            Schedule.objects.create(
+                course=self.course, subject=self.subject, teacher=self.teachers[0], section=self.section_a,
+                day_of_week=day, start_time=start, end_time=end, room_number='101',
+            )
+
+    def current_period(self, at):
+        response = self.client.get(
+            '/api/courses/schedules/current_period/', {'teacher_id': self.teachers[0].pk, 'at': at},
+        )
+        self.assertEqual(response.status_code, 200)
+        period = lambda row: row and (row['day_of_week'], row['start_time'])
+        return period(response.data['current']), period(response.data['next'])
+
+    def test_weekday_number_follows_day_of_week(self):
+        self.assertEqual(self.schedule.day_of_week_num, 0)
+        self.schedule.day_of_week = 'SUN'
+        self.schedule.save(update_fields=['day_of_week'])
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.day_of_week_num, 6)
+
+    def test_current_and_next_period(self):
+        # 2026-10-19 is a Monday
+        self.assertEqual(
+            self.current_period('2026-10-19T09:30'), (('MON', '09:00:00'), ('MON', '10:00:00')),
+        )
+        self.assertEqual(self.current_period('2026-10-19T11:00'), (None, ('WED', '08:00:00')))
+        self.assertEqual(self.current_period('2026-10-22T12:00'), (None, ('MON', '09:00:00')))
+
+    def test_backfill_restores_weekday_numbers(self):
+        Schedule.objects.update(day_of_week_num=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(backfill_weekday_numbers(), 1)
+        self.assertEqual(self.current_period('2026-10-19T11:00'), (None, ('WED', '08:00:00')))
+        self.assertEqual(backfill_weekday_numbers(), 0)
+
+    def test_non_integer_id_is_rejected(self):
+        for params in ({'teacher_id': 'abc'}, {'section_id': '1.5'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/courses/schedules/current_period/', params)
+                self.assertEqual(response.status_code, 400)
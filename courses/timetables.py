@@ -0,0 +1,152 @@
+"""
+Precompiled weekly timetables.
+
+A timetable document holds a section's, teacher's or room's active schedules,
+serialized once and grouped by weekday. Documents live in a Django cache backend
+and are recompiled after a change commits to a Schedule or to a course, subject,
+teacher, section or grade name they embed (courses/signals.py; bulk writes call
+rebuild_timetables). Each document carries a version, the digest of its contents,
+which the views send as the ETag so unchanged timetables are answered with 304
+Not Modified.
+
+Configure through settings.TIMETABLE_CACHE (CACHE_ALIAS, TIMEOUT). The rebuild
+only reaches the cache of the process that made the change: with a per-process
+backend such as the default LocMemCache, other processes keep serving their copy
+until TIMEOUT expires it. Point CACHE_ALIAS at a shared backend such as Redis or
+Memcached in production.
+"""
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Case, PositiveSmallIntegerField, Q, Value, When
+from django.utils import timezone
+from .models import Schedule
+from .serializers import ScheduleSerializer
+
+SCOPES = {
+    'section': 'section_id',
+    'teacher': 'teacher_id',
+    'room': 'room_number',
+}
+DAY_NAMES = dict(Schedule.DAYS_OF_WEEK)
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'TIMETABLE_CACHE', {})}
+
+
+def _cache():
+    return caches[get_config()['CACHE_ALIAS']]
+
+
+def _key(scope, key):
+    return f'timetable:{scope}:{key}'
+
+
+def normalize_key(scope, key):
+    """Canonical cache key; section and teacher ids go through int() so '01' and '1' share an entry"""
+    return str(key).strip() if scope == 'room' else str(int(key))
+
+
+def scope_schedules(scope, key):
+    return Schedule.objects.select_related('course', 'subject', 'teacher__user', 'section__grade').filter(
+        is_active=True, **{SCOPES[scope]: normalize_key(scope, key)}
+    )
+
+
+def compile_timetable(scope, key):
+    """Build the weekly document for one section, teacher or room"""
+    schedules = scope_schedules(scope, key).order_by('day_of_week_num', 'start_time', 'pk')
+    days = []
+    for row in ScheduleSerializer(schedules, many=True).data:
+        if not days or days[-1]['day_of_week'] != row['day_of_week']:
+            days.append({'day_of_week': row['day_of_week'], 'day_name': DAY_NAMES[row['day_of_week']], 'periods': []})
+        days[-1]['periods'].append(row)
+    body = json.dumps(days, cls=DjangoJSONEncoder, sort_keys=True)
+    return {
+        'scope': scope,
+        'key': key,
+        'version': hashlib.sha1(body.encode()).hexdigest()[:16],
+        'compiled_at': timezone.now(),
+        'days': days,
+    }
+
+
+def store_timetable(scope, key):
+    key = normalize_key(scope, key)
+    document = compile_timetable(scope, key)
+    _cache().set(_key(scope, key), document, get_config()['TIMEOUT'])
+    return document
+
+
+def get_timetable(scope, key):
+    """Cached document for ``scope``/``key``, compiled and stored on a miss"""
+    key = normalize_key(scope, key)
+    document = _cache().get(_key(scope, key))
+    if document is None:
+        document = store_timetable(scope, key)
+    return document
+
+
+def timetable_keys(values):
+    """(scope, key) pairs a schedule with ``values`` appears in"""
+    return {
+        (scope, normalize_key(scope, values[field]))
+        for scope, field in SCOPES.items() if values.get(field) not in (None, '')
+    }
+
+
+def schedule_timetable_keys(schedule):
+    return timetable_keys({field: getattr(schedule, field) for field in SCOPES.values()})
+
+
+def rebuild_timetables(keys):
+    for scope, key in keys:
+        store_timetable(scope, key)
+
+
+def current_and_next(scope, key, at=None):
+    """
+    The period running at ``at`` (local time) and the one after it.
+
+    Both come from one range query over (day_of_week_num, start_time); only when
+    nothing is left this week does a second query wrap round to the week's first period.
+    """
+    at = timezone.localtime(at or timezone.now())
+    weekday, now = at.weekday(), at.time()
+    periods = scope_schedules(scope, key).order_by('day_of_week_num', 'start_time')
+    upcoming = list(periods.filter(Q(day_of_week_num=weekday, end_time__gt=now) | Q(day_of_week_num__gt=weekday))[:2])
+    current = None
+    if upcoming and upcoming[0].day_of_week_num == weekday and upcoming[0].start_time <= now:
+        current = upcoming.pop(0)
+    following = upcoming[0] if upcoming else periods.first()
+    return current, following
+
+
+def backfill_weekday_numbers():
+    """
+    Bring day_of_week_num in line with day_of_week on rows written before it existed.
+
+    One UPDATE fixes every stale row; the timetables showing them are rebuilt, since
+    their periods were ordered as if they fell on Monday. Returns the rows fixed.
+    """
+    weekday = Case(
+        *(When(day_of_week=code, then=Value(number)) for number, (code, _) in enumerate(Schedule.DAYS_OF_WEEK)),
+        output_field=PositiveSmallIntegerField(),
+    )
+    stale = Schedule.objects.exclude(day_of_week_num=weekday)
+    keys = set()
+    with transaction.atomic():
+        for row in stale.values(*SCOPES.values()).distinct():
+            keys |= timetable_keys(row)
+        updated = stale.update(day_of_week_num=weekday)
+        transaction.on_commit(lambda: rebuild_timetables(keys))
+    return updated
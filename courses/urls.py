@@ -4,8 +4,9 @@ from .views import SubjectViewSet, CourseViewSet, ScheduleViewSet
 
 router = DefaultRouter()
 router.register(r'subjects', SubjectViewSet)
-router.register(r'', CourseViewSet, basename='course')
 router.register(r'schedules', ScheduleViewSet)
+# The catch-all course routes go last so they do not shadow schedules/
+router.register(r'', CourseViewSet, basename='course')
 
 urlpatterns = [
     path('', include(router.urls)),
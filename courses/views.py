@@ -2,9 +2,27 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from django.db.models import Count
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .conflicts import slot_for, validate_timetable
 from .models import Subject, Course, Schedule
 from .serializers import SubjectSerializer, CourseSerializer, ScheduleSerializer
+from .timetables import current_and_next, get_timetable, rebuild_timetables, schedule_timetable_keys
+
+
+def timetable_response(request, scope, key):
+    """Serve a precompiled timetable, or 304 when the client's ETag is current"""
+    try:
+        document = get_timetable(scope, key)
+    except ValueError:
+        return Response({'error': f'{scope}_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    etag = f'"{document["version"]}"'
+    cached = [tag.strip().removeprefix('W/') for tag in request.headers.get('If-None-Match', '').split(',')]
+    response = Response(status=status.HTTP_304_NOT_MODIFIED) if etag in cached or '*' in cached else Response(document)
+    response['ETag'] = etag
+    return response
 
 class SubjectViewSet(viewsets.ModelViewSet):
     queryset = Subject.objects.all()
@@ -49,7 +67,7 @@ class CourseViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def schedules(self, request, pk=None):
         course = self.get_object()
-        schedules = course.schedules.filter(is_active=True).order_by('day_of_week', 'start_time')
+        schedules = course.schedules.filter(is_active=True).order_by('day_of_week_num', 'start_time')
         serializer = ScheduleSerializer(schedules, many=True)
         return Response(serializer.data)
 
@@ -77,7 +95,7 @@ class ScheduleViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['course', 'subject', 'teacher', 'section', 'day_of_week', 'is_active']
     search_fields = ['subject__name', 'teacher__user__first_name', 'room_number']
-    ordering = ['day_of_week', 'start_time']
+    ordering = ['day_of_week_num', 'start_time']
 
     @action(detail=False, methods=['get'])
     def teacher_schedule(self, request):
@@ -85,13 +103,7 @@ class ScheduleViewSet(viewsets.ModelViewSet):
         if not teacher_id:
             return Response({'error': 'teacher_id parameter required'}, status=400)
         
-        schedules = Schedule.objects.filter(
-            teacher_id=teacher_id, 
-            is_active=True
-        ).order_by('day_of_week', 'start_time')
-        
-        serializer = self.get_serializer(schedules, many=True)
-        return Response(serializer.data)
+        return timetable_response(request, 'teacher', teacher_id)
 
     @action(detail=False, methods=['get'])
     def section_schedule(self, request):
@@ -99,13 +111,7 @@ class ScheduleViewSet(viewsets.ModelViewSet):
         if not section_id:
             return Response({'error': 'section_id parameter required'}, status=400)
         
-        schedules = Schedule.objects.filter(
-            section_id=section_id, 
-            is_active=True
-        ).order_by('day_of_week', 'start_time')
-        
-        serializer = self.get_serializer(schedules, many=True)
-        return Response(serializer.data)
+        return timetable_response(request, 'section', section_id)
 
     @action(detail=False, methods=['get'])
     def room_schedule(self, request):
@@ -113,13 +119,7 @@ class ScheduleViewSet(viewsets.ModelViewSet):
         if not room_number:
             return Response({'error': 'room_number parameter required'}, status=400)
         
-        schedules = Schedule.objects.filter(
-            room_number=room_number, 
-            is_active=True
-        ).order_by('day_of_week', 'start_time')
-        
-        serializer = self.get_serializer(schedules, many=True)
-        return Response(serializer.data)
+        return timetable_response(request, 'room', room_number)
 
     @action(detail=False, methods=['get'])
     def daily_schedule(self, request):
@@ -127,10 +127,71 @@ class ScheduleViewSet(viewsets.ModelViewSet):
         if not day:
             return Response({'error': 'day parameter required'}, status=400)
         
-        schedules = Schedule.objects.filter(
+        schedules = self.get_queryset().filter(
             day_of_week=day.upper(), 
             is_active=True
         ).order_by('start_time')
         
         serializer = self.get_serializer(schedules, many=True)
         return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def current_period(self, request):
+        """What is on now and next for a teacher_id, section_id or room_number (optionally ?at=ISO datetime)"""
+        params = {'teacher': 'teacher_id', 'section': 'section_id', 'room': 'room_number'}
+        scope = next((scope for scope, param in params.items() if request.query_params.get(param)), None)
+        if scope is None:
+            return Response({'error': 'teacher_id, section_id or room_number parameter required'}, status=400)
+
+        at = request.query_params.get('at')
+        if at:
+            at = parse_datetime(at)
+            if at is None:
+                return Response({'error': 'at must be an ISO 8601 datetime'}, status=400)
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
+        key = request.query_params[params[scope]]
+        if scope != 'room':
+            try:
+                key = int(key)
+            except ValueError:
+                return Response({'error': f'{params[scope]} must be an integer'}, status=400)
+        current, following = current_and_next(scope, key, at)
+        return Response({
+            'current': self.get_serializer(current).data if current else None,
+            'next': self.get_serializer(following).data if following else None,
+        })
+
+    @action(detail=False, methods=['post'])
+    def bulk_import(self, request):
+        """Validate a whole timetable in one pass and create it only when nothing clashes"""
+        rows = request.data.get('schedules', [])
+        if not isinstance(rows, list) or not rows:
+            return Response({'error': 'Provide a non-empty schedules list'}, status=400)
+
+        context = {**self.get_serializer_context(), 'check_conflicts': False}
+        serializer = ScheduleSerializer(data=rows, many=True, context=context)
+        if not serializer.is_valid():
+            rejected = [{'row': index, 'errors': errors} for index, errors in enumerate(serializer.errors) if errors]
+            return Response({'error': 'Invalid schedules', 'rejected': rejected}, status=400)
+
+        slots = [
+            slot_for(attrs, ref=f'row {index}')
+            for index, attrs in enumerate(serializer.validated_data) if attrs.get('is_active', True)
+        ]
+        conflicts = validate_timetable(slots)
+        if conflicts:
+            return Response({'error': f'{len(conflicts)} timetable conflicts', 'conflicts': conflicts}, status=400)
+
+        with transaction.atomic():
+            schedules = Schedule.objects.bulk_create([
+                Schedule(**attrs, day_of_week_num=Schedule.weekday_number(attrs['day_of_week']))
+                for attrs in serializer.validated_data
+            ])
+            # bulk_create skips the signals that keep timetables current
+            keys = set().union(*(schedule_timetable_keys(schedule) for schedule in schedules))
+            transaction.on_commit(lambda: rebuild_timetables(keys))
+        return Response({
+            'message': f'Imported {len(schedules)} schedules',
+            'count': len(schedules),
+        }, status=status.HTTP_201_CREATED)
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from employee.scheduling import backfill_next_runs
+
+
+class Command(BaseCommand):
+    help = 'Give active task schedules that predate next_run_at their next occurrence'
+
+    def handle(self, *args, **options):
+        count = backfill_next_runs()
+        self.stdout.write(self.style.SUCCESS(f'Scheduled {count} task schedule(s)'))
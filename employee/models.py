@@ -62,6 +62,14 @@ class Task(TimeStampedModel):
     completion_date = models.DateTimeField(null=True, blank=True)
     estimated_hours = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     actual_hours = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    schedule = models.ForeignKey('TaskSchedule', on_delete=models.SET_NULL, null=True, blank=True, related_name='tasks')
+    scheduled_for = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        constraints = [
+            # One task per schedule occurrence, however often the scheduler tick repeats
+            models.UniqueConstraint(fields=['schedule', 'scheduled_for'], name='unique_task_schedule_occurrence'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.assigned_to.user.username}"
@@ -93,6 +101,17 @@ class TaskSchedule(TimeStampedModel):
     end_date = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     estimated_hours = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    next_run_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'next_run_at'], name='task_schedule_due_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.next_run_at is None:
+            self.next_run_at = self.start_date
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.task_template} - {self.frequency}"
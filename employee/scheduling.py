@@ -0,0 +1,123 @@
+"""
+Tick-based recurring task scheduler.
+
+Each TaskSchedule stores its next occurrence in ``next_run_at``. A periodic tick
+selects every due schedule in one indexed query, creates one Task per schedule with
+bulk_create and advances ``next_run_at`` by calendar arithmetic in local time, so
+runs never drift and "monthly" keeps the start date's day of month (clamped to the
+month's last day). Schedule rows are locked for the tick and each Task is unique
+per (schedule, scheduled_for); occurrences that already have their task are
+skipped, so a repeated or concurrent tick creates nothing twice.
+
+Schedules created before ``next_run_at`` existed have it NULL and no tasks; each
+tick first gives them their next occurrence (backfill_next_runs).
+"""
+import calendar
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from .models import Task, TaskSchedule
+
+TASK_DUE_AFTER = timedelta(days=1)
+
+
+def add_months(value, months, day):
+    """``value`` moved ``months`` ahead on ``day`` of the month, clamped to the month's length"""
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(day, calendar.monthrange(year, month)[1]))
+
+
+def following_run(schedule, run_at):
+    """The occurrence after ``run_at`` for the schedule's frequency, or None for one-off schedules"""
+    local = timezone.localtime(run_at)
+    if schedule.frequency == 'daily':
+        following = local + timedelta(days=1)
+    elif schedule.frequency == 'weekly':
+        following = local + timedelta(weeks=1)
+    elif schedule.frequency == 'monthly':
+        anchor = timezone.localtime(schedule.start_date).day
+        following = add_months(local, 1, anchor)
+    else:
+        return None
+    # Re-resolve the UTC offset so a DST change keeps the local wall-clock time
+    return timezone.make_aware(following.replace(tzinfo=None))
+
+
+def next_run_after(schedule, run_at, now):
+    """First occurrence after ``now``; missed occurrences are skipped rather than replayed"""
+    following = following_run(schedule, run_at)
+    while following is not None and following <= now:
+        following = following_run(schedule, following)
+    if following is not None and schedule.end_date and following > schedule.end_date:
+        return None
+    return following
+
+
+def backfill_next_runs(now=None):
+    """
+    Set ``next_run_at`` on active schedules the tick has never handled.
+
+    Recurring schedules resume at their first occurrence from now on; a one-off
+    schedule whose start has passed was already run by the previous scheduler and
+    is left alone. Returns the number of schedules updated.
+    """
+    now = now or timezone.now()
+    pending = list(TaskSchedule.objects.filter(is_active=True, next_run_at__isnull=True, tasks__isnull=True))
+    updated = []
+    for schedule in pending:
+        if schedule.start_date >= now:
+            schedule.next_run_at = schedule.start_date
+        else:
+            schedule.next_run_at = next_run_after(schedule, schedule.start_date, now)
+        if schedule.next_run_at is not None:
+            schedule.updated_at = now
+            updated.append(schedule)
+    TaskSchedule.objects.bulk_update(updated, ['next_run_at', 'updated_at'])
+    return len(updated)
+
+
+def run_due_schedules(now=None, schedule_ids=None):
+    """
+    Materialise the Task for every schedule whose ``next_run_at`` has passed.
+
+    Returns the created tasks. Each due schedule yields one task for its current
+    occurrence and moves on to its next future occurrence.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        backfill_next_runs(now)
+        due = TaskSchedule.objects.select_for_update(skip_locked=True).filter(
+            is_active=True, next_run_at__lte=now
+        )
+        if schedule_ids is not None:
+            due = due.filter(pk__in=schedule_ids)
+        schedules = list(due.order_by('next_run_at'))
+        # A tick that read a stale next_run_at finds the occurrence's task already there
+        existing = set(Task.objects.filter(
+            schedule__in=schedules, scheduled_for__in={schedule.next_run_at for schedule in schedules}
+        ).values_list('schedule_id', 'scheduled_for'))
+
+        tasks = []
+        for schedule in schedules:
+            run_at = schedule.next_run_at
+            schedule.next_run_at = next_run_after(schedule, run_at, now)
+            schedule.updated_at = now
+            if (schedule.pk, run_at) in existing:
+                continue
+            tasks.append(Task(
+                title=schedule.task_template,
+                description=schedule.description_template,
+                assigned_to_id=schedule.assigned_to_id,
+                assigned_by_id=schedule.assigned_by_id,
+                category_id=schedule.category_id,
+                priority=schedule.priority,
+                due_date=run_at + TASK_DUE_AFTER,
+                estimated_hours=schedule.estimated_hours,
+                schedule=schedule,
+                scheduled_for=run_at,
+            ))
+
+        Task.objects.bulk_create(tasks)
+        TaskSchedule.objects.bulk_update(schedules, ['next_run_at', 'updated_at'])
+    return tasks
@@ -47,11 +47,21 @@ class TaskSerializer(serializers.ModelSerializer):
     assigned_by_name = serializers.CharField(source='assigned_by.user.get_full_name', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     comments = TaskCommentSerializer(many=True, read_only=True)
-    
+
     class Meta:
         model = Task
         fields = '__all__'
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 'comments' in the context selects the nested payload: none, latest or all
+        mode = self.context.get('comments', 'all')
+        if mode == 'none':
+            self.fields.pop('comments')
+        elif mode == 'latest':
+            # Filled by the latest-comment Prefetch in views.task_queryset
+            self.fields['comments'] = TaskCommentSerializer(source='latest_comments', many=True, read_only=True)
+
 
 
 class TaskScheduleSerializer(serializers.ModelSerializer):
@@ -61,6 +71,7 @@ class TaskScheduleSerializer(serializers.ModelSerializer):
     class Meta:
         model = TaskSchedule
         fields = '__all__'
+        read_only_fields = ['next_run_at']
         
 
 
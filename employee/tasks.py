@@ -1,10 +1,13 @@
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection, send_mail
 from django.conf import settings
+from django.db.models import Count, Q
 from django.utils import timezone
-from datetime import timedelta
-from .models import Task, TaskSchedule, Employee, EmailLog
+from .models import Task, Employee, EmailLog
+from .scheduling import run_due_schedules
 
+OPEN_TASK_STATUSES = ['pending', 'in_progress']
+SUMMARY_CHUNK_SIZE = 200
 
 
 @shared_task
@@ -88,68 +91,38 @@ def send_task_reminder_email(task_id):
     
 
 @shared_task
-def create_scheduled_task(schedule_id):
-    try:
-        schedule = TaskSchedule.objects.get(id=schedule_id)
-        if not schedule.is_active:
-            return
-        
-        # Create task based on schedule
-        due_date = timezone.now() + timedelta(days=1)  # Default 1 day from now
-        
-        task = Task.objects.create(
-            title=schedule.task_template,
-            description=schedule.description_template,
-            assigned_to=schedule.assigned_to,
-            assigned_by=schedule.assigned_by,
-            category=schedule.category,
-            priority=schedule.priority,
-            due_date=due_date,
-            estimated_hours=schedule.estimated_hours
-        )
-        
-        # Send assignment email
+def run_due_task_schedules():
+    """Scheduler tick: create the tasks of every due TaskSchedule (see employee/scheduling.py)"""
+    tasks = run_due_schedules()
+    for task in tasks:
         send_task_assignment_email.delay(task.id)
-        
-        # Schedule next task based on frequency
-        if schedule.frequency == 'daily':
-            next_run = timezone.now() + timedelta(days=1)
-        elif schedule.frequency == 'weekly':
-            next_run = timezone.now() + timedelta(weeks=1)
-        elif schedule.frequency == 'monthly':
-            next_run = timezone.now() + timedelta(days=30)
-        else:
-            return  # One-time task
-        
-        # Check if we should continue scheduling
-        if schedule.end_date and next_run > schedule.end_date:
-            return
-        
-        # Schedule next task creation
-        create_scheduled_task.apply_async(args=[schedule_id], eta=next_run)
-        
-    except TaskSchedule.DoesNotExist:
-        pass
+    return len(tasks)
+
 
 @shared_task
-def send_daily_task_summary():
-    employees = Employee.objects.filter(is_active=True)
-    
-    for employee in employees:
-        pending_tasks = Task.objects.filter(
-            assigned_to=employee,
-            status__in=['pending', 'in_progress']
-        ).count()
-        
-        overdue_tasks = Task.objects.filter(
-            assigned_to=employee,
-            status__in=['pending', 'in_progress'],
-            due_date__lt=timezone.now()
-        ).count()
-        
-        if pending_tasks > 0:
-            subject = f"Daily Task Summary - {pending_tasks} pending tasks"
-            message = f"""
+def create_scheduled_task(schedule_id):
+    """Run a single schedule now if it is due; recurrence is handled by run_due_task_schedules"""
+    tasks = run_due_schedules(schedule_ids=[schedule_id])
+    for task in tasks:
+        send_task_assignment_email.delay(task.id)
+    return len(tasks)
+
+
+def open_task_counts(employee_ids=None):
+    """{employee_id: (pending, overdue)} for active employees from one grouped query"""
+    tasks = Task.objects.filter(status__in=OPEN_TASK_STATUSES, assigned_to__is_active=True)
+    if employee_ids is not None:
+        tasks = tasks.filter(assigned_to_id__in=employee_ids)
+    rows = tasks.values('assigned_to_id').annotate(
+        pending=Count('id'),
+        overdue=Count('id', filter=Q(due_date__lt=timezone.now())),
+    ).order_by()
+    return {row['assigned_to_id']: (row['pending'], row['overdue']) for row in rows}
+
+
+def daily_summary_message(employee, pending_tasks, overdue_tasks):
+    subject = f"Daily Task Summary - {pending_tasks} pending tasks"
+    message = f"""
             Hello {employee.user.get_full_name()},
             
             Here's your daily task summary:
@@ -162,11 +135,55 @@ def send_daily_task_summary():
             Best regards,
             Task Management System
             """
-            
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [employee.user.email],
-                fail_silently=True,
-            )
+    return subject, message
+
+
+@shared_task
+def send_daily_task_summary():
+    """Send every active employee with open tasks their summary, fanning out in chunks"""
+    counts = open_task_counts()
+    employee_ids = sorted(counts)
+    if len(employee_ids) <= SUMMARY_CHUNK_SIZE:
+        return send_task_summary_chunk(employee_ids, counts)
+    for start in range(0, len(employee_ids), SUMMARY_CHUNK_SIZE):
+        send_task_summary_chunk.delay(employee_ids[start:start + SUMMARY_CHUNK_SIZE])
+    return len(employee_ids)
+
+
+@shared_task
+def send_task_summary_chunk(employee_ids, counts=None):
+    """
+    Build and send the summaries for one chunk of employees over a single SMTP
+    connection, then record the outcome of each message with one bulk_create.
+    Subtasks recount their own chunk so the broker payload stays a list of ids.
+    """
+    counts = counts if counts is not None else open_task_counts(employee_ids)
+    # employee_ids picks the recipients; counts is only looked up, so it may cover more employees
+    employees = Employee.objects.filter(pk__in=list(employee_ids)).select_related('user').order_by('pk')
+    messages, logs = [], []
+    for employee in employees:
+        if employee.pk not in counts:
+            continue
+        subject, message = daily_summary_message(employee, *counts[employee.pk])
+        messages.append(EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [employee.user.email]))
+        logs.append(EmailLog(recipient=employee, subject=subject, message=message))
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        # One message per call on the shared connection, so a bad address only fails its own log row
+        for email, log in zip(messages, logs):
+            try:
+                connection.send_messages([email])
+                log.sent_successfully = True
+            except Exception as e:
+                log.error_message = str(e)
+    except Exception as e:
+        for log in logs:
+            if not log.sent_successfully:
+                log.error_message = log.error_message or str(e)
+    finally:
+        connection.close()
+
+    EmailLog.objects.bulk_create(logs)
+    return sum(log.sent_successfully for log in logs)
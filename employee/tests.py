@@ -1,3 +1,194 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import Department, EmailLog, Employee, Task, TaskCategory, TaskComment, TaskSchedule
+from .scheduling import add_months, next_run_after, run_due_schedules
+from .tasks import open_task_counts, send_daily_task_summary, send_task_summary_chunk
 
-# Create your tests here.
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class EmployeeFixtureMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name='Operations')
+        cls.manager = cls.create_employee('E0')
+        cls.employees = [cls.create_employee(f'E{i}') for i in range(1, 4)]
+
+    @classmethod
+    def create_employee(cls, employee_id, **kwargs):
+        user = User.objects.create_user(
+            username=employee_id.lower(), email=f'{employee_id.lower()}@example.com',
+            first_name='Staff', last_name=employee_id,
+        )
+        return Employee.objects.create(
+            user=user, employee_id=employee_id, department=cls.department, position='Clerk',
+            hire_date=date(2020, 1, 1), **kwargs,
+        )
+
+    @classmethod
+    def create_schedule(cls, frequency, start_date, end_date=None):
+        return TaskSchedule.objects.create(
+            task_template=f'{frequency} check', description_template='Routine check', assigned_to=cls.employees[0],
+            assigned_by=cls.manager, frequency=frequency, start_date=start_date, end_date=end_date,
+        )
+
+
+class AddMonthsTest(TestCase):
+    def test_day_is_clamped_to_the_month_length(self):
+        self.assertEqual(add_months(date(2026, 1, 31), 1, 31), date(2026, 2, 28))
+        self.assertEqual(add_months(date(2028, 1, 31), 1, 31), date(2028, 2, 29))
+        self.assertEqual(add_months(date(2026, 4, 30), 1, 31), date(2026, 5, 31))
+
+    def test_year_rolls_over(self):
+        self.assertEqual(add_months(date(2026, 11, 15), 2, 15), date(2027, 1, 15))
+        self.assertEqual(add_months(date(2026, 12, 31), 14, 31), date(2028, 2, 29))
+
+
+@override_settings(TIME_ZONE='UTC')
+class NextRunAfterTest(EmployeeFixtureMixin, TestCase):
+    def test_monthly_keeps_the_start_day_after_a_short_month(self):
+        schedule = self.create_schedule('monthly', utc(2026, 1, 31, 9))
+        february = next_run_after(schedule, utc(2026, 1, 31, 9), utc(2026, 1, 31, 9, 30))
+        self.assertEqual(february, utc(2026, 2, 28, 9))
+        self.assertEqual(next_run_after(schedule, february, february), utc(2026, 3, 31, 9))
+
+    def test_missed_occurrences_are_skipped(self):
+        schedule = self.create_schedule('daily', utc(2026, 1, 1, 9))
+        self.assertEqual(next_run_after(schedule, utc(2026, 1, 1, 9), utc(2026, 1, 5, 12)), utc(2026, 1, 6, 9))
+
+    def test_end_date_and_one_off_schedules_stop(self):
+        daily = self.create_schedule('daily', utc(2026, 1, 1, 9), end_date=utc(2026, 1, 2, 0))
+        self.assertIsNone(next_run_after(daily, utc(2026, 1, 1, 9), utc(2026, 1, 1, 9)))
+        once = self.create_schedule('once', utc(2026, 1, 1, 9))
+        self.assertIsNone(next_run_after(once, utc(2026, 1, 1, 9), utc(2026, 1, 1, 9)))
+
+
+@override_settings(TIME_ZONE='UTC')
+class RunDueSchedulesTest(EmployeeFixtureMixin, TestCase):
+    def test_repeated_tick_creates_each_occurrence_once(self):
+        schedule = self.create_schedule('monthly', utc(2026, 1, 31, 9))
+        self.create_schedule('weekly', utc(2026, 2, 1, 9))
+        now = utc(2026, 1, 31, 9, 30)
+
+        created = run_due_schedules(now=now)
+        self.assertEqual([(task.title, task.scheduled_for) for task in created],
+                         [('monthly check', utc(2026, 1, 31, 9))])
+        self.assertEqual(run_due_schedules(now=now), [])
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.next_run_at, utc(2026, 2, 28, 9))
+
+        # A tick that read a stale next_run_at skips the occurrence without failing the others
+        TaskSchedule.objects.filter(pk=schedule.pk).update(next_run_at=utc(2026, 1, 31, 9))
+        daily = self.create_schedule('daily', utc(2026, 1, 31, 8))
+        created = run_due_schedules(now=now)
+        self.assertEqual([task.schedule_id for task in created], [daily.pk])
+        self.assertEqual(Task.objects.filter(schedule=schedule).count(), 1)
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.next_run_at, utc(2026, 2, 28, 9))
+
+    def test_one_off_schedule_runs_once(self):
+        schedule = self.create_schedule('once', utc(2026, 1, 31, 9))
+        self.assertEqual(len(run_due_schedules(now=utc(2026, 3, 1))), 1)
+        schedule.refresh_from_db()
+        self.assertIsNone(schedule.next_run_at)
+        self.assertEqual(run_due_schedules(now=utc(2026, 4, 1)), [])
+
+    def test_schedules_without_next_run_are_backfilled(self):
+        weekly = self.create_schedule('weekly', utc(2026, 1, 5, 9))
+        upcoming = self.create_schedule('daily', utc(2026, 3, 1, 9))
+        past_once = self.create_schedule('once', utc(2026, 1, 1, 9))
+        TaskSchedule.objects.update(next_run_at=None)
+
+        self.assertEqual(run_due_schedules(now=utc(2026, 2, 1, 12)), [])
+        next_runs = dict(TaskSchedule.objects.values_list('pk', 'next_run_at'))
+        self.assertEqual(next_runs, {
+            weekly.pk: utc(2026, 2, 2, 9), upcoming.pk: utc(2026, 3, 1, 9), past_once.pk: None,
+        })
+        created = run_due_schedules(now=utc(2026, 2, 2, 9, 30))
+        self.assertEqual([task.schedule_id for task in created], [weekly.pk])
+
+
+class TaskCommentModesTest(EmployeeFixtureMixin, TestCase):
+    url = '/api/employee/tasks/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.category = TaskCategory.objects.create(name='Admin')
+        for index in range(6):
+            cls.create_task(index)
+
+    @classmethod
+    def create_task(cls, index):
+        task = Task.objects.create(
+            title=f'Task {index}', description='Do it', assigned_to=cls.employees[index % 3], assigned_by=cls.manager,
+            category=cls.category, due_date=timezone.now(),
+        )
+        for number in range(3):
+            TaskComment.objects.create(task=task, author=cls.employees[number], comment=f'Comment {number}')
+        return task
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager.user)
+
+    def test_query_count_per_mode_does_not_grow_with_tasks(self):
+        # COUNT + tasks with their users and category, plus one comments query unless disabled
+        for mode, queries in (('none', 2), ('latest', 3), ('all', 3)):
+            with self.subTest(mode=mode):
+                with self.assertNumQueries(queries):
+                    response = self.client.get(self.url, {'comments': mode})
+                self.assertEqual(response.status_code, 200)
+                self.create_task(100)
+                with self.assertNumQueries(queries):
+                    self.client.get(self.url, {'comments': mode})
+
+    def test_modes_shape_the_nested_comments(self):
+        rows = self.client.get(self.url, {'comments': 'none'}).json()['results']
+        self.assertNotIn('comments', rows[0])
+        rows = self.client.get(self.url, {'comments': 'latest'}).json()['results']
+        self.assertEqual([comment['comment'] for comment in rows[0]['comments']], ['Comment 2'])
+        rows = self.client.get(self.url).json()['results']
+        self.assertEqual([comment['comment'] for comment in rows[0]['comments']], ['Comment 0', 'Comment 1', 'Comment 2'])
+        self.assertEqual(rows[0]['assigned_by_name'], 'Staff E0')
+
+    def test_unknown_mode_is_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'comments': 'some'}).status_code, 400)
+
+
+class TaskSummaryMailTest(EmployeeFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.idle = cls.create_employee('E9')
+        now = timezone.now()
+        open_tasks = ((cls.employees[0], -1), (cls.employees[0], 2), (cls.employees[1], 2), (cls.employees[2], -3))
+        for employee, due_in in open_tasks:
+            Task.objects.create(
+                title='Review', description='Review', assigned_to=employee, assigned_by=cls.manager,
+                due_date=now + timedelta(days=due_in),
+            )
+
+    def test_chunk_mails_only_its_own_employees(self):
+        counts = open_task_counts()
+        chunk = [self.employees[0].pk, self.idle.pk]
+        with self.assertNumQueries(2):
+            sent = send_task_summary_chunk(chunk, counts)
+        self.assertEqual(sent, 1)
+        self.assertEqual([message.to for message in mail.outbox], [['e1@example.com']])
+        self.assertEqual(mail.outbox[0].subject, 'Daily Task Summary - 2 pending tasks')
+        self.assertEqual(list(EmailLog.objects.values_list('recipient_id', 'sent_successfully')),
+                         [(self.employees[0].pk, True)])
+
+    def test_daily_summary_batches_every_employee_with_open_tasks(self):
+        with self.assertNumQueries(3):
+            self.assertEqual(send_daily_task_summary(), 3)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         ['e1@example.com', 'e2@example.com', 'e3@example.com'])
+        self.assertEqual(EmailLog.objects.filter(sent_successfully=True).count(), 3)
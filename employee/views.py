@@ -1,3 +1,53 @@
-from django.shortcuts import render
+from rest_framework import viewsets, filters
+from rest_framework.exceptions import ValidationError
+from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import OuterRef, Prefetch, Subquery
+from .models import Task, TaskComment
+from .serializers import TaskSerializer
 
-# Create your views here.
+COMMENT_MODES = ('none', 'latest', 'all')
+
+
+def task_queryset(comments='all'):
+    """
+    Tasks with everything TaskSerializer renders loaded up front.
+
+    The assignee/assigner users and the category are joined in; comments and their
+    authors are prefetched in one extra query for ``all``, only the newest comment
+    per task for ``latest`` and not at all for ``none``.
+    """
+    queryset = Task.objects.select_related('assigned_to__user', 'assigned_by__user', 'category')
+    comment_queryset = TaskComment.objects.select_related('author__user')
+    if comments == 'all':
+        queryset = queryset.prefetch_related(Prefetch('comments', queryset=comment_queryset.order_by('created_at', 'pk')))
+    elif comments == 'latest':
+        latest = TaskComment.objects.filter(task=OuterRef('task')).order_by('-created_at', '-pk').values('pk')[:1]
+        queryset = queryset.prefetch_related(Prefetch(
+            'comments', queryset=comment_queryset.filter(pk=Subquery(latest)), to_attr='latest_comments'
+        ))
+    return queryset
+
+
+class TaskViewSet(viewsets.ModelViewSet):
+    serializer_class = TaskSerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['status', 'priority', 'assigned_to', 'assigned_by', 'category']
+    search_fields = ['title', 'description']
+    ordering_fields = ['due_date', 'priority', 'created_at']
+    ordering = ['-created_at']
+
+    def comments_mode(self):
+        if self.action not in ('list', 'retrieve'):
+            return 'all'
+        mode = self.request.query_params.get('comments', 'all')
+        if mode not in COMMENT_MODES:
+            raise ValidationError({'comments': f'Must be one of: {", ".join(COMMENT_MODES)}'})
+        return mode
+
+    def get_queryset(self):
+        return task_queryset(self.comments_mode())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['comments'] = self.comments_mode()
+        return context
@@ -82,6 +82,20 @@ class PaymentAdmin(admin.ModelAdmin):
         return format_html('<a href="{}">View Receipt</a>', url)
     view_receipt.short_description = 'Receipt'
 
+@admin.register(ReceiptSequence)
+class ReceiptSequenceAdmin(admin.ModelAdmin):
+    list_display = ('school', 'date', 'last_value')
+    list_filter = ('school',)
+    date_hierarchy = 'date'
+    readonly_fields = ('id', 'school', 'date', 'last_value', 'created_at', 'updated_at')
+
+@admin.register(FeeLedger)
+class FeeLedgerAdmin(admin.ModelAdmin):
+    list_display = ('school', 'academic_year', 'collected', 'pending', 'overdue', 'discount', 'fine', 'updated_at')
+    list_filter = ('school', 'academic_year')
+    readonly_fields = ('id', 'school', 'academic_year', 'collected', 'pending', 'overdue', 'discount', 'fine',
+                       'created_at', 'updated_at')
+
 @admin.register(PaymentDetail)
 class PaymentDetailAdmin(admin.ModelAdmin):
     list_display = ('payment', 'get_student', 'get_fee_type', 'amount')
@@ -0,0 +1,141 @@
+"""
+Payment allocation engine.
+
+A payment is recorded in one transaction: the targeted StudentFee rows are loaded
+with row locks in a single query, the split is validated against Payment.amount,
+PaymentDetail rows are bulk-created and the fees' amount_paid/payment_status are
+bulk-updated. Any failure rolls the whole payment back.
+"""
+import uuid
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.utils import timezone
+from .ledger import record_fee_changes, snapshot
+from .models import Payment, PaymentDetail, PaymentStatusChoices, StudentFee
+from .receipts import next_receipt_number
+
+CENT = Decimal('0.01')
+OUTSTANDING_STATUSES = [
+    PaymentStatusChoices.PENDING,
+    PaymentStatusChoices.PARTIAL,
+    PaymentStatusChoices.OVERDUE,
+]
+
+
+class AllocationError(Exception):
+    pass
+
+
+def to_amount(value, label='amount'):
+    try:
+        amount = Decimal(str(value)).quantize(CENT)
+    except (InvalidOperation, TypeError, ValueError):
+        raise AllocationError(f'{label} must be a number')
+    if not amount.is_finite() or amount <= 0:
+        raise AllocationError(f'{label} must be greater than zero')
+    return amount
+
+
+def payment_status_for(fee, today=None):
+    if fee.amount_paid >= fee.total_amount:
+        return PaymentStatusChoices.PAID
+    # A part-paid overdue fee stays overdue; the sweeper never transitions it twice
+    if fee.payment_status == PaymentStatusChoices.OVERDUE and fee.due_date < (today or timezone.localdate()):
+        return PaymentStatusChoices.OVERDUE
+    if fee.amount_paid > 0:
+        return PaymentStatusChoices.PARTIAL
+    return fee.payment_status
+
+
+def _locked_fees(student, **filters):
+    # Lock in primary-key order so concurrent payments never deadlock on each other
+    return StudentFee.objects.select_for_update().filter(
+        student=student, school_id=student.school_id, **filters
+    ).order_by('pk')
+
+
+def plan_explicit(student, fee_allocations):
+    """[(fee, amount)] for ``[{'student_fee_id', 'amount'}]`` after checking each balance"""
+    if not isinstance(fee_allocations, list):
+        raise AllocationError('fee_allocations must be a list')
+    requested = {}
+    for index, allocation in enumerate(fee_allocations):
+        if not isinstance(allocation, dict):
+            raise AllocationError(f'fee_allocations[{index}] must be an object')
+        try:
+            fee_id = str(uuid.UUID(str(allocation.get('student_fee_id'))))
+        except ValueError:
+            raise AllocationError(f'fee_allocations[{index}].student_fee_id must be a student fee id')
+        amount = to_amount(allocation.get('amount'), f'fee_allocations[{index}].amount')
+        requested[fee_id] = requested.get(fee_id, Decimal('0')) + amount
+
+    fees = {str(fee.pk): fee for fee in _locked_fees(student, pk__in=list(requested))}
+    missing = [fee_id for fee_id in requested if fee_id not in fees]
+    if missing:
+        raise AllocationError(f'Student fees not found: {", ".join(missing)}')
+
+    plan = []
+    for fee_id, amount in requested.items():
+        fee = fees[fee_id]
+        if amount > fee.balance_amount:
+            raise AllocationError(f'Allocation of {amount} exceeds balance {fee.balance_amount} for fee {fee_id}')
+        plan.append((fee, amount))
+    return plan
+
+
+def plan_auto(student, amount):
+    """Spread ``amount`` over the student's outstanding fees, oldest due date first"""
+    fees = _locked_fees(student, payment_status__in=OUTSTANDING_STATUSES).order_by('due_date', 'created_at', 'pk')
+    plan, remaining = [], amount
+    for fee in fees:
+        if remaining <= 0:
+            break
+        share = min(fee.balance_amount, remaining)
+        if share > 0:
+            plan.append((fee, share))
+            remaining -= share
+    if remaining > 0:
+        raise AllocationError(f'Payment exceeds outstanding balance by {remaining}')
+    return plan
+
+
+def collect_payment(student, amount, payment_method, collected_by=None, fee_allocations=None, **payment_fields):
+    """
+    Record a payment for ``student`` and apply it to their fees.
+
+    With ``fee_allocations`` the split must add up to ``amount``; without it the
+    amount is auto-allocated to the oldest outstanding fees. Returns the Payment.
+    """
+    amount = to_amount(amount)
+    now = timezone.now()
+    today = timezone.localdate()
+    with transaction.atomic():
+        plan = plan_explicit(student, fee_allocations) if fee_allocations else plan_auto(student, amount)
+        allocated = sum((share for _, share in plan), Decimal('0'))
+        if allocated != amount:
+            raise AllocationError(f'Allocations total {allocated} but payment amount is {amount}')
+
+        payment = Payment.objects.create(
+            school_id=student.school_id,
+            student=student,
+            receipt_number=next_receipt_number(student.school),
+            payment_date=now,
+            amount=amount,
+            payment_method=payment_method,
+            collected_by=collected_by,
+            **payment_fields,
+        )
+        PaymentDetail.objects.bulk_create([
+            PaymentDetail(payment=payment, student_fee=fee, amount=share) for fee, share in plan
+        ])
+        changes = []
+        for fee, share in plan:
+            before = snapshot(fee)
+            fee.amount_paid += share
+            fee.payment_status = payment_status_for(fee, today)
+            fee.updated_at = now
+            changes.append((fee, before, snapshot(fee)))
+        StudentFee.objects.bulk_update([fee for fee, _ in plan], ['amount_paid', 'payment_status', 'updated_at'])
+        record_fee_changes(changes)
+    payment.allocations = plan
+    return payment
@@ -0,0 +1,120 @@
+"""
+Bulk fee invoicing.
+
+Turns FeeStructure rows into StudentFee rows for every active student of the
+structure's class. Students are processed in batches: each batch loads its existing
+fees and approved discounts in one query apiece, works out discounts in memory and
+writes the new fees with a single bulk_create. Re-running skips (student,
+fee_structure) pairs that already exist, so the job is safe to repeat.
+"""
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import transaction
+from .ledger import record_fee_changes, snapshot
+from .models import FeeStructure, PaymentStatusChoices, StatusChoices, Student, StudentDiscount, StudentFee
+
+CENT = Decimal('0.01')
+BATCH_SIZE = 500
+
+
+def _fee_types(applicable_fee_types):
+    return {fee_type.strip() for fee_type in (applicable_fee_types or '').split(',') if fee_type.strip()}
+
+
+def discount_for(structure, rules):
+    """Total discount on ``structure`` from the student's rules, capped at the fee amount"""
+    total = Decimal('0')
+    for rule in rules:
+        if not rule['valid_from'] <= structure['due_date'] <= rule['valid_until']:
+            continue
+        fee_types = _fee_types(rule['applicable_fee_types'])
+        if fee_types and structure['fee_type'] not in fee_types:
+            continue
+        if rule['discount_type'] == 'percentage':
+            total += structure['amount'] * rule['value'] / 100
+        else:
+            total += rule['value']
+    return min(total, structure['amount']).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _discount_rules(student_ids):
+    rules = defaultdict(list)
+    rows = StudentDiscount.objects.filter(
+        student_id__in=student_ids, is_active=True, discount__is_active=True
+    ).values(
+        'student_id', 'discount__discount_type', 'discount__value', 'discount__applicable_fee_types',
+        'discount__valid_from', 'discount__valid_until',
+    )
+    for row in rows:
+        rules[row['student_id']].append({
+            name.replace('discount__', ''): value for name, value in row.items() if name != 'student_id'
+        })
+    return rules
+
+
+def generate_student_fees(school, academic_year, class_ids=None, fee_types=None, dry_run=False,
+                          batch_size=BATCH_SIZE, progress=None):
+    """
+    Invoice every active student of ``school`` for the academic year's fee structures.
+
+    ``class_ids``/``fee_types`` narrow the structures. ``progress(done, total)`` is
+    called after each batch of students. With ``dry_run`` nothing is written. Returns
+    a summary with created/skipped counts and the amount and discount totals.
+    """
+    structures = FeeStructure.objects.filter(school=school, academic_year=academic_year, is_active=True)
+    if class_ids:
+        structures = structures.filter(class_grade_id__in=class_ids)
+    if fee_types:
+        structures = structures.filter(fee_type__in=fee_types)
+    by_class = defaultdict(list)
+    for structure in structures.values('id', 'class_grade_id', 'fee_type', 'amount', 'due_date'):
+        by_class[structure['class_grade_id']].append(structure)
+    structure_ids = [structure['id'] for rows in by_class.values() for structure in rows]
+
+    students = list(Student.objects.filter(
+        school=school, is_active=True, status=StatusChoices.ACTIVE, current_class_id__in=list(by_class)
+    ).order_by('pk').values_list('pk', 'current_class_id'))
+
+    summary = {
+        'dry_run': dry_run,
+        'students': len(students),
+        'fee_structures': len(structure_ids),
+        'created': 0,
+        'skipped_existing': 0,
+        'amount_due': Decimal('0'),
+        'discount': Decimal('0'),
+    }
+    for start in range(0, len(students), batch_size):
+        batch = students[start:start + batch_size]
+        with transaction.atomic():
+            if not dry_run:
+                # Serialises concurrent runs over the same structures so no pair is invoiced twice
+                list(FeeStructure.objects.select_for_update().filter(pk__in=structure_ids).values_list('pk'))
+            student_ids = [student_id for student_id, _ in batch]
+            existing = set(StudentFee.objects.filter(
+                student_id__in=student_ids, fee_structure_id__in=structure_ids
+            ).values_list('student_id', 'fee_structure_id'))
+            rules = _discount_rules(student_ids)
+
+            fees = []
+            for student_id, class_id in batch:
+                for structure in by_class[class_id]:
+                    if (student_id, structure['id']) in existing:
+                        summary['skipped_existing'] += 1
+                        continue
+                    discount = discount_for(structure, rules.get(student_id, ()))
+                    fees.append(StudentFee(
+                        school=school, student_id=student_id, fee_structure_id=structure['id'],
+                        amount_due=structure['amount'], discount_amount=discount,
+                        due_date=structure['due_date'], payment_status=PaymentStatusChoices.PENDING,
+                    ))
+                    summary['amount_due'] += structure['amount']
+                    summary['discount'] += discount
+
+            summary['created'] += len(fees)
+            if fees and not dry_run:
+                StudentFee.objects.bulk_create(fees)
+                record_fee_changes([(fee, None, snapshot(fee)) for fee in fees])
+        if progress:
+            progress(min(start + batch_size, len(students)), len(students))
+    return summary
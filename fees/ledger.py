@@ -0,0 +1,162 @@
+"""
+Incrementally maintained fee ledger.
+
+Every StudentFee contributes to its school's FeeLedger row for the fee structure's
+academic year: amount_paid to ``collected``, the outstanding balance to ``pending``
+(pending/partial) or ``overdue``, plus its discount and fine. Writers pass the fee's
+snapshot before and after a change to record_fee_changes(), which applies the net
+difference with F() increments. Single-row saves are covered by fees/signals.py;
+bulk writers call it themselves. reconcile_ledger() recomputes everything from
+StudentFee and reports (or fixes) drift.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+from .models import FeeLedger, FeeStructure, PaymentStatusChoices, StudentFee
+
+LEDGER_FIELDS = ('collected', 'pending', 'overdue', 'discount', 'fine')
+SNAPSHOT_FIELDS = ('amount_due', 'amount_paid', 'discount_amount', 'fine_amount', 'payment_status')
+PENDING_STATUSES = [PaymentStatusChoices.PENDING, PaymentStatusChoices.PARTIAL]
+ZERO = Decimal('0.00')
+
+
+def snapshot(fee):
+    """The StudentFee values the ledger depends on, taken before mutating the fee"""
+    return tuple(getattr(fee, name) for name in SNAPSHOT_FIELDS)
+
+
+def contribution(amount_due, amount_paid, discount_amount, fine_amount, payment_status):
+    balance = Decimal(amount_due) + Decimal(fine_amount) - Decimal(discount_amount) - Decimal(amount_paid)
+    return {
+        'collected': Decimal(amount_paid),
+        'pending': balance if payment_status in PENDING_STATUSES else ZERO,
+        'overdue': balance if payment_status == PaymentStatusChoices.OVERDUE else ZERO,
+        'discount': Decimal(discount_amount),
+        'fine': Decimal(fine_amount),
+    }
+
+
+def _academic_years(fee_structure_ids):
+    return dict(FeeStructure.objects.filter(pk__in=fee_structure_ids).values_list('pk', 'academic_year_id'))
+
+
+def record_fee_changes(changes):
+    """
+    Apply ledger deltas for ``[(fee, before, after)]``.
+
+    ``before``/``after`` are snapshot() tuples, or None for a created/deleted fee.
+    Call inside the transaction that writes the fees. Deletions never recreate a
+    missing ledger row: a cascade from the School or AcademicYear removes it first.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+    years = _academic_years({fee.fee_structure_id for fee, _, _ in changes})
+    deltas = defaultdict(lambda: dict.fromkeys(LEDGER_FIELDS, ZERO))
+    creatable = set()
+    for fee, before, after in changes:
+        key = (fee.school_id, years[fee.fee_structure_id])
+        delta = deltas[key]
+        if after is not None:
+            creatable.add(key)
+        for sign, values in ((-1, before), (1, after)):
+            if values is not None:
+                for name, amount in contribution(*values).items():
+                    delta[name] += sign * amount
+    apply_deltas(deltas, creatable)
+
+
+def _increment(school_id, academic_year_id, delta, now):
+    increments = {name: F(name) + amount for name, amount in delta.items() if amount}
+    return FeeLedger.objects.filter(school_id=school_id, academic_year_id=academic_year_id).update(
+        updated_at=now, **increments
+    )
+
+
+def apply_deltas(deltas, creatable=None):
+    """Increment the ledger rows; missing rows are created only for keys in ``creatable`` (default all)"""
+    now = timezone.now()
+    with transaction.atomic():
+        for (school_id, academic_year_id), delta in sorted(deltas.items(), key=lambda item: str(item[0])):
+            if not any(delta.values()):
+                continue
+            if creatable is not None and (school_id, academic_year_id) not in creatable:
+                _increment(school_id, academic_year_id, delta, now)
+            elif not _increment(school_id, academic_year_id, delta, now):
+                FeeLedger.objects.bulk_create(
+                    [FeeLedger(school_id=school_id, academic_year_id=academic_year_id)], ignore_conflicts=True
+                )
+                _increment(school_id, academic_year_id, delta, now)
+
+
+def compute_ledger(school_id=None):
+    """{(school_id, academic_year_id): totals} recomputed from StudentFee in one grouped query"""
+    balance = F('amount_due') + F('fine_amount') - F('discount_amount') - F('amount_paid')
+    fees = StudentFee.objects.all()
+    if school_id is not None:
+        fees = fees.filter(school_id=school_id)
+    rows = fees.values('school_id', academic_year_id=F('fee_structure__academic_year_id')).annotate(
+        collected=Sum('amount_paid'),
+        pending=Sum(balance, filter=Q(payment_status__in=PENDING_STATUSES)),
+        overdue=Sum(balance, filter=Q(payment_status=PaymentStatusChoices.OVERDUE)),
+        discount=Sum('discount_amount'),
+        fine=Sum('fine_amount'),
+    ).order_by()
+    return {
+        (row['school_id'], row['academic_year_id']): {name: row[name] or ZERO for name in LEDGER_FIELDS}
+        for row in rows
+    }
+
+
+def reconcile_ledger(school_id=None, fix=False):
+    """
+    Compare FeeLedger with totals recomputed from StudentFee.
+
+    Returns a list of mismatches (school_id, academic_year_id, field, ledger, actual).
+    With ``fix=True`` the ledger rows are rewritten to the recomputed totals.
+    """
+    expected = compute_ledger(school_id)
+    ledgers = FeeLedger.objects.all()
+    if school_id is not None:
+        ledgers = ledgers.filter(school_id=school_id)
+    actual = {(row.school_id, row.academic_year_id): row for row in ledgers}
+
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys(), key=str):
+        totals = expected.get(key, dict.fromkeys(LEDGER_FIELDS, ZERO))
+        row = actual.get(key)
+        for name in LEDGER_FIELDS:
+            recorded = getattr(row, name) if row is not None else ZERO
+            if recorded != totals[name]:
+                mismatches.append((key[0], key[1], name, recorded, totals[name]))
+
+    if fix and mismatches:
+        stale = {(school, year) for school, year, *_ in mismatches}
+        FeeLedger.objects.bulk_create(
+            [
+                FeeLedger(school_id=school, academic_year_id=year,
+                          **expected.get((school, year), dict.fromkeys(LEDGER_FIELDS, ZERO)))
+                for school, year in stale
+            ],
+            update_conflicts=True,
+            unique_fields=['school', 'academic_year'],
+            update_fields=[*LEDGER_FIELDS, 'updated_at'],
+        )
+    return mismatches
+
+
+def ledger_totals(school, academic_year_id=None):
+    """Summed ledger totals for ``school`` (optionally one academic year) plus per-year rows"""
+    rows = school.fee_ledgers.select_related('academic_year').order_by('academic_year__start_date')
+    if academic_year_id:
+        rows = rows.filter(academic_year_id=academic_year_id)
+    totals = dict.fromkeys(LEDGER_FIELDS, ZERO)
+    years = []
+    for row in rows:
+        values = {name: getattr(row, name) for name in LEDGER_FIELDS}
+        for name, amount in values.items():
+            totals[name] += amount
+        years.append({'academic_year': str(row.academic_year_id), 'name': row.academic_year.name, **values})
+    return totals, years
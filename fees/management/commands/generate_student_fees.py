@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from fees.invoicing import BATCH_SIZE, generate_student_fees
+from fees.models import AcademicYear
+
+
+class Command(BaseCommand):
+    help = 'Create StudentFee rows for every active student from the fee structures of an academic year'
+
+    def add_arguments(self, parser):
+        parser.add_argument('academic_year', help='AcademicYear id')
+        parser.add_argument('--class', dest='classes', action='append', help='Limit to this Class id (repeatable)')
+        parser.add_argument('--fee-type', dest='fee_types', action='append', help='Limit to this fee type (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Students invoiced per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be created without writing')
+
+    def handle(self, *args, **options):
+        try:
+            academic_year = AcademicYear.objects.select_related('school').get(pk=options['academic_year'])
+        except (AcademicYear.DoesNotExist, ValueError):
+            raise CommandError(f"Academic year {options['academic_year']} not found")
+
+        def progress(done, total):
+            self.stdout.write(f'  {done}/{total} students processed')
+
+        summary = generate_student_fees(
+            academic_year.school,
+            academic_year,
+            class_ids=options['classes'],
+            fee_types=options['fee_types'],
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size'],
+            progress=progress,
+        )
+        verb = 'Would create' if summary['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {summary['created']} student fee(s) for {summary['students']} student(s) "
+            f"({summary['skipped_existing']} already invoiced); amount {summary['amount_due']}, "
+            f"discount {summary['discount']}"
+        ))
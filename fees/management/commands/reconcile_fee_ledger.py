@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from fees.ledger import reconcile_ledger
+
+
+class Command(BaseCommand):
+    help = 'Verify the FeeLedger totals against StudentFee and optionally repair them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--school', help='Only reconcile this school id')
+        parser.add_argument('--fix', action='store_true', help='Rewrite mismatched ledger rows')
+
+    def handle(self, *args, **options):
+        mismatches = reconcile_ledger(school_id=options['school'], fix=options['fix'])
+        for school_id, academic_year_id, field, recorded, actual in mismatches:
+            self.stdout.write(
+                f'school={school_id} academic_year={academic_year_id} {field}: ledger {recorded} != actual {actual}'
+            )
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('Fee ledger matches student fees'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(mismatches)} mismatched total(s)'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(mismatches)} mismatched total(s); rerun with --fix to repair'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from fees.overdue import CHUNK_SIZE, sweep_overdue_fees
+
+
+class Command(BaseCommand):
+    help = 'Mark student fees that fell due since the last run as overdue and assess late fines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Ignore the watermark and sweep every past-due fee')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows updated per statement')
+
+    def handle(self, *args, **options):
+        count = sweep_overdue_fees(full=options['full'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Marked {count} student fee(s) overdue'))
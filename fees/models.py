@@ -198,6 +198,10 @@ class StudentFee(BaseModel):
     class Meta:
         db_table = 'student_fees'
         unique_together = ['student', 'fee_structure']
+        indexes = [
+            models.Index(fields=['school', 'payment_status', 'due_date'], name='student_fee_status_due_idx'),
+            models.Index(fields=['payment_status', 'updated_at'], name='student_fee_status_updated_idx'),
+        ]
         
     def __str__(self):
         return f"{self.student.student_id} - {self.fee_structure.get_fee_type_display()}"
@@ -226,10 +230,27 @@ class Payment(BaseModel):
     
     class Meta:
         db_table = 'payments'
+        indexes = [
+            models.Index(fields=['school', '-created_at', '-id'], name='payment_keyset_idx'),
+        ]
         
     def __str__(self):
         return f"{self.receipt_number} - {self.student.student_id} - {self.amount}"
 
+# Receipt Sequence Model
+class ReceiptSequence(BaseModel):
+    """Per-school, per-day receipt counter (see fees/receipts.py)"""
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='receipt_sequences')
+    date = models.DateField()
+    last_value = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'receipt_sequences'
+        unique_together = ['school', 'date']
+        
+    def __str__(self):
+        return f"{self.school.code} - {self.date} - {self.last_value}"
+
 # Payment Detail Model
 class PaymentDetail(BaseModel):
     """Payment Detail model"""
@@ -243,6 +264,37 @@ class PaymentDetail(BaseModel):
     def __str__(self):
         return f"{self.payment.receipt_number} - {self.student_fee.fee_structure.get_fee_type_display()}"
 
+# Fee Ledger Model
+class FeeLedger(BaseModel):
+    """Running fee totals per school and academic year, maintained by fees/ledger.py"""
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='fee_ledgers')
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, related_name='fee_ledgers')
+    collected = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    pending = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    overdue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    discount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    fine = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    
+    class Meta:
+        db_table = 'fee_ledgers'
+        unique_together = ['school', 'academic_year']
+        
+    def __str__(self):
+        return f"{self.school.name} - {self.academic_year.name}"
+
+# Overdue Sweep Watermark Model
+class FeeOverdueSweep(BaseModel):
+    """Overdue sweeper watermark: fees due by swept_through and untouched since last_run_at are done"""
+    name = models.CharField(max_length=50, unique=True, default='student_fees')
+    swept_through = models.DateField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'fee_overdue_sweeps'
+        
+    def __str__(self):
+        return f"{self.name} through {self.swept_through}"
+
 # Discount Model
 class Discount(BaseModel):
     """Discount model"""
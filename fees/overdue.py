@@ -0,0 +1,80 @@
+"""
+Overdue sweeper for student fees.
+
+Moves pending/partial fees whose due date has passed to OVERDUE and adds the late
+fine from settings.FEES_OVERDUE_FINE (a flat amount plus a percentage of
+amount_due). Only fees that fell due since the previous run are touched, plus
+fees created or changed since then: the FeeOverdueSweep watermark remembers the
+last due date swept and when the run started, so a fee invoiced late with a due
+date already behind the watermark is still picked up. Work is done in
+primary-key ranges with one grouped SELECT (for the ledger delta) and one UPDATE
+per range.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Round
+from django.utils import timezone
+from schoolmanagement.batching import pk_ranges
+from .ledger import LEDGER_FIELDS, PENDING_STATUSES, ZERO, apply_deltas
+from .models import FeeOverdueSweep, PaymentStatusChoices, StudentFee
+
+CHUNK_SIZE = 1000
+
+
+def fine_policy():
+    policy = {'FLAT': '0.00', 'PERCENT': '0', **getattr(settings, 'FEES_OVERDUE_FINE', {})}
+    return Decimal(str(policy['FLAT'])), Decimal(str(policy['PERCENT']))
+
+
+def sweep_overdue_fees(today=None, full=False, chunk_size=CHUNK_SIZE):
+    """
+    Mark fees due before ``today`` (and after the watermark) overdue and assess fines.
+
+    ``full`` ignores the watermark. Returns the number of fees transitioned.
+    """
+    started = timezone.now()
+    today = today or timezone.localdate()
+    flat, percent = fine_policy()
+    sweep, _ = FeeOverdueSweep.objects.get_or_create(name='student_fees')
+
+    candidates = StudentFee.objects.filter(payment_status__in=PENDING_STATUSES, due_date__lt=today)
+    if sweep.swept_through and not full:
+        recent = Q(due_date__gt=sweep.swept_through)
+        if sweep.last_run_at:
+            recent |= Q(updated_at__gte=sweep.last_run_at)
+        candidates = candidates.filter(recent)
+
+    percent_fine = Round(F('amount_due') * Value(percent) / Value(Decimal('100')), 2)
+    balance = F('amount_due') + F('fine_amount') - F('discount_amount') - F('amount_paid')
+    transitioned = 0
+    for first, last in pk_ranges(candidates, chunk_size):
+        with transaction.atomic():
+            chunk = candidates.filter(pk__gte=first, pk__lte=last)
+            # Lock first: FOR UPDATE cannot be combined with the GROUP BY below
+            list(chunk.select_for_update().values_list('pk'))
+            groups = chunk.values('school_id', academic_year_id=F('fee_structure__academic_year_id')).annotate(
+                rows=Count('pk'), balance=Sum(balance), percent_fines=Sum(percent_fine),
+            ).order_by()
+
+            deltas = defaultdict(lambda: dict.fromkeys(LEDGER_FIELDS, ZERO))
+            for group in groups:
+                fines = flat * group['rows'] + ((group['percent_fines'] or ZERO) if percent else ZERO)
+                delta = deltas[(group['school_id'], group['academic_year_id'])]
+                delta['pending'] -= group['balance'] or ZERO
+                delta['overdue'] += (group['balance'] or ZERO) + fines
+                delta['fine'] += fines
+
+            changes = {'payment_status': PaymentStatusChoices.OVERDUE, 'updated_at': timezone.now()}
+            if flat or percent:
+                changes['fine_amount'] = F('fine_amount') + Value(flat) + percent_fine
+            transitioned += chunk.update(**changes)
+            apply_deltas(deltas)
+
+    sweep.swept_through = today - timedelta(days=1)
+    sweep.last_run_at = started
+    sweep.save(update_fields=['swept_through', 'last_run_at', 'updated_at'])
+    return transitioned
@@ -0,0 +1,50 @@
+"""
+Receipt number allocation.
+
+Numbers come from ReceiptSequence, one row per school per day, advanced with a
+single conditional ``UPDATE ... SET last_value = last_value + n``; nothing ever
+counts the payments table. The row lock taken by that UPDATE is held until the
+enclosing transaction ends. Called inside the payment transaction, as
+collect_payment does, it serialises concurrent cashiers of the same school for
+the rest of that transaction, which is what keeps the numbers gap-free.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import ReceiptSequence
+
+
+def format_receipt_number(school, on_date, value):
+    return f"RCP-{school.code}-{on_date:%Y%m%d}-{value:04d}"
+
+
+def _advance(school, on_date, count):
+    sequences = ReceiptSequence.objects.filter(school=school, date=on_date)
+    return sequences.update(last_value=F('last_value') + count, updated_at=timezone.now())
+
+
+def reserve_receipt_numbers(school, count=1, on_date=None):
+    """
+    Reserve ``count`` consecutive receipt numbers for ``school`` on ``on_date``.
+
+    Returns the formatted numbers in order. Call inside the transaction that
+    creates the payments so a rollback also hands the block back.
+    """
+    if count < 1:
+        raise ValueError('count must be at least 1')
+    on_date = on_date or timezone.localdate()
+    with transaction.atomic():
+        if not _advance(school, on_date, count):
+            # First receipt of the day: create the row, tolerating a concurrent creator
+            ReceiptSequence.objects.bulk_create(
+                [ReceiptSequence(school=school, date=on_date)], ignore_conflicts=True
+            )
+            _advance(school, on_date, count)
+        last = ReceiptSequence.objects.filter(school=school, date=on_date).values_list(
+            'last_value', flat=True
+        ).get()
+    return [format_receipt_number(school, on_date, value) for value in range(last - count + 1, last + 1)]
+
+
+def next_receipt_number(school, on_date=None):
+    return reserve_receipt_numbers(school, 1, on_date)[0]
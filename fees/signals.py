@@ -0,0 +1,25 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import StudentFee
+from .ledger import SNAPSHOT_FIELDS, record_fee_changes, snapshot
+
+
+@receiver(pre_save, sender=StudentFee)
+def remember_ledger_snapshot(sender, instance, **kwargs):
+    instance._ledger_before = None
+    if not instance._state.adding:
+        instance._ledger_before = StudentFee.objects.filter(pk=instance.pk).values_list(
+            *SNAPSHOT_FIELDS
+        ).first()
+
+
+@receiver(post_save, sender=StudentFee)
+def update_ledger_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    record_fee_changes([(instance, getattr(instance, '_ledger_before', None), snapshot(instance))])
+
+
+@receiver(post_delete, sender=StudentFee)
+def update_ledger_on_delete(sender, instance, **kwargs):
+    record_fee_changes([(instance, snapshot(instance), None)])
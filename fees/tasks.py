@@ -0,0 +1,7 @@
+from celery import shared_task
+from .overdue import sweep_overdue_fees
+
+
+@shared_task
+def sweep_overdue_student_fees():
+    return sweep_overdue_fees()
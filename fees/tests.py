@@ -1,277 +1,316 @@
-from django.db import models
-from django.contrib.auth.models import AbstractUser
-from django.core.validators import MinValueValidator, MaxValueValidator
+from datetime import date
 from decimal import Decimal
-import uuid
-
-# Base Abstract Model with Timestamp
-class BaseModel(models.Model):
-    """Base model with common fields for all models"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-    is_active = models.BooleanField(default=True)
-    
-    class Meta:
-        abstract = True
-
-# Choice Classes
-class StatusChoices(models.TextChoices):
-    ACTIVE = 'active', 'Active'
-    INACTIVE = 'inactive', 'Inactive'
-    SUSPENDED = 'suspended', 'Suspended'
-
-class PaymentStatusChoices(models.TextChoices):
-    PENDING = 'pending', 'Pending'
-    PAID = 'paid', 'Paid'
-    PARTIAL = 'partial', 'Partial'
-    OVERDUE = 'overdue', 'Overdue'
-    CANCELLED = 'cancelled', 'Cancelled'
-
-class PaymentMethodChoices(models.TextChoices):
-    CASH = 'cash', 'Cash'
-    CARD = 'card', 'Card'
-    BANK_TRANSFER = 'bank_transfer', 'Bank Transfer'
-    ONLINE = 'online', 'Online'
-    CHEQUE = 'cheque', 'Cheque'
-
-class FeeTypeChoices(models.TextChoices):
-    TUITION = 'tuition', 'Tuition Fee'
-    ADMISSION = 'admission', 'Admission Fee'
-    EXAMINATION = 'examination', 'Examination Fee'
-    LIBRARY = 'library', 'Library Fee'
-    LABORATORY = 'laboratory', 'Laboratory Fee'
-    TRANSPORT = 'transport', 'Transport Fee'
-    HOSTEL = 'hostel', 'Hostel Fee'
-    ACTIVITY = 'activity', 'Activity Fee'
-    MISCELLANEOUS = 'miscellaneous', 'Miscellaneous'
-
-class GradeChoices(models.TextChoices):
-    GRADE_1 = 'grade_1', 'Grade 1'
-    GRADE_2 = 'grade_2', 'Grade 2'
-    GRADE_3 = 'grade_3', 'Grade 3'
-    GRADE_4 = 'grade_4', 'Grade 4'
-    GRADE_5 = 'grade_5', 'Grade 5'
-    GRADE_6 = 'grade_6', 'Grade 6'
-    GRADE_7 = 'grade_7', 'Grade 7'
-    GRADE_8 = 'grade_8', 'Grade 8'
-    GRADE_9 = 'grade_9', 'Grade 9'
-    GRADE_10 = 'grade_10', 'Grade 10'
-    GRADE_11 = 'grade_11', 'Grade 11'
-    GRADE_12 = 'grade_12', 'Grade 12'
-
-class GenderChoices(models.TextChoices):
-    MALE = 'male', 'Male'
-    FEMALE = 'female', 'Female'
-    OTHER = 'other', 'Other'
-
-# Multi-tenant School Model
-class School(BaseModel):
-    """School model for multi-tenancy"""
-    name = models.CharField(max_length=255)
-    code = models.CharField(max_length=20, unique=True)
-    address = models.TextField()
-    phone = models.CharField(max_length=20)
-    email = models.EmailField()
-    website = models.URLField(blank=True, null=True)
-    logo = models.ImageField(upload_to='school_logos/', blank=True, null=True)
-    established_date = models.DateField()
-    principal_name = models.CharField(max_length=255)
-    status = models.CharField(max_length=20, choices=StatusChoices.choices, default=StatusChoices.ACTIVE)
-    
-    class Meta:
-        db_table = 'schools'
-        verbose_name = 'School'
-        verbose_name_plural = 'Schools'
-        
-    def __str__(self):
-        return self.name
-
-# User Model
-class User(AbstractUser):
-    """Custom User model"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='users')
-    phone = models.CharField(max_length=20, blank=True)
-    address = models.TextField(blank=True)
-    date_of_birth = models.DateField(blank=True, null=True)
-    gender = models.CharField(max_length=10, choices=GenderChoices.choices, blank=True)
-    profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
-    
-    class Meta:
-        db_table = 'users'
-
-# Academic Year Model
-class AcademicYear(BaseModel):
-    """Academic Year model"""
-    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='academic_years')
-    name = models.CharField(max_length=100)
-    start_date = models.DateField()
-    end_date = models.DateField()
-    is_current = models.BooleanField(default=False)
-    
-    class Meta:
-        db_table = 'academic_years'
-        unique_together = ['school', 'name']
-        
-    def __str__(self):
-        return f"{self.school.name} - {self.name}"
-
-# Class Model
-class Class(BaseModel):
-    """Class model"""
-    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='classes')
-    name = models.CharField(max_length=100)
-    grade = models.CharField(max_length=20, choices=GradeChoices.choices)
-    section = models.CharField(max_length=10)
-    capacity = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(100)])
-    class_teacher = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='teaching_classes')
-    
-    class Meta:
-        db_table = 'classes'
-        unique_together = ['school', 'grade', 'section']
-        verbose_name = 'Class'
-        verbose_name_plural = 'Classes'
-        
-    def __str__(self):
-        return f"{self.grade} - {self.section}"
-
-# Student Model
-class Student(BaseModel):
-    """Student model"""
-    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='students')
-    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='student_profile')
-    student_id = models.CharField(max_length=20, unique=True)
-    admission_number = models.CharField(max_length=50)
-    admission_date = models.DateField()
-    current_class = models.ForeignKey(Class, on_delete=models.SET_NULL, null=True, related_name='students')
-    parent_name = models.CharField(max_length=255)
-    parent_phone = models.CharField(max_length=20)
-    parent_email = models.EmailField(blank=True)
-    emergency_contact = models.CharField(max_length=20)
-    medical_info = models.TextField(blank=True)
-    status = models.CharField(max_length=20, choices=StatusChoices.choices, default=StatusChoices.ACTIVE)
-    
-    class Meta:
-        db_table = 'students'
-        unique_together = ['school', 'student_id']
-        
-    def __str__(self):
-        return f"{self.student_id} - {self.user.get_full_name()}"
-
-# Fee Structure Model
-class FeeStructure(BaseModel):
-    """Fee Structure model"""
-    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='fee_structures')
-    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE, related_name='fee_structures')
-    class_grade = models.ForeignKey(Class, on_delete=models.CASCADE, related_name='fee_structures')
-    fee_type = models.CharField(max_length=30, choices=FeeTypeChoices.choices)
-    amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
-    due_date = models.DateField()
-    description = models.TextField(blank=True)
-    is_mandatory = models.BooleanField(default=True)
-    
-    class Meta:
-        db_table = 'fee_structures'
-        unique_together = ['school', 'academic_year', 'class_grade', 'fee_type']
-        
-    def __str__(self):
-        return f"{self.class_grade} - {self.get_fee_type_display()} - {self.amount}"
-
-# Student Fee Model
-class StudentFee(BaseModel):
-    """Student Fee model"""
-    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='student_fees')
-    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='fees')
-    fee_structure = models.ForeignKey(FeeStructure, on_delete=models.CASCADE, related_name='student_fees')
-    amount_due = models.DecimalField(max_digits=10, decimal_places=2)
-    amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
-    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
-    fine_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
-    payment_status = models.CharField(max_length=20, choices=PaymentStatusChoices.choices, default=PaymentStatusChoices.PENDING)
-    due_date = models.DateField()
-    remarks = models.TextField(blank=True)
-    
-    class Meta:
-        db_table = 'student_fees'
-        unique_together = ['student', 'fee_structure']
-        
-    def __str__(self):
-        return f"{self.student.student_id} - {self.fee_structure.get_fee_type_display()}"
-    
-    @property
-    def total_amount(self):
-        return self.amount_due + self.fine_amount - self.discount_amount
-    
-    @property
-    def balance_amount(self):
-        return self.total_amount - self.amount_paid
-
-# Payment Model
-class Payment(BaseModel):
-    """Payment model"""
-    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='payments')
-    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='payments')
-    receipt_number = models.CharField(max_length=50, unique=True)
-    payment_date = models.DateTimeField()
-    amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
-    payment_method = models.CharField(max_length=20, choices=PaymentMethodChoices.choices)
-    transaction_id = models.CharField(max_length=100, blank=True)
-    reference_number = models.CharField(max_length=100, blank=True)
-    collected_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='collected_payments')
-    remarks = models.TextField(blank=True)
-    
-    class Meta:
-        db_table = 'payments'
-        
-    def __str__(self):
-        return f"{self.receipt_number} - {self.student.student_id} - {self.amount}"
-
-# Payment Detail Model
-class PaymentDetail(BaseModel):
-    """Payment Detail model"""
-    payment = models.ForeignKey(Payment, on_delete=models.CASCADE, related_name='payment_details')
-    student_fee = models.ForeignKey(StudentFee, on_delete=models.CASCADE, related_name='payment_details')
-    amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
-    
-    class Meta:
-        db_table = 'payment_details'
-        
-    def __str__(self):
-        return f"{self.payment.receipt_number} - {self.student_fee.fee_structure.get_fee_type_display()}"
-
-# Discount Model
-class Discount(BaseModel):
-    """Discount model"""
-    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='discounts')
-    name = models.CharField(max_length=255)
-    description = models.TextField(blank=True)
-    discount_type = models.CharField(max_length=20, choices=[
-        ('percentage', 'Percentage'),
-        ('fixed', 'Fixed Amount')
-    ])
-    value = models.DecimalField(max_digits=10, decimal_places=2)
-    applicable_fee_types = models.CharField(max_length=500, help_text="Comma-separated fee types")
-    valid_from = models.DateField()
-    valid_until = models.DateField()
-    
-    class Meta:
-        db_table = 'discounts'
-        
-    def __str__(self):
-        return self.name
-
-# Student Discount Model
-class StudentDiscount(BaseModel):
-    """Student Discount model"""
-    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='discounts')
-    discount = models.ForeignKey(Discount, on_delete=models.CASCADE, related_name='student_discounts')
-    approved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='approved_discounts')
-    approved_date = models.DateTimeField(auto_now_add=True)
-    
-    class Meta:
-        db_table = 'student_discounts'
-        unique_together = ['student', 'discount']
-        
-    def __str__(self):
-        return f"{self.student.student_id} - {self.discount.name}"
+from django.test import TestCase, override_settings
+from .allocation import AllocationError, collect_payment
+from .invoicing import generate_student_fees
+from .ledger import LEDGER_FIELDS, compute_ledger, reconcile_ledger
+from .models import (
+    School, User, AcademicYear, Class, Student, FeeStructure, StudentFee, Payment, PaymentDetail,
+    PaymentStatusChoices, ReceiptSequence, FeeLedger, Discount, StudentDiscount, FeeOverdueSweep,
+)
+from .overdue import sweep_overdue_fees
+from .receipts import next_receipt_number, reserve_receipt_numbers
+
+
+class FeeFixtureMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = cls.create_school('SA')
+        cls.cashier = User.objects.create(username='cashier', school=cls.school)
+        cls.year = AcademicYear.objects.create(
+            school=cls.school, name='2026', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31)
+        )
+        cls.klass = Class.objects.create(school=cls.school, name='Grade 1 A', grade='grade_1', section='A', capacity=30)
+        cls.student = cls.create_student('S1')
+
+    @classmethod
+    def create_school(cls, code):
+        return School.objects.create(
+            name=f'School {code}', code=code, address='Street', phone='9800000000', email='office@example.com',
+            established_date=date(2000, 1, 1), principal_name='Principal',
+        )
+
+    @classmethod
+    def create_student(cls, student_id, klass=None):
+        user = User.objects.create(username=f'student-{student_id}', school=cls.school)
+        return Student.objects.create(
+            school=cls.school, user=user, student_id=student_id, admission_number=student_id,
+            admission_date=date(2026, 1, 1), current_class=klass or cls.klass, parent_name='Parent',
+            parent_phone='9800000000', emergency_contact='9800000000',
+        )
+
+    @classmethod
+    def create_fee(cls, fee_type, due_date, amount='100', student=None, **kwargs):
+        structure, _ = FeeStructure.objects.get_or_create(
+            school=cls.school, academic_year=cls.year, class_grade=cls.klass, fee_type=fee_type,
+            defaults={'amount': Decimal(amount), 'due_date': due_date},
+        )
+        return StudentFee.objects.create(
+            school=cls.school, student=student or cls.student, fee_structure=structure,
+            amount_due=Decimal(amount), due_date=due_date, **kwargs,
+        )
+
+
+class ReceiptNumberTest(FeeFixtureMixin, TestCase):
+    def test_numbers_are_sequential_per_school(self):
+        other = self.create_school('SB')
+        day = date(2026, 9, 1)
+        self.assertEqual(next_receipt_number(self.school, day), 'RCP-SA-20260901-0001')
+        self.assertEqual(next_receipt_number(self.school, day), 'RCP-SA-20260901-0002')
+        self.assertEqual(next_receipt_number(other, day), 'RCP-SB-20260901-0001')
+        self.assertEqual(
+            reserve_receipt_numbers(self.school, 3, day),
+            ['RCP-SA-20260901-0003', 'RCP-SA-20260901-0004', 'RCP-SA-20260901-0005'],
+        )
+
+    def test_counter_resets_daily(self):
+        next_receipt_number(self.school, date(2026, 9, 1))
+        next_receipt_number(self.school, date(2026, 9, 1))
+        self.assertEqual(next_receipt_number(self.school, date(2026, 9, 2)), 'RCP-SA-20260902-0001')
+        self.assertEqual(
+            dict(ReceiptSequence.objects.filter(school=self.school).values_list('date', 'last_value')),
+            {date(2026, 9, 1): 2, date(2026, 9, 2): 1},
+        )
+
+    def test_count_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            reserve_receipt_numbers(self.school, 0)
+
+
+class PaymentAllocationTest(FeeFixtureMixin, TestCase):
+    def setUp(self):
+        self.library = self.create_fee('library', date(2026, 1, 1))
+        self.tuition = self.create_fee('tuition', date(2026, 2, 1))
+        self.hostel = self.create_fee('hostel', date(2026, 3, 1))
+
+    def paid(self):
+        return {
+            fee_type: (amount_paid, payment_status)
+            for fee_type, amount_paid, payment_status in StudentFee.objects.values_list(
+                'fee_structure__fee_type', 'amount_paid', 'payment_status'
+            )
+        }
+
+    def test_auto_allocation_pays_oldest_fees_first(self):
+        payment = collect_payment(self.student, '150', 'cash', collected_by=self.cashier)
+        self.assertEqual(payment.amount, Decimal('150.00'))
+        self.assertEqual(self.paid(), {
+            'library': (Decimal('100.00'), PaymentStatusChoices.PAID),
+            'tuition': (Decimal('50.00'), PaymentStatusChoices.PARTIAL),
+            'hostel': (Decimal('0.00'), PaymentStatusChoices.PENDING),
+        })
+        self.assertEqual(
+            sorted(payment.payment_details.values_list('amount', flat=True)), [Decimal('50.00'), Decimal('100.00')]
+        )
+
+    def test_explicit_allocations_are_merged_per_fee(self):
+        collect_payment(self.student, '30', 'cash', fee_allocations=[
+            {'student_fee_id': str(self.hostel.pk), 'amount': '20'},
+            {'student_fee_id': str(self.hostel.pk), 'amount': '10'},
+        ])
+        self.assertEqual(self.paid()['hostel'], (Decimal('30.00'), PaymentStatusChoices.PARTIAL))
+        self.assertEqual(self.paid()['library'], (Decimal('0.00'), PaymentStatusChoices.PENDING))
+
+    def test_overpayment_and_mismatched_splits_are_rejected(self):
+        attempts = [
+            ({'amount': '301'}, 'exceeds outstanding balance'),
+            ({'amount': '10', 'fee_allocations': [{'student_fee_id': str(self.hostel.pk), 'amount': '101'}]},
+             'exceeds balance'),
+            ({'amount': '10', 'fee_allocations': [{'student_fee_id': str(self.hostel.pk), 'amount': '5'}]},
+             'Allocations total'),
+            ({'amount': '-5'}, 'greater than zero'),
+            ({'amount': 'ten'}, 'must be a number'),
+        ]
+        for kwargs, message in attempts:
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaisesMessage(AllocationError, message):
+                    collect_payment(self.student, payment_method='cash', **kwargs)
+        self.assertFalse(Payment.objects.exists())
+        self.assertFalse(PaymentDetail.objects.exists())
+        self.assertFalse(StudentFee.objects.exclude(amount_paid=0).exists())
+
+    def test_malformed_allocations_are_allocation_errors(self):
+        attempts = [
+            ({'student_fee_id': 'not-a-uuid', 'amount': '10'}, 'student_fee_id must be a student fee id'),
+            ({'amount': '10'}, 'student_fee_id must be a student fee id'),
+            ('hostel', 'fee_allocations[0] must be an object'),
+            ({'student_fee_id': '00000000-0000-0000-0000-000000000000', 'amount': '10'}, 'Student fees not found'),
+        ]
+        for allocation, message in attempts:
+            with self.subTest(allocation=allocation):
+                with self.assertRaisesMessage(AllocationError, message):
+                    collect_payment(self.student, '10', 'cash', fee_allocations=[allocation])
+        with self.assertRaisesMessage(AllocationError, 'fee_allocations must be a list'):
+            collect_payment(self.student, '10', 'cash', fee_allocations={'amount': '10'})
+
+    def test_part_paid_overdue_fee_stays_overdue(self):
+        StudentFee.objects.filter(pk=self.library.pk).update(payment_status=PaymentStatusChoices.OVERDUE)
+        collect_payment(self.student, '40', 'cash', fee_allocations=[
+            {'student_fee_id': str(self.library.pk), 'amount': '40'},
+        ])
+        self.assertEqual(self.paid()['library'], (Decimal('40.00'), PaymentStatusChoices.OVERDUE))
+        collect_payment(self.student, '60', 'cash', fee_allocations=[
+            {'student_fee_id': str(self.library.pk), 'amount': '60'},
+        ])
+        self.assertEqual(self.paid()['library'], (Decimal('100.00'), PaymentStatusChoices.PAID))
+
+
+class FeeLedgerConsistencyTest(FeeFixtureMixin, TestCase):
+    def assertLedgerConsistent(self):
+        self.assertEqual(reconcile_ledger(), [])
+        stored = {
+            (row.school_id, row.academic_year_id): {name: getattr(row, name) for name in LEDGER_FIELDS}
+            for row in FeeLedger.objects.all()
+        }
+        recomputed = compute_ledger()
+        self.assertEqual({key: stored[key] for key in recomputed}, recomputed)
+
+    def test_signal_maintained_totals_match_a_recompute(self):
+        sibling = self.create_student('S2')
+        fees = [
+            self.create_fee('library', date(2026, 1, 1)),
+            self.create_fee('tuition', date(2026, 2, 1), amount='250'),
+            self.create_fee('library', date(2026, 1, 1), student=sibling),
+            self.create_fee('hostel', date(2026, 3, 1), student=sibling, amount='75.50'),
+        ]
+        self.assertLedgerConsistent()
+
+        collect_payment(self.student, '180', 'cash', collected_by=self.cashier)
+        payment = collect_payment(sibling, '40', 'card', fee_allocations=[
+            {'student_fee_id': str(fees[3].pk), 'amount': '40'},
+        ])
+        self.assertLedgerConsistent()
+        self.assertEqual(FeeLedger.objects.get().collected, Decimal('220.00'))
+
+        fee = StudentFee.objects.get(pk=fees[1].pk)
+        fee.discount_amount = Decimal('25.00')
+        fee.fine_amount = Decimal('10.00')
+        fee.save()
+        payment.remarks = 'Corrected card slip'
+        payment.save()
+        self.assertLedgerConsistent()
+
+        sweep_overdue_fees(today=date(2026, 2, 15))
+        self.assertLedgerConsistent()
+        collect_payment(self.student, '20', 'cash')
+        self.assertLedgerConsistent()
+
+        payment.delete()
+        StudentFee.objects.get(pk=fees[0].pk).delete()
+        sibling.delete()
+        self.assertLedgerConsistent()
+        self.assertEqual(compute_ledger()[(self.school.pk, self.year.pk)]['collected'], Decimal('100.00'))
+
+    def test_cascade_delete_drops_the_ledger_rows(self):
+        self.create_fee('library', date(2026, 1, 1))
+        collect_payment(self.student, '40', 'cash')
+        other_year = AcademicYear.objects.create(
+            school=self.school, name='2027', start_date=date(2027, 1, 1), end_date=date(2027, 12, 31)
+        )
+        self.assertEqual(FeeLedger.objects.count(), 1)
+
+        AcademicYear.objects.filter(pk=self.year.pk).delete()
+        self.assertFalse(FeeLedger.objects.exists())
+        self.assertFalse(StudentFee.objects.exists())
+        self.assertLedgerConsistent()
+
+        self.year = other_year
+        self.create_fee('tuition', date(2027, 2, 1))
+        School.objects.filter(pk=self.school.pk).delete()
+        self.assertFalse(FeeLedger.objects.exists())
+
+
+class FeeInvoicingTest(FeeFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_class = Class.objects.create(
+            school=cls.school, name='Grade 2 A', grade='grade_2', section='A', capacity=30
+        )
+        cls.sibling = cls.create_student('S2')
+        cls.senior = cls.create_student('S3', klass=cls.other_class)
+        for klass in (cls.klass, cls.other_class):
+            for fee_type, amount in (('tuition', '200'), ('library', '50')):
+                FeeStructure.objects.create(
+                    school=cls.school, academic_year=cls.year, class_grade=klass, fee_type=fee_type,
+                    amount=Decimal(amount), due_date=date(2026, 4, 1),
+                )
+        discount = Discount.objects.create(
+            school=cls.school, name='Sibling', discount_type='percentage', value=Decimal('10'),
+            applicable_fee_types='tuition', valid_from=date(2026, 1, 1), valid_until=date(2026, 12, 31),
+        )
+        StudentDiscount.objects.create(student=cls.sibling, discount=discount)
+
+    def test_dry_run_reports_without_writing(self):
+        summary = generate_student_fees(self.school, self.year, dry_run=True)
+        self.assertEqual((summary['students'], summary['fee_structures'], summary['created']), (3, 4, 6))
+        self.assertEqual(summary['amount_due'], Decimal('750'))
+        self.assertEqual(summary['discount'], Decimal('20.00'))
+        self.assertTrue(summary['dry_run'])
+        self.assertFalse(StudentFee.objects.exists())
+        self.assertFalse(FeeLedger.objects.exists())
+
+    def test_rerun_skips_existing_fees(self):
+        progress = []
+        first = generate_student_fees(self.school, self.year, batch_size=2, progress=lambda *args: progress.append(args))
+        self.assertEqual((first['created'], first['skipped_existing']), (6, 0))
+        self.assertEqual(progress, [(2, 3), (3, 3)])
+        self.assertEqual(StudentFee.objects.get(student=self.sibling, fee_structure__fee_type='tuition').discount_amount,
+                         Decimal('20.00'))
+
+        second = generate_student_fees(self.school, self.year)
+        self.assertEqual((second['created'], second['skipped_existing']), (0, 6))
+        self.assertEqual(StudentFee.objects.count(), 6)
+        self.assertEqual(reconcile_ledger(), [])
+
+    def test_class_and_fee_type_filters(self):
+        summary = generate_student_fees(self.school, self.year, class_ids=[self.other_class.pk], fee_types=['library'])
+        self.assertEqual(summary['created'], 1)
+        fee = StudentFee.objects.get()
+        self.assertEqual((fee.student_id, fee.fee_structure.fee_type), (self.senior.pk, 'library'))
+        # Widening the run afterwards only adds what is missing
+        self.assertEqual(generate_student_fees(self.school, self.year)['created'], 5)
+
+
+@override_settings(FEES_OVERDUE_FINE={'FLAT': '5.00', 'PERCENT': '10'})
+class FeeOverdueSweepTest(FeeFixtureMixin, TestCase):
+    def statuses(self):
+        return dict(StudentFee.objects.values_list('fee_structure__fee_type', 'payment_status'))
+
+    def test_sweep_fines_past_due_fees_and_advances_watermark(self):
+        library = self.create_fee('library', date(2026, 3, 1))
+        self.create_fee('tuition', date(2026, 3, 20))
+        paid = self.create_fee('hostel', date(2026, 2, 1), amount_paid=Decimal('100'),
+                               payment_status=PaymentStatusChoices.PAID)
+
+        self.assertEqual(sweep_overdue_fees(today=date(2026, 3, 10), chunk_size=1), 1)
+        library.refresh_from_db()
+        self.assertEqual((library.payment_status, library.fine_amount), (PaymentStatusChoices.OVERDUE, Decimal('15.00')))
+        self.assertEqual(self.statuses()['tuition'], PaymentStatusChoices.PENDING)
+        self.assertEqual(StudentFee.objects.get(pk=paid.pk).fine_amount, Decimal('0.00'))
+        self.assertEqual(FeeOverdueSweep.objects.get().swept_through, date(2026, 3, 9))
+        self.assertEqual(reconcile_ledger(), [])
+
+        # A second run the same day has nothing new to do
+        self.assertEqual(sweep_overdue_fees(today=date(2026, 3, 10)), 0)
+        self.assertEqual(sweep_overdue_fees(today=date(2026, 3, 25)), 1)
+        self.assertEqual(self.statuses()['tuition'], PaymentStatusChoices.OVERDUE)
+
+    def test_fees_invoiced_after_their_due_date_are_still_swept(self):
+        self.create_fee('library', date(2026, 3, 1))
+        sweep_overdue_fees(today=date(2026, 3, 10))
+
+        # Late admission: invoiced with a due date the watermark has already passed
+        late = self.create_fee('tuition', date(2026, 3, 5))
+        self.assertEqual(sweep_overdue_fees(today=date(2026, 3, 11)), 1)
+        late.refresh_from_db()
+        self.assertEqual(late.payment_status, PaymentStatusChoices.OVERDUE)
+
+    def test_untouched_fees_behind_the_watermark_need_full(self):
+        fee = self.create_fee('library', date(2026, 3, 1))
+        sweep_overdue_fees(today=date(2026, 3, 10))
+        FeeOverdueSweep.objects.update(last_run_at=fee.updated_at.replace(year=2027))
+        StudentFee.objects.filter(pk=fee.pk).update(payment_status=PaymentStatusChoices.PENDING)
+
+        self.assertEqual(sweep_overdue_fees(today=date(2026, 3, 11)), 0)
+        self.assertEqual(sweep_overdue_fees(today=date(2026, 3, 11), full=True), 1)
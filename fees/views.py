@@ -1,12 +1,17 @@
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q, Sum, Count
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from schoolmanagement.pagination import OptInKeysetPagination
 from .models import *
 from .serializers import *
+from .ledger import ledger_totals
+from .invoicing import generate_student_fees
+from .allocation import AllocationError, collect_payment
 from .permissions import IsSchoolOwnerOrReadOnly, IsAuthenticated
 
 class BaseViewSet(viewsets.ModelViewSet):
@@ -36,14 +41,18 @@ class SchoolViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def dashboard(self, request, pk=None):
-        """Get school dashboard statistics"""
+        """Get school dashboard statistics; fee totals come from the fee ledger"""
         school = self.get_object()
+        totals, years = ledger_totals(school, request.query_params.get('academic_year'))
         stats = {
             'total_students': school.students.filter(is_active=True).count(),
             'total_classes': school.classes.filter(is_active=True).count(),
-            'total_fees_collected': school.payments.aggregate(total=Sum('amount'))['total'] or 0,
-            'pending_fees': school.student_fees.filter(payment_status=PaymentStatusChoices.PENDING).aggregate(total=Sum('amount_due'))['total'] or 0,
-            'overdue_fees': school.student_fees.filter(payment_status=PaymentStatusChoices.OVERDUE).aggregate(total=Sum('amount_due'))['total'] or 0,
+            'total_fees_collected': totals['collected'],
+            'pending_fees': totals['pending'],
+            'overdue_fees': totals['overdue'],
+            'total_discounts': totals['discount'],
+            'total_fines': totals['fine'],
+            'academic_years': years,
         }
         return Response(stats)
 
@@ -128,6 +137,13 @@ class StudentViewSet(BaseViewSet):
         }
         return Response(summary)
 
+class GenerateStudentFeesSerializer(serializers.Serializer):
+    """Request body of FeeStructureViewSet.generate_student_fees"""
+    academic_year = serializers.UUIDField()
+    classes = serializers.ListField(child=serializers.UUIDField(), required=False)
+    fee_types = serializers.ListField(child=serializers.ChoiceField(choices=FeeTypeChoices.choices), required=False)
+    dry_run = serializers.BooleanField(required=False, default=False)
+
 class FeeStructureViewSet(BaseViewSet):
     """Fee Structure ViewSet"""
     queryset = FeeStructure.objects.all()
@@ -152,6 +168,28 @@ class FeeStructureViewSet(BaseViewSet):
             'message': f'{len(fee_structures)} fee structures created successfully',
             'created': len(fee_structures)
         })
+    
+    @action(detail=False, methods=['post'])
+    def generate_student_fees(self, request):
+        """Invoice all active students of the selected classes for an academic year"""
+        params = GenerateStudentFeesSerializer(data=request.data)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        options = params.validated_data
+        
+        try:
+            academic_year = AcademicYear.objects.get(id=options['academic_year'], school=request.user.school)
+        except AcademicYear.DoesNotExist:
+            return Response({'error': 'Academic year not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        summary = generate_student_fees(
+            request.user.school,
+            academic_year,
+            class_ids=options.get('classes') or None,
+            fee_types=options.get('fee_types') or None,
+            dry_run=options['dry_run'],
+        )
+        return Response(summary, status=status.HTTP_200_OK if summary['dry_run'] else status.HTTP_201_CREATED)
 
 class StudentFeeViewSet(BaseViewSet):
     """Student Fee ViewSet"""
@@ -170,10 +208,7 @@ class StudentFeeViewSet(BaseViewSet):
     @action(detail=False, methods=['get'])
     def overdue_fees(self, request):
         """Get all overdue fees"""
-        overdue_fees = self.get_queryset().filter(
-            payment_status=PaymentStatusChoices.OVERDUE,
-            due_date__lt=timezone.now().date()
-        )
+        overdue_fees = self.get_queryset().filter(payment_status=PaymentStatusChoices.OVERDUE)
         serializer = self.get_serializer(overdue_fees, many=True)
         return Response(serializer.data)
     
@@ -196,55 +231,39 @@ class PaymentViewSet(BaseViewSet):
     """Payment ViewSet"""
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
+    pagination_class = OptInKeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     search_fields = ['receipt_number', 'student__student_id', 'student__user__first_name']
     filterset_fields = ['payment_method', 'payment_date', 'student__current_class']
     
     @action(detail=False, methods=['post'])
     def collect_payment(self, request):
-        """Collect payment for student fees"""
+        """Collect payment for student fees; without fee_allocations the amount goes to the oldest dues"""
         student_id = request.data.get('student_id')
-        amount = request.data.get('amount')
-        payment_method = request.data.get('payment_method')
-        fee_allocations = request.data.get('fee_allocations', [])
         
         try:
-            student = Student.objects.get(id=student_id, school=request.user.school)
-            
-            # Create payment record
-            payment = Payment.objects.create(
-                school=request.user.school,
-                student=student,
-                receipt_number=f"RCP{timezone.now().strftime('%Y%m%d')}{Payment.objects.count() + 1:04d}",
-                payment_date=timezone.now(),
-                amount=amount,
-                payment_method=payment_method,
-                collected_by=request.user
+            student = Student.objects.select_related('school').get(id=student_id, school=request.user.school)
+        except Student.DoesNotExist:
+            return Response({'error': 'Student not found'}, status=status.HTTP_404_NOT_FOUND)
+        except (ValueError, ValidationError, TypeError):
+            return Response({'error': 'student_id must be a valid student id'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            payment = collect_payment(
+                student,
+                request.data.get('amount'),
+                request.data.get('payment_method'),
+                collected_by=request.user,
+                fee_allocations=request.data.get('fee_allocations') or None,
+                transaction_id=request.data.get('transaction_id', ''),
+                reference_number=request.data.get('reference_number', ''),
+                remarks=request.data.get('remarks', ''),
             )
             
-            # Create payment details and update student fees
-            for allocation in fee_allocations:
-                student_fee = StudentFee.objects.get(id=allocation['student_fee_id'])
-                allocation_amount = allocation['amount']
-                
-                PaymentDetail.objects.create(
-                    payment=payment,
-                    student_fee=student_fee,
-                    amount=allocation_amount
-                )
-                
-                student_fee.amount_paid += allocation_amount
-                if student_fee.amount_paid >= student_fee.total_amount:
-                    student_fee.payment_status = PaymentStatusChoices.PAID
-                elif student_fee.amount_paid > 0:
-                    student_fee.payment_status = PaymentStatusChoices.PARTIAL
-                student_fee.save()
-            
             serializer = PaymentSerializer(payment)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
             
-        except Student.DoesNotExist:
-            return Response({'error': 'Student not found'}, status=status.HTTP_404_NOT_FOUND)
-        except Exception as e:
+        except AllocationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=True, methods=['get'])
@@ -0,0 +1,159 @@
+"""
+Circulation service: borrow, return, renew and mark lost.
+
+Stock is only ever changed with conditional UPDATEs (``available_quantity > 0`` and
+F() arithmetic), so concurrent desks can never hand out more copies than exist and
+no step relies on a value read earlier in Python. Each operation runs in a single
+transaction together with its BorrowRecord change.
+"""
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from . import reservations
+from .overdue import days_overdue, fine_per_day
+from .models import Book, BookStatus, BorrowRecord, BorrowStatus, Reservation
+
+LOAN_PERIOD = timedelta(days=14)
+OPEN_STATUSES = [BorrowStatus.ACTIVE, BorrowStatus.OVERDUE]
+UNLENDABLE_STATUSES = [BookStatus.MAINTENANCE, BookStatus.LOST]
+
+
+class CirculationError(Exception):
+    pass
+
+
+def _take_copy(book_id, now):
+    """Atomically reserve one copy of ``book_id``; False when none is left"""
+    return Book.objects.filter(pk=book_id, available_quantity__gt=0).exclude(
+        status__in=UNLENDABLE_STATUSES
+    ).update(
+        # Listed before available_quantity so the CASE sees the pre-update count everywhere
+        status=Case(When(available_quantity=1, then=Value(BookStatus.BORROWED)), default=F('status')),
+        available_quantity=F('available_quantity') - 1,
+        updated_at=now,
+    ) == 1
+
+
+def _put_back_copy(book_id, now):
+    Book.objects.filter(pk=book_id).update(
+        status=Case(
+            When(status__in=[BookStatus.BORROWED, BookStatus.RESERVED], then=Value(BookStatus.AVAILABLE)),
+            default=F('status'),
+        ),
+        available_quantity=F('available_quantity') + 1,
+        updated_at=now,
+    )
+
+
+def _is_book_pk(value):
+    """Integers and digit strings, as JSON clients send ids; bools and floats are not ids"""
+    if isinstance(value, str):
+        return value.isdigit()
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def checkout(member, book_ids, loan_period=LOAN_PERIOD, partial=True):
+    """
+    Lend several books to ``member`` in one transaction.
+
+    Returns (records, rejected). A copy held for the member's reservation is lent
+    first; other books with no free copy are rejected. With ``partial=False`` any
+    rejection raises CirculationError and nothing is lent.
+    """
+    if not member.is_active:
+        raise CirculationError('Member is not active')
+
+    now = timezone.now()
+    records, rejected = [], []
+    with transaction.atomic():
+        for book_id in book_ids:
+            if not _is_book_pk(book_id):
+                rejected.append({'book_id': book_id, 'error': 'Invalid book id'})
+                continue
+            book_id = int(book_id)
+            if reservations.claim_hold(member, book_id, now) or _take_copy(book_id, now):
+                records.append(BorrowRecord(
+                    member=member, book_id=book_id, due_date=now + loan_period,
+                ))
+            else:
+                rejected.append({'book_id': book_id, 'error': 'Book not available'})
+        if rejected and not partial:
+            raise CirculationError(f'{len(rejected)} of {len(book_ids)} books not available')
+        BorrowRecord.objects.bulk_create(records)
+    return records, rejected
+
+
+def borrow(member, book_id, loan_period=LOAN_PERIOD):
+    records, rejected = checkout(member, [book_id], loan_period, partial=False)
+    return records[0]
+
+
+def open_record(member_id, book_id):
+    """Oldest open loan of ``book_id`` for the member (a member may hold several copies)"""
+    record = BorrowRecord.objects.filter(
+        member_id=member_id, book_id=book_id, status__in=OPEN_STATUSES
+    ).order_by('due_date', 'pk').first()
+    if record is None:
+        raise CirculationError('No active borrow record found')
+    return record
+
+
+def _close(record, status, now, **changes):
+    """Move an open record to ``status``; fails if another request closed it first"""
+    closed = BorrowRecord.objects.filter(pk=record.pk, status__in=OPEN_STATUSES).update(
+        status=status, updated_at=now, **changes
+    )
+    if not closed:
+        raise CirculationError('Borrow record is already closed')
+    record.status = status
+    for name, value in changes.items():
+        setattr(record, name, value)
+
+
+def return_book(record):
+    """Close the loan and pass the copy to the reservation queue or the shelf; late returns settle the fine"""
+    now = timezone.now()
+    changes = {'return_date': now}
+    late_days = days_overdue(record.due_date, now)
+    if late_days and fine_per_day():
+        changes['fine_amount'] = fine_per_day() * late_days
+    with transaction.atomic():
+        _close(record, BorrowStatus.RETURNED, now, **changes)
+        reservations.release_copy(record.book_id, now)
+    return record
+
+
+def renew(record, loan_period=LOAN_PERIOD):
+    """Extend an open loan from now, unless another member is waiting for the book"""
+    now = timezone.now()
+    waiting = Reservation.objects.filter(
+        book_id=record.book_id, is_active=True, expiry_date__gt=now
+    ).exclude(member_id=record.member_id).exists()
+    if waiting:
+        raise CirculationError('Book is reserved by another member')
+
+    due_date = now + loan_period
+    renewed = BorrowRecord.objects.filter(pk=record.pk, status__in=OPEN_STATUSES).update(
+        due_date=due_date, status=BorrowStatus.ACTIVE, updated_at=now
+    )
+    if not renewed:
+        raise CirculationError('Borrow record is already closed')
+    record.due_date, record.status = due_date, BorrowStatus.ACTIVE
+    return record
+
+
+def mark_lost(record, fine_amount=None):
+    """Close the loan as lost and write the copy off the book's stock"""
+    now = timezone.now()
+    changes = {}
+    if fine_amount is not None:
+        changes['fine_amount'] = fine_amount
+    with transaction.atomic():
+        _close(record, BorrowStatus.LOST, now, **changes)
+        Book.objects.filter(pk=record.book_id, quantity__gt=0).update(
+            status=Case(When(quantity=1, then=Value(BookStatus.LOST)), default=F('status')),
+            quantity=F('quantity') - 1,
+            updated_at=now,
+        )
+    return record
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from library.reservations import CHUNK_SIZE, expire_reservations
+
+
+class Command(BaseCommand):
+    help = 'Close lapsed reservations and pass copies from lapsed holds down the queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows updated per statement')
+
+    def handle(self, *args, **options):
+        result = expire_reservations(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Expired {result['expired']} reservation(s), released {result['released']} held copy(ies)"
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from library.models import Book
+from library.search import book_documents, get_backend
+from schoolmanagement.batching import pk_ranges
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the library catalogue search index from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Books indexed per batch')
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.clear()
+        indexed = 0
+        for first, last in pk_ranges(Book.objects.all(), options['batch_size']):
+            documents = list(book_documents(Book.objects.filter(pk__gte=first, pk__lte=last)))
+            backend.index(documents)
+            indexed += len(documents)
+            self.stdout.write(f'Indexed {indexed} book(s)')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the search index with {indexed} book(s)'))
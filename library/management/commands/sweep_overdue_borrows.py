@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from library.overdue import CHUNK_SIZE, sweep_overdue_borrows
+
+
+class Command(BaseCommand):
+    help = 'Mark loans that fell due since the last run as overdue and assess fines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Ignore the watermark and sweep every past-due loan')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows updated per statement')
+
+    def handle(self, *args, **options):
+        count = sweep_overdue_borrows(full=options['full'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Marked {count} borrow record(s) overdue'))
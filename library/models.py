@@ -122,17 +122,44 @@ class BorrowRecord(TimestampMixin):
     
     class Meta:
         ordering = ['-borrow_date']
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='borrow_status_due_idx'),
+            models.Index(fields=['status', 'updated_at'], name='borrow_status_updated_idx'),
+            models.Index(fields=['-borrow_date', '-id'], name='borrow_keyset_idx'),
+        ]
+
+
+class BorrowOverdueSweep(TimestampMixin):
+    """Watermark of the overdue sweeper: loans due before swept_through and untouched since last_run_at are done"""
+    name = models.CharField(max_length=50, unique=True, default='borrow_records')
+    swept_through = models.DateTimeField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.name} through {self.swept_through}"
 
 
 class Reservation(TimestampMixin):
     member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='reservations')
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='reservations')
     reservation_date = models.DateTimeField(auto_now_add=True)
+    # While waiting: when the reservation lapses. Once a copy is held: the pickup deadline
     expiry_date = models.DateTimeField()
+    held_at = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     
     def __str__(self):
         return f"{self.member.user.get_full_name()} - {self.book.title}"
     
     class Meta:
-        ordering = ['-reservation_date']
\ No newline at end of file
+        ordering = ['-reservation_date']
+        indexes = [
+            # FIFO hold queue per book (library/reservations.py)
+            models.Index(fields=['book', 'is_active', 'reservation_date'], name='reservation_queue_idx'),
+            models.Index(fields=['is_active', 'expiry_date'], name='reservation_expiry_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['member', 'book'], condition=models.Q(is_active=True), name='unique_active_reservation'
+            ),
+        ]
\ No newline at end of file
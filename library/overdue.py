@@ -0,0 +1,69 @@
+"""
+Overdue sweeper for borrow records.
+
+Moves active loans whose due date has passed to OVERDUE and assesses a fine of
+settings.LIBRARY_FINE_PER_DAY per started day overdue. Only loans that fell due
+since the previous run are touched, plus loans changed since then: the
+BorrowOverdueSweep watermark remembers the time swept through and when the run
+started, so a loan whose due date was moved into the past is still picked up. Loans are swept in primary-key ranges: each range reads its
+due dates in one query and, because the fine depends on how many days a loan is
+late, issues one UPDATE per distinct fine in the range. circulation.return_book
+settles the final fine.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.db.models import Q, Value
+from django.utils import timezone
+from schoolmanagement.batching import pk_ranges
+from .models import BorrowOverdueSweep, BorrowRecord, BorrowStatus
+
+CHUNK_SIZE = 1000
+
+
+def fine_per_day():
+    return Decimal(str(getattr(settings, 'LIBRARY_FINE_PER_DAY', '0.00')))
+
+
+def days_overdue(due_date, now):
+    """Started days past ``due_date`` (0 while not yet due)"""
+    if now <= due_date:
+        return 0
+    return (now - due_date).days + 1
+
+
+def sweep_overdue_borrows(now=None, full=False, chunk_size=CHUNK_SIZE):
+    """
+    Mark active loans due before ``now`` (and since the watermark) overdue and fine them.
+
+    ``full`` ignores the watermark. Returns the number of loans transitioned.
+    """
+    started = timezone.now()
+    now = now or started
+    rate = fine_per_day()
+    sweep, _ = BorrowOverdueSweep.objects.get_or_create(name='borrow_records')
+
+    candidates = BorrowRecord.objects.filter(status=BorrowStatus.ACTIVE, due_date__lt=now)
+    if sweep.swept_through and not full:
+        recent = Q(due_date__gte=sweep.swept_through)
+        if sweep.last_run_at:
+            recent |= Q(updated_at__gte=sweep.last_run_at)
+        candidates = candidates.filter(recent)
+
+    transitioned = 0
+    changes = {'status': BorrowStatus.OVERDUE, 'updated_at': now}
+    for first, last in pk_ranges(candidates, chunk_size):
+        chunk = candidates.filter(pk__gte=first, pk__lte=last)
+        if not rate:
+            transitioned += chunk.update(**changes)
+            continue
+        by_fine = defaultdict(list)
+        for pk, due_date in chunk.values_list('pk', 'due_date'):
+            by_fine[rate * days_overdue(due_date, now)].append(pk)
+        for fine, pks in by_fine.items():
+            transitioned += chunk.filter(pk__in=pks).update(fine_amount=Value(fine), **changes)
+
+    sweep.swept_through = now
+    sweep.last_run_at = started
+    sweep.save(update_fields=['swept_through', 'last_run_at', 'updated_at'])
+    return transitioned
@@ -0,0 +1,134 @@
+"""
+Reservation hold queue.
+
+The active reservations of a book form a FIFO queue ordered by (reservation_date,
+pk) and served by the (book, is_active, reservation_date) index. A reservation
+either waits in the queue or, once a copy is set aside for it, holds that copy
+(``held_at``) until its pickup deadline in ``expiry_date``. A held copy counts
+neither in available_quantity nor as a loan, and the book shows as RESERVED while
+no copy is free. Copies pass to the head of the queue when returned
+(circulation.return_book), when a new reservation finds a free copy, and when a
+hold lapses (expire_reservations).
+"""
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+from schoolmanagement.batching import pk_ranges
+from . import circulation
+from .models import Book, BookStatus, Reservation
+
+RESERVATION_PERIOD = timedelta(days=30)
+HOLD_PERIOD = timedelta(days=3)
+CHUNK_SIZE = 1000
+
+
+def waiting(book_id, now):
+    """Reservations still waiting for a copy of ``book_id``, first in line first"""
+    return Reservation.objects.filter(
+        book_id=book_id, is_active=True, held_at__isnull=True, expiry_date__gt=now
+    ).order_by('reservation_date', 'pk')
+
+
+def _hold_for_next(book_id, now):
+    """Set a copy in hand aside for the head of the queue; False when nobody is waiting"""
+    # skip_locked lets concurrent returns of the same book serve different reservations
+    for head in waiting(book_id, now).select_for_update(skip_locked=True)[:1]:
+        return Reservation.objects.filter(pk=head.pk, is_active=True, held_at__isnull=True).update(
+            held_at=now, expiry_date=now + HOLD_PERIOD, updated_at=now
+        ) == 1
+    return False
+
+
+def release_copy(book_id, now):
+    """A copy came back: hold it for the next reservation in line, else put it on the shelf"""
+    if _hold_for_next(book_id, now):
+        Book.objects.filter(pk=book_id, status=BookStatus.BORROWED, available_quantity=0).update(
+            status=BookStatus.RESERVED, updated_at=now
+        )
+    else:
+        circulation._put_back_copy(book_id, now)
+
+
+def reserve(member, book, expiry_date=None):
+    """Queue ``member`` for ``book``; a free copy is held for the queue head straight away"""
+    if not member.is_active:
+        raise circulation.CirculationError('Member is not active')
+    now = timezone.now()
+    with transaction.atomic():
+        if Reservation.objects.filter(member=member, book=book, is_active=True).exists():
+            raise circulation.CirculationError('Book is already reserved by this member')
+        reservation = Reservation.objects.create(
+            member=member, book=book, expiry_date=expiry_date or now + RESERVATION_PERIOD,
+        )
+        if circulation._take_copy(book.pk, now):
+            release_copy(book.pk, now)
+    reservation.refresh_from_db()
+    return reservation
+
+
+def claim_hold(member, book_id, now):
+    """Turn the member's held copy of ``book_id`` into their loan; False when they hold none"""
+    claimed = Reservation.objects.filter(
+        member=member, book_id=book_id, is_active=True, held_at__isnull=False, expiry_date__gt=now
+    ).update(is_active=False, updated_at=now)
+    if claimed:
+        other_holds = Reservation.objects.filter(book_id=OuterRef('pk'), is_active=True, held_at__isnull=False)
+        Book.objects.filter(pk=book_id, status=BookStatus.RESERVED).exclude(Exists(other_holds)).update(
+            status=BookStatus.BORROWED, updated_at=now
+        )
+    return bool(claimed)
+
+
+def cancel(reservation):
+    """Withdraw a reservation; a copy it was holding passes down the queue"""
+    now = timezone.now()
+    with transaction.atomic():
+        cancelled = Reservation.objects.filter(pk=reservation.pk, is_active=True).update(
+            is_active=False, updated_at=now
+        )
+        if not cancelled:
+            raise circulation.CirculationError('Reservation is no longer active')
+        if reservation.held_at:
+            release_copy(reservation.book_id, now)
+    reservation.is_active = False
+    return reservation
+
+
+def queue_position(reservation, now=None):
+    """1-based place in the book's queue, 0 while a copy is held, None once inactive"""
+    if not reservation.is_active:
+        return None
+    if reservation.held_at:
+        return 0
+    ahead = waiting(reservation.book_id, now or timezone.now()).filter(
+        Q(reservation_date__lt=reservation.reservation_date)
+        | Q(reservation_date=reservation.reservation_date, pk__lt=reservation.pk)
+    ).count()
+    return ahead + 1
+
+
+def expire_reservations(now=None, chunk_size=CHUNK_SIZE):
+    """
+    Deactivate lapsed reservations and pass the copies of lapsed holds on.
+
+    Lapsed rows are closed with one UPDATE per primary-key range. Returns the number
+    of reservations expired and of held copies released.
+    """
+    now = now or timezone.now()
+    lapsed = Reservation.objects.filter(is_active=True, expiry_date__lte=now)
+    expired = released = 0
+    for first, last in pk_ranges(lapsed, chunk_size):
+        with transaction.atomic():
+            chunk = lapsed.filter(pk__gte=first, pk__lte=last)
+            pks = list(chunk.select_for_update().values_list('pk', flat=True))
+            copies = dict(
+                Reservation.objects.filter(pk__in=pks, held_at__isnull=False)
+                .values_list('book_id').annotate(count=Count('pk')).order_by()
+            )
+            expired += Reservation.objects.filter(pk__in=pks).update(is_active=False, updated_at=now)
+            for book_id, count in copies.items():
+                for _ in range(count):
+                    release_copy(book_id, now)
+                released += count
+    return {'expired': expired, 'released': released}
@@ -0,0 +1,221 @@
+"""
+Catalogue search.
+
+Books are indexed on title, ISBN, author names, publisher and description. On
+SQLite the index is an FTS5 table ranked with bm25 (title weighted highest);
+other databases fall back to a plain icontains backend. Point
+settings.LIBRARY_SEARCH['BACKEND'] at a dotted path to plug in another one.
+
+Query syntax: whitespace-separated terms that must all match, ``term*`` for a
+prefix, ``"some phrase"`` for a phrase and ``field:term`` to scope a term to one
+of title, isbn, author, publisher or description. library/signals.py keeps the
+index in sync; ``manage.py rebuild_search_index`` rebuilds it from scratch.
+"""
+import re
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+from .models import Book
+
+FIELDS = ('title', 'isbn', 'authors', 'publisher', 'description')
+FIELD_ALIASES = {'author': 'authors', **{field: field for field in FIELDS}}
+TERM = re.compile(r'(?:(\w+):)?("[^"]*"?|\S+)')
+
+DEFAULTS = {
+    'BACKEND': None,
+    'MAX_RESULTS': 500,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'LIBRARY_SEARCH', {})}
+
+
+def parse_query(query):
+    """[(fields or None, text, is_prefix, is_phrase)] for a user query"""
+    terms = []
+    for field, raw in TERM.findall(query or ''):
+        scope = FIELD_ALIASES.get(field.lower()) if field else None
+        if field and scope is None:
+            raw = f'{field}:{raw}'
+        phrase = raw.startswith('"')
+        prefix = not phrase and raw.endswith('*')
+        text = raw.strip('"*').replace('"', '').strip()
+        if text:
+            terms.append(((scope,) if scope else None, text, prefix, phrase))
+    return terms
+
+
+def book_documents(books):
+    """(book_id, {field: text}) for each book, authors and publisher loaded up front"""
+    for book in books.select_related('publisher').prefetch_related('authors').order_by('pk'):
+        yield book.pk, {
+            'title': book.title,
+            'isbn': book.isbn,
+            'authors': ' '.join(author.name for author in book.authors.all()),
+            'publisher': book.publisher.name if book.publisher else '',
+            'description': book.description,
+        }
+
+
+class SearchBackend:
+    def create_table(self, cursor):
+        """Set up backend storage on a new database connection"""
+
+    def index(self, documents):
+        raise NotImplementedError
+
+    def remove(self, book_ids):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, terms, limit):
+        """Matching book ids, best match first"""
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    table = 'library_book_fts'
+    # bm25 column weights, in FIELDS order
+    weights = (10.0, 5.0, 5.0, 2.0, 1.0)
+
+    def create_table(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+            f"{', '.join(FIELDS)}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+
+    def index(self, documents):
+        rows = [(book_id, *(document[field] for field in FIELDS)) for book_id, document in documents]
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), 500):
+                batch = rows[start:start + 500]
+                cursor.execute(
+                    f"DELETE FROM {self.table} WHERE rowid IN ({', '.join(['%s'] * len(batch))})",
+                    [row[0] for row in batch],
+                )
+                cursor.executemany(
+                    f"INSERT INTO {self.table} (rowid, {', '.join(FIELDS)}) VALUES (%s, %s, %s, %s, %s, %s)", batch
+                )
+
+    def remove(self, book_ids):
+        book_ids = list(book_ids)
+        if not book_ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN ({', '.join(['%s'] * len(book_ids))})", book_ids
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def match_expression(self, terms):
+        parts = []
+        for fields, text, prefix, phrase in terms:
+            expression = f'"{text}"' + ('*' if prefix else '')
+            parts.append(f'{{{" ".join(fields)}}} : {expression}' if fields else expression)
+        return ' AND '.join(parts)
+
+    def search(self, terms, limit):
+        if not terms:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY bm25({self.table}, {', '.join(map(str, self.weights))}) LIMIT %s",
+                [self.match_expression(terms), limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """Unindexed fallback: icontains over the catalogue columns, ordered by title"""
+    lookups = {
+        'title': 'title',
+        'isbn': 'isbn',
+        'authors': 'authors__name',
+        'publisher': 'publisher__name',
+        'description': 'description',
+    }
+
+    def index(self, documents):
+        pass
+
+    def remove(self, book_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, terms, limit):
+        if not terms:
+            return []
+        books = Book.objects.all()
+        for fields, text, prefix, phrase in terms:
+            condition = Q()
+            for name in fields or FIELDS:
+                condition |= Q(**{f'{self.lookups[name]}__icontains': text})
+            books = books.filter(pk__in=Book.objects.filter(condition).values('pk'))
+        return list(books.order_by('title', 'pk').values_list('pk', flat=True)[:limit])
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = get_config()['BACKEND']
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == 'sqlite':
+            _backend = SQLiteFTSBackend()
+        else:
+            _backend = DatabaseSearchBackend()
+    return _backend
+
+
+def index_books(book_ids):
+    book_ids = list(book_ids)
+    if not book_ids:
+        return
+    documents = list(book_documents(Book.objects.filter(pk__in=book_ids)))
+    found = {book_id for book_id, _ in documents}
+    get_backend().index(documents)
+    get_backend().remove(book_id for book_id in book_ids if book_id not in found)
+
+
+def remove_books(book_ids):
+    get_backend().remove(book_ids)
+
+
+def search_books(query, fields=None, limit=None):
+    """
+    Ids of books matching ``query``, best match first.
+
+    ``fields`` scopes unqualified terms to those fields (e.g. ``['title', 'author']``).
+    """
+    terms = parse_query(query)
+    scopes = tuple(dict.fromkeys(FIELD_ALIASES[field] for field in fields or () if field in FIELD_ALIASES))
+    if scopes:
+        terms = [(own or scopes, text, prefix, phrase) for own, text, prefix, phrase in terms]
+    return get_backend().search(terms, limit or get_config()['MAX_RESULTS'])
+
+
+def prepare_connection(sender, connection, **kwargs):
+    """
+    connection_created receiver creating the backend's table if needed.
+
+    The FTS5 table is derived data outside the migrations. It is created as the
+    connection opens, outside any transaction: SQLite cannot roll back the creation
+    of an FTS5 table inside a savepoint without corrupting the connection.
+    """
+    if connection.alias != DEFAULT_DB_ALIAS:
+        return
+    with connection.cursor() as cursor:
+        get_backend().create_table(cursor)
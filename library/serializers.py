@@ -0,0 +1,64 @@
+from rest_framework import serializers
+from .models import Author, Publisher, Book, Member, BorrowRecord, Reservation
+
+
+class AuthorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Author
+        fields = '__all__'
+
+
+class PublisherSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Publisher
+        fields = '__all__'
+
+
+class BookSerializer(serializers.ModelSerializer):
+    authors_list = serializers.StringRelatedField(source='authors', many=True, read_only=True)
+    publisher_name = serializers.CharField(source='publisher.name', read_only=True, default=None)
+
+    class Meta:
+        model = Book
+        fields = '__all__'
+
+
+class BookCardSerializer(serializers.ModelSerializer):
+    """Compact catalogue card for book listings, without the long description"""
+    authors_list = serializers.StringRelatedField(source='authors', many=True, read_only=True)
+    publisher_name = serializers.CharField(source='publisher.name', read_only=True, default=None)
+
+    class Meta:
+        model = Book
+        fields = [
+            'id', 'title', 'isbn', 'authors_list', 'publisher_name', 'publication_date',
+            'category', 'language', 'status', 'quantity', 'available_quantity',
+        ]
+
+
+class MemberSerializer(serializers.ModelSerializer):
+    full_name = serializers.CharField(source='user.get_full_name', read_only=True)
+
+    class Meta:
+        model = Member
+        fields = '__all__'
+
+
+class BorrowRecordSerializer(serializers.ModelSerializer):
+    book_title = serializers.CharField(source='book.title', read_only=True)
+    member_name = serializers.CharField(source='member.user.get_full_name', read_only=True)
+
+    class Meta:
+        model = BorrowRecord
+        fields = '__all__'
+
+
+class ReservationSerializer(serializers.ModelSerializer):
+    book_title = serializers.CharField(source='book.title', read_only=True)
+    member_name = serializers.CharField(source='member.user.get_full_name', read_only=True)
+
+    class Meta:
+        model = Reservation
+        fields = '__all__'
+        read_only_fields = ['held_at', 'is_active']
+        extra_kwargs = {'expiry_date': {'required': False}}
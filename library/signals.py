@@ -0,0 +1,59 @@
+from functools import partial
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from .models import Author, Book, Publisher
+from .search import index_books, prepare_connection, remove_books
+
+connection_created.connect(prepare_connection, dispatch_uid='library_search_prepare_connection')
+
+
+def _reindex(book_ids):
+    book_ids = set(book_ids)
+    if book_ids:
+        transaction.on_commit(partial(index_books, book_ids))
+
+
+@receiver(post_save, sender=Book)
+def index_book_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _reindex([instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+def remove_book_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(partial(remove_books, [instance.pk]))
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+def index_book_authors(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        _reindex([instance.pk])
+    elif action == 'pre_clear':
+        # The author's books are gone from the relation by post_clear
+        _reindex(instance.books.values_list('pk', flat=True))
+    else:
+        _reindex(pk_set or ())
+
+
+@receiver(post_save, sender=Author)
+def index_author_books(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _reindex(instance.books.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Publisher)
+def index_publisher_books(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _reindex(instance.book_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=Publisher)
+def index_books_of_deleted_name(sender, instance, **kwargs):
+    # Deleting the author/publisher drops the name from these books without a Book signal
+    books = instance.books if sender is Author else instance.book_set
+    _reindex(books.values_list('pk', flat=True))
@@ -0,0 +1,13 @@
+from celery import shared_task
+from .overdue import sweep_overdue_borrows
+from .reservations import expire_reservations
+
+
+@shared_task
+def sweep_overdue_borrow_records():
+    return sweep_overdue_borrows()
+
+
+@shared_task
+def expire_library_reservations():
+    return expire_reservations()
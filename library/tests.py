@@ -1,3 +1,318 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import date
+from django.contrib.auth.models import User
+from django.db import close_old_connections, connection
+from datetime import timedelta
+from decimal import Decimal
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.utils import timezone
+from .circulation import CirculationError, borrow, checkout, mark_lost, open_record, renew, return_book
+from .models import Author, Book, Publisher, BookStatus, BorrowOverdueSweep, BorrowRecord, BorrowStatus, Member, Reservation
+from .overdue import sweep_overdue_borrows
+from .reservations import HOLD_PERIOD, cancel, expire_reservations, queue_position, reserve
+from .search import search_books
 
-# Create your tests here.
+
+def create_member(index):
+    user = User.objects.create_user(username=f'reader{index}')
+    return Member.objects.create(
+        user=user, membership_id=f'M{index}', membership_type='student', phone='9800000000', address='Street',
+    )
+
+
+def create_book(isbn, quantity=1):
+    return Book.objects.create(
+        title=f'Book {isbn}', isbn=isbn, publication_date=date(2020, 1, 1), category='science',
+        pages=100, quantity=quantity, available_quantity=quantity,
+    )
+
+
+class CirculationTest(TestCase):
+    def setUp(self):
+        self.member = create_member(1)
+
+    def test_borrow_and_return_multiple_copies(self):
+        book = create_book('111', quantity=2)
+        borrow(self.member, book.pk)
+        borrow(self.member, book.pk)
+        book.refresh_from_db()
+        self.assertEqual((book.available_quantity, book.status), (0, BookStatus.BORROWED))
+        with self.assertRaisesMessage(CirculationError, 'not available'):
+            borrow(self.member, book.pk)
+
+        # The member holds two copies; returning picks one open record at a time
+        return_book(open_record(self.member.pk, book.pk))
+        record = open_record(self.member.pk, book.pk)
+        return_book(record)
+        with self.assertRaisesMessage(CirculationError, 'already closed'):
+            return_book(record)
+        book.refresh_from_db()
+        self.assertEqual((book.available_quantity, book.status), (2, BookStatus.AVAILABLE))
+
+    def test_batch_checkout(self):
+        books = [create_book(str(isbn)) for isbn in range(200, 203)]
+        records, rejected = checkout(self.member, [book.pk for book in books] + [books[0].pk])
+        self.assertEqual(len(records), 3)
+        self.assertEqual(rejected, [{'book_id': books[0].pk, 'error': 'Book not available'}])
+
+        spare = create_book('300')
+        with self.assertRaises(CirculationError):
+            checkout(self.member, [spare.pk, books[1].pk], partial=False)
+        spare.refresh_from_db()
+        self.assertEqual(spare.available_quantity, 1)
+        self.assertEqual(BorrowRecord.objects.count(), 3)
+
+    def test_checkout_api_rejects_malformed_ids(self):
+        client = APIClient()
+        client.force_authenticate(self.member.user)
+        book = create_book('400')
+        url = f'/api/library/members/{self.member.pk}/checkout/'
+        response = client.post(url, {'book_ids': [str(book.pk), 'abc', 1.5, None]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual([row['book_id'] for row in response.data['rejected']], ['abc', 1.5, None])
+        response = client.post(url, {'book_ids': ['abc'], 'all_or_nothing': True}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_renew_and_mark_lost(self):
+        book = create_book('400', quantity=1)
+        record = borrow(self.member, book.pk)
+        due_date = record.due_date
+        renew(record)
+        self.assertGreaterEqual(record.due_date, due_date)
+
+        mark_lost(record, fine_amount='25.00')
+        record.refresh_from_db()
+        book.refresh_from_db()
+        self.assertEqual(record.status, BorrowStatus.LOST)
+        self.assertEqual((book.quantity, book.available_quantity, book.status), (0, 0, BookStatus.LOST))
+        with self.assertRaises(CirculationError):
+            renew(record)
+
+
+@override_settings(LIBRARY_FINE_PER_DAY='2.00')
+class OverdueSweepTest(TestCase):
+    def setUp(self):
+        self.member = create_member(1)
+        self.now = timezone.now()
+
+    def lend(self, isbn, due_in):
+        record = borrow(self.member, create_book(isbn).pk)
+        BorrowRecord.objects.filter(pk=record.pk).update(due_date=self.now + due_in)
+        return record
+
+    def test_sweep_marks_overdue_with_day_fines_and_advances_watermark(self):
+        late = self.lend('600', -timedelta(days=2, hours=3))
+        just_late = self.lend('601', -timedelta(hours=1))
+        on_time = self.lend('602', timedelta(days=3))
+
+        self.assertEqual(sweep_overdue_borrows(now=self.now, chunk_size=1), 2)
+        statuses = dict(BorrowRecord.objects.values_list('pk', 'status'))
+        fines = dict(BorrowRecord.objects.values_list('pk', 'fine_amount'))
+        self.assertEqual(statuses[late.pk], BorrowStatus.OVERDUE)
+        self.assertEqual(fines[late.pk], Decimal('6.00'))
+        self.assertEqual(fines[just_late.pk], Decimal('2.00'))
+        self.assertEqual(statuses[on_time.pk], BorrowStatus.ACTIVE)
+        self.assertEqual(BorrowOverdueSweep.objects.get().swept_through, self.now)
+
+        # Loans that fell due before the watermark are not rescanned
+        BorrowRecord.objects.filter(pk=late.pk).update(status=BorrowStatus.ACTIVE)
+        self.assertEqual(sweep_overdue_borrows(now=self.now + timedelta(days=4)), 1)
+        self.assertEqual(BorrowRecord.objects.get(pk=late.pk).status, BorrowStatus.ACTIVE)
+        self.assertEqual(sweep_overdue_borrows(now=self.now + timedelta(days=4), full=True), 1)
+
+    def test_due_date_moved_into_the_past_is_swept(self):
+        record = self.lend('603', timedelta(days=3))
+        self.assertEqual(sweep_overdue_borrows(), 0)
+        record.refresh_from_db()
+        record.due_date = timezone.now() - timedelta(days=1, hours=1)
+        record.save()
+        self.assertEqual(sweep_overdue_borrows(), 1)
+        record.refresh_from_db()
+        self.assertEqual((record.status, record.fine_amount), (BorrowStatus.OVERDUE, Decimal('4.00')))
+
+    def test_long_overdue_loans_do_not_cost_a_query_per_day(self):
+        ancient = self.lend('604', -timedelta(days=400, hours=1))
+        recent = self.lend('605', -timedelta(days=1, hours=1))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(sweep_overdue_borrows(now=self.now, full=True), 2)
+        self.assertLess(len(queries), 15)
+        fines = dict(BorrowRecord.objects.values_list('pk', 'fine_amount'))
+        self.assertEqual(fines[ancient.pk], Decimal('802.00'))
+        self.assertEqual(fines[recent.pk], Decimal('4.00'))
+
+    def test_late_return_settles_fine(self):
+        record = self.lend('603', -timedelta(days=1, hours=1))
+        record.refresh_from_db()
+        return_book(record)
+        record.refresh_from_db()
+        self.assertEqual((record.status, record.fine_amount), (BorrowStatus.RETURNED, Decimal('4.00')))
+
+
+class ReservationQueueTest(TestCase):
+    def setUp(self):
+        self.book = create_book('500')
+        self.readers = [create_member(index) for index in range(3)]
+        self.loan = borrow(self.readers[0], self.book.pk)
+
+    def book_state(self):
+        self.book.refresh_from_db()
+        return self.book.available_quantity, self.book.status
+
+    def test_return_promotes_queue_in_order(self):
+        first, second = reserve(self.readers[1], self.book), reserve(self.readers[2], self.book)
+        self.assertEqual([queue_position(first), queue_position(second)], [1, 2])
+        with self.assertRaisesMessage(CirculationError, 'already reserved'):
+            reserve(self.readers[1], self.book)
+
+        return_book(self.loan)
+        first.refresh_from_db()
+        self.assertIsNotNone(first.held_at)
+        self.assertEqual(queue_position(first), 0)
+        self.assertEqual(queue_position(second), 1)
+        self.assertEqual(self.book_state(), (0, BookStatus.RESERVED))
+
+        # The held copy is only lendable to the member it is held for
+        with self.assertRaisesMessage(CirculationError, 'not available'):
+            borrow(self.readers[2], self.book.pk)
+        borrow(self.readers[1], self.book.pk)
+        first.refresh_from_db()
+        self.assertFalse(first.is_active)
+        self.assertEqual(self.book_state(), (0, BookStatus.BORROWED))
+
+    def test_lapsed_hold_passes_down_the_queue(self):
+        first, second = reserve(self.readers[1], self.book), reserve(self.readers[2], self.book)
+        return_book(self.loan)
+
+        result = expire_reservations(now=timezone.now() + HOLD_PERIOD + timedelta(minutes=1))
+        self.assertEqual(result, {'expired': 1, 'released': 1})
+        second.refresh_from_db()
+        self.assertIsNotNone(second.held_at)
+        self.assertEqual(self.book_state(), (0, BookStatus.RESERVED))
+
+        cancel(second)
+        self.assertEqual(self.book_state(), (1, BookStatus.AVAILABLE))
+        self.assertFalse(Reservation.objects.filter(is_active=True).exists())
+
+    def test_active_list_hides_lapsed_reservations(self):
+        current = reserve(self.readers[1], self.book)
+        lapsed = reserve(self.readers[2], self.book)
+        Reservation.objects.filter(pk=lapsed.pk).update(expiry_date=timezone.now() - timedelta(minutes=1))
+        client = APIClient()
+        client.force_authenticate(self.readers[0].user)
+        response = client.get('/api/library/reservations/active/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [current.pk])
+
+    def test_free_copy_is_held_on_reservation(self):
+        return_book(self.loan)
+        reservation = reserve(self.readers[2], self.book)
+        self.assertIsNotNone(reservation.held_at)
+        self.assertEqual(self.book_state(), (0, BookStatus.RESERVED))
+
+
+class CatalogueSearchTest(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author = Author.objects.create(name='Ursula Le Guin')
+            self.wizard = create_book('9780553383041')
+            self.wizard.title = 'A Wizard of Earthsea'
+            self.wizard.description = 'A young mage on the islands of the archipelago'
+            self.wizard.save()
+            self.wizard.authors.add(self.author)
+            self.atlas = create_book('9780000000002')
+            self.atlas.title = 'Atlas of the Islands'
+            self.atlas.save()
+
+    def test_ranked_prefix_and_field_scoped_queries(self):
+        self.assertEqual(search_books('islands'), [self.atlas.pk, self.wizard.pk])
+        self.assertEqual(search_books('wiz*'), [self.wizard.pk])
+        self.assertEqual(search_books('title:islands'), [self.atlas.pk])
+        self.assertEqual(search_books('islands', fields=['description']), [self.wizard.pk])
+        self.assertEqual(search_books('"young mage"'), [self.wizard.pk])
+        self.assertEqual(search_books('isbn:978055*'), [self.wizard.pk])
+
+    def test_index_follows_author_changes_and_deletes(self):
+        self.assertEqual(search_books('author:guin'), [self.wizard.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.name = 'Ursula K. Le Guin'
+            self.author.save()
+        self.assertEqual(search_books('author:k'), [self.wizard.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wizard.authors.clear()
+            self.atlas.delete()
+        self.assertEqual(search_books('guin'), [])
+        self.assertEqual(search_books('atlas'), [])
+
+
+class CatalogueListingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='librarian'))
+        self.author = Author.objects.create(name='Author')
+        publisher = Publisher.objects.create(name='Publisher')
+        for index in range(25):
+            book = create_book(f'97800000001{index:02d}')
+            book.publisher = publisher
+            book.save()
+            book.authors.add(self.author, Author.objects.create(name=f'Coauthor {index}'))
+
+    def test_author_books_are_paginated_cards(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/library/authors/{self.author.pk}/books/')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 20)
+        card = response.data['results'][0]
+        self.assertNotIn('description', card)
+        self.assertEqual(card['publisher_name'], 'Publisher')
+        self.assertEqual(len(card['authors_list']), 2)
+
+    def test_book_list_queries_do_not_grow_with_page_size(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/library/books/')
+        self.assertNotIn('description', response.data['results'][0])
+        self.assertIn('description', self.client.get(f'/api/library/books/{self.author.books.first().pk}/').data)
+
+
+class ConcurrentCheckoutTest(TransactionTestCase):
+    def test_concurrent_borrowing_never_oversells(self):
+        copies, desks = 5, 16
+        book = create_book('500', quantity=copies)
+        members = [create_member(index) for index in range(desks)]
+        barrier = threading.Barrier(desks)
+        outcomes = []
+
+        def desk(member):
+            try:
+                barrier.wait()
+                for attempt in range(50):
+                    try:
+                        borrow(member, book.pk)
+                        outcomes.append('lent')
+                        return
+                    except CirculationError:
+                        outcomes.append('refused')
+                        return
+                    except Exception as e:
+                        # SQLite refuses concurrent writers outright instead of waiting
+                        if connection.vendor != 'sqlite' or 'locked' not in str(e):
+                            raise
+                        time.sleep(0.01)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=desk, args=(member,)) for member in members]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        book.refresh_from_db()
+        self.assertEqual(outcomes.count('lent'), copies)
+        self.assertEqual(outcomes.count('refused'), desks - copies)
+        self.assertEqual(book.available_quantity, 0)
+        self.assertEqual(BorrowRecord.objects.filter(book=book).count(), copies)
@@ -0,0 +1,18 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import (
+    AuthorViewSet, PublisherViewSet, BookViewSet,
+    MemberViewSet, BorrowRecordViewSet, ReservationViewSet
+)
+
+router = DefaultRouter()
+router.register(r'authors', AuthorViewSet)
+router.register(r'publishers', PublisherViewSet)
+router.register(r'books', BookViewSet, basename='book')
+router.register(r'members', MemberViewSet)
+router.register(r'borrow-records', BorrowRecordViewSet)
+router.register(r'reservations', ReservationViewSet)
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -1,56 +1,96 @@
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.utils import timezone
-from datetime import timedelta
-from .models import Author, Publisher, Book, Member, BorrowRecord, Reservation
+from schoolmanagement.pagination import OptInKeysetPagination
+from . import circulation, reservations
+from .circulation import CirculationError
+from .models import Author, Publisher, Book, Member, BorrowRecord, BorrowStatus, Reservation
+from .search import search_books
 from .serializers import (
-    AuthorSerializer, PublisherSerializer, BookSerializer,
+    AuthorSerializer, PublisherSerializer, BookSerializer, BookCardSerializer,
     MemberSerializer, BorrowRecordSerializer, ReservationSerializer
 )
 
 
-class AuthorViewSet(viewsets.ModelViewSet):
+def catalogue_queryset(books=None):
+    """Books with the publisher joined and authors prefetched, as every book listing renders them"""
+    books = Book.objects.all() if books is None else books
+    return books.select_related('publisher').prefetch_related('authors')
+
+
+class CatalogueListMixin:
+    """Paginated catalogue cards for list-style custom actions"""
+    
+    def catalogue_response(self, books):
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(books)
+        if page is not None:
+            return self.get_paginated_response(BookCardSerializer(page, many=True, context=context).data)
+        return Response(BookCardSerializer(books, many=True, context=context).data)
+
+
+class AuthorViewSet(CatalogueListMixin, viewsets.ModelViewSet):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
     
     @action(detail=True, methods=['get'])
     def books(self, request, pk=None):
         author = self.get_object()
-        books = author.books.all()
-        serializer = BookSerializer(books, many=True)
-        return Response(serializer.data)
+        return self.catalogue_response(catalogue_queryset(author.books.all()))
 
 
-class PublisherViewSet(viewsets.ModelViewSet):
+class PublisherViewSet(CatalogueListMixin, viewsets.ModelViewSet):
     queryset = Publisher.objects.all()
     serializer_class = PublisherSerializer
     
     @action(detail=True, methods=['get'])
     def books(self, request, pk=None):
         publisher = self.get_object()
-        books = publisher.book_set.all()
-        serializer = BookSerializer(books, many=True)
-        return Response(serializer.data)
+        return self.catalogue_response(catalogue_queryset(publisher.book_set.all()))
 
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(CatalogueListMixin, viewsets.ModelViewSet):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     
+    def get_queryset(self):
+        return catalogue_queryset()
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return BookCardSerializer
+        return BookSerializer
+    
     @action(detail=False, methods=['get'])
     def available(self, request):
-        available_books = Book.objects.filter(status='available', available_quantity__gt=0)
-        serializer = self.get_serializer(available_books, many=True)
+        books = Book.objects.filter(status='available', available_quantity__gt=0)
+        return self.catalogue_response(catalogue_queryset(books))
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked catalogue search: ``?q=`` plus optional ``?fields=title,author``"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q parameter required'}, status=400)
+        fields = [field.strip() for field in request.query_params.get('fields', '').split(',') if field.strip()]
+        
+        book_ids = search_books(query, fields)
+        page = self.paginate_queryset(book_ids)
+        ids = page if page is not None else book_ids
+        books = catalogue_queryset().in_bulk(ids)
+        serializer = BookCardSerializer(
+            [books[pk] for pk in ids if pk in books], many=True, context=self.get_serializer_context()
+        )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def by_category(self, request):
         category = request.query_params.get('category')
         if category:
-            books = Book.objects.filter(category=category)
-            serializer = self.get_serializer(books, many=True)
-            return Response(serializer.data)
+            return self.catalogue_response(catalogue_queryset(Book.objects.filter(category=category)))
         return Response({'error': 'Category parameter required'}, status=400)
     
     @action(detail=True, methods=['post'])
@@ -58,27 +98,15 @@ class BookViewSet(viewsets.ModelViewSet):
         book = self.get_object()
         member_id = request.data.get('member_id')
         
-        if book.available_quantity <= 0:
-            return Response({'error': 'Book not available'}, status=400)
-        
         try:
             member = Member.objects.get(id=member_id)
         except Member.DoesNotExist:
             return Response({'error': 'Member not found'}, status=404)
         
-        # Create borrow record
-        due_date = timezone.now() + timedelta(days=14)  # 2 weeks borrowing period
-        borrow_record = BorrowRecord.objects.create(
-            member=member,
-            book=book,
-            due_date=due_date
-        )
-        
-        # Update book availability
-        book.available_quantity -= 1
-        if book.available_quantity == 0:
-            book.status = 'borrowed'
-        book.save()
+        try:
+            borrow_record = circulation.borrow(member, book.pk)
+        except CirculationError as e:
+            return Response({'error': str(e)}, status=400)
         
         serializer = BorrowRecordSerializer(borrow_record)
         return Response(serializer.data)
@@ -89,23 +117,14 @@ class BookViewSet(viewsets.ModelViewSet):
         member_id = request.data.get('member_id')
         
         try:
-            borrow_record = BorrowRecord.objects.get(
-                book=book,
-                member_id=member_id,
-                status='active'
-            )
-        except BorrowRecord.DoesNotExist:
-            return Response({'error': 'No active borrow record found'}, status=404)
-        
-        # Update borrow record
-        borrow_record.return_date = timezone.now()
-        borrow_record.status = 'returned'
-        borrow_record.save()
+            borrow_record = circulation.open_record(member_id, book.pk)
+        except CirculationError as e:
+            return Response({'error': str(e)}, status=404)
         
-        # Update book availability
-        book.available_quantity += 1
-        book.status = 'available'
-        book.save()
+        try:
+            circulation.return_book(borrow_record)
+        except CirculationError as e:
+            return Response({'error': str(e)}, status=409)
         
         return Response({'message': 'Book returned successfully'})
 
@@ -127,18 +146,65 @@ class MemberViewSet(viewsets.ModelViewSet):
         active_records = member.borrow_records.filter(status='active')
         serializer = BorrowRecordSerializer(active_records, many=True)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['post'])
+    def checkout(self, request, pk=None):
+        """Lend several books at once; ``all_or_nothing`` rejects the whole batch on any miss"""
+        member = self.get_object()
+        book_ids = request.data.get('book_ids') or []
+        if not isinstance(book_ids, list) or not book_ids:
+            return Response({'error': 'book_ids must be a non-empty list'}, status=400)
+        
+        try:
+            records, rejected = circulation.checkout(
+                member, book_ids, partial=not request.data.get('all_or_nothing', False)
+            )
+        except CirculationError as e:
+            return Response({'error': str(e)}, status=400)
+        
+        return Response({
+            'count': len(records),
+            'records': BorrowRecordSerializer(records, many=True).data,
+            'rejected': rejected,
+        }, status=status.HTTP_201_CREATED if records else status.HTTP_400_BAD_REQUEST)
 
 
 class BorrowRecordViewSet(viewsets.ModelViewSet):
     queryset = BorrowRecord.objects.all()
     serializer_class = BorrowRecordSerializer
+    pagination_class = OptInKeysetPagination
+    keyset_ordering = ('-borrow_date', '-id')
+    
+    @action(detail=True, methods=['post'])
+    def return_book(self, request, pk=None):
+        record = self.get_object()
+        try:
+            circulation.return_book(record)
+        except CirculationError as e:
+            return Response({'error': str(e)}, status=409)
+        return Response(self.get_serializer(record).data)
+    
+    @action(detail=True, methods=['post'])
+    def renew(self, request, pk=None):
+        record = self.get_object()
+        try:
+            circulation.renew(record)
+        except CirculationError as e:
+            return Response({'error': str(e)}, status=409)
+        return Response(self.get_serializer(record).data)
+    
+    @action(detail=True, methods=['post'])
+    def mark_lost(self, request, pk=None):
+        record = self.get_object()
+        try:
+            circulation.mark_lost(record, fine_amount=request.data.get('fine_amount'))
+        except CirculationError as e:
+            return Response({'error': str(e)}, status=409)
+        return Response(self.get_serializer(record).data)
     
     @action(detail=False, methods=['get'])
     def overdue(self, request):
-        overdue_records = BorrowRecord.objects.filter(
-            status='active',
-            due_date__lt=timezone.now()
-        )
+        overdue_records = BorrowRecord.objects.filter(status=BorrowStatus.OVERDUE)
         serializer = self.get_serializer(overdue_records, many=True)
         return Response(serializer.data)
 
@@ -147,11 +213,47 @@ class ReservationViewSet(viewsets.ModelViewSet):
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
     
+    def create(self, request, *args, **kwargs):
+        """Join the book's hold queue; a free copy is held straight away"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            reservation = reservations.reserve(
+                serializer.validated_data['member'], serializer.validated_data['book'],
+                serializer.validated_data.get('expiry_date'),
+            )
+        except CirculationError as e:
+            return Response({'error': str(e)}, status=409)
+        data = self.get_serializer(reservation).data
+        data['queue_position'] = reservations.queue_position(reservation)
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get'])
+    def position(self, request, pk=None):
+        reservation = self.get_object()
+        return Response({
+            'id': reservation.pk,
+            'held': reservation.held_at is not None,
+            'queue_position': reservations.queue_position(reservation),
+        })
+    
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        reservation = self.get_object()
+        try:
+            reservations.cancel(reservation)
+        except CirculationError as e:
+            return Response({'error': str(e)}, status=409)
+        return Response(self.get_serializer(reservation).data)
+    
     @action(detail=False, methods=['get'])
     def active(self, request):
+        # The expiry job closes lapsed reservations only periodically, so filter them out here too
         active_reservations = Reservation.objects.filter(
-            is_active=True,
-            expiry_date__gt=timezone.now()
-        )
+            is_active=True, expiry_date__gt=timezone.now()
+        ).select_related('book', 'member__user')
+        page = self.paginate_queryset(active_reservations)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
         serializer = self.get_serializer(active_reservations, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
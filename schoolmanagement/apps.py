@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class SchoolManagementConfig(AppConfig):
+    name = 'schoolmanagement'
+
+    def ready(self):
+        from .reference_cache import connect_signals
+        connect_signals()
@@ -0,0 +1,44 @@
+"""Helpers for walking large tables in primary-key ranges and bounded IN lists."""
+from django.db import connection
+
+
+def pk_ranges(queryset, chunk_size=1000):
+    """
+    Yield (first_pk, last_pk) bounds covering ``queryset`` in chunks of ``chunk_size``.
+
+    Each step reads only primary keys through the pk index, so callers can run a
+    set-based UPDATE on ``pk__gte=first, pk__lte=last`` plus their own filter. The
+    bounds are computed lazily, so rows changed by a previous chunk drop out.
+    """
+    last = None
+    while True:
+        chunk = queryset.order_by('pk')
+        if last is not None:
+            chunk = chunk.filter(pk__gt=last)
+        pks = list(chunk.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return
+        yield pks[0], pks[-1]
+        last = pks[-1]
+
+
+def batch_size(fields, objs):
+    """Rows per statement for bulk writes of ``fields``, within the backend's parameter limit"""
+    return max(connection.ops.bulk_batch_size(fields, objs), 1)
+
+
+def lookup_in_chunks(queryset, field, values, *columns):
+    """
+    Map each ``values`` entry found in ``field`` to its ``columns``.
+
+    The IN lookup is chunked to the backend's parameter limit. With a single
+    column the mapped value is that column, otherwise a tuple of them.
+    """
+    values = list(values)
+    size = batch_size([field], values)
+    resolved = {}
+    for start in range(0, len(values), size):
+        chunk = queryset.filter(**{f'{field}__in': values[start:start + size]})
+        for key, *row in chunk.values_list(field, *columns):
+            resolved[key] = row[0] if len(row) == 1 else tuple(row)
+    return resolved
@@ -0,0 +1,16 @@
+"""
+Celery application.
+
+Reads every CELERY_* setting (CELERY_BEAT_SCHEDULE among them) from Django settings
+and discovers the tasks.py module of each installed app. Start a worker and the
+beat scheduler with ``celery -A schoolmanagement worker`` and
+``celery -A schoolmanagement beat``.
+"""
+import os
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'schoolmanagement.settings')
+
+app = Celery('schoolmanagement')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,152 @@
+"""
+Keyset (cursor) pagination for high-volume list endpoints.
+
+Page-number pagination runs a COUNT(*) and an OFFSET per page, both of which get
+slower the deeper a client pages. KeysetPagination instead remembers the ordering
+values of the last row on the page and filters past them, so every page costs the
+same index range scan. The ordering must end in a unique column (normally ``id``)
+so rows sharing a date or timestamp are never skipped or repeated.
+
+Viewsets opt in with ``pagination_class = OptInKeysetPagination`` and a
+``keyset_ordering``; clients then opt in per request with ``?pagination=keyset``
+and follow the ``next``/``previous`` links. Everything else keeps page numbers.
+"""
+import base64
+import binascii
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _invert(ordering):
+    return tuple(name[1:] if name.startswith('-') else f'-{name}' for name in ordering)
+
+
+def keyset_filter(ordering, position):
+    """
+    Q selecting rows strictly after ``position`` in ``ordering``.
+
+    For ('-date', '-id') this is ``date <= d AND (date < d OR (date = d AND id < i))``;
+    the leading bound lets the database seek straight into the index.
+    """
+    condition = Q()
+    for index, name in enumerate(ordering):
+        clause = Q(**{f'{name.lstrip("-")}__{"lt" if name.startswith("-") else "gt"}': position[index]})
+        for previous, value in zip(ordering[:index], position[:index]):
+            clause &= Q(**{previous.lstrip('-'): value})
+        condition |= clause
+    first = ordering[0]
+    bound = Q(**{f'{first.lstrip("-")}__{"lte" if first.startswith("-") else "gte"}': position[0]})
+    return bound & condition
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('-id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.fields = [queryset.model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+
+        position, reverse = self.decode_cursor(request)
+        ordering = _invert(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values = payload['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(self.fields, values)]
+            return position, bool(payload.get('r'))
+        except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse=False):
+        # value_to_string keeps full microsecond precision, unlike DjangoJSONEncoder
+        values = [field.value_to_string(instance) for field in self.fields]
+        payload = json.dumps({'p': values, 'r': int(reverse)})
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class OptInKeysetPagination(BasePagination):
+    """
+    Page numbers by default; keyset pages when the request asks for them with
+    ``?pagination=keyset`` (or carries a cursor). A custom ``?ordering=`` keeps page
+    numbers, since the keyset only follows the viewset's ``keyset_ordering``.
+    """
+    mode_query_param = 'pagination'
+
+    def use_keyset(self, request, view):
+        if not getattr(view, 'keyset_ordering', None):
+            return False
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return False
+        return (request.query_params.get(self.mode_query_param) == 'keyset'
+                or KeysetPagination.cursor_query_param in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request, view):
+            self.paginator = KeysetPagination()
+        else:
+            self.paginator = PageNumberPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
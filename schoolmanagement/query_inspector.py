@@ -0,0 +1,198 @@
+"""
+Per-request SQL recording, N+1 detection and query budgets.
+
+QueryInspector wraps the database connections, records every statement with the
+project code (and DRF serializer field, if any) that issued it, and groups repeats
+by normalized SQL. QueryBudgetMiddleware runs one per request; tests can use the
+inspector directly:
+
+    with QueryInspector() as inspector:
+        client.get('/api/students/sections/')
+    inspector.assert_within_budget(10)
+"""
+import logging
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('schoolmanagement.queries')
+
+PROJECT_ROOT = str(Path(settings.BASE_DIR).resolve())
+_THIS_FILE = str(Path(__file__).resolve())
+
+DEFAULTS = {
+    'ENABLED': None,
+    'DEFAULT_BUDGET': 50,
+    'ENDPOINTS': {},
+    'ON_EXCEED': 'warn',
+    'N_PLUS_ONE_THRESHOLD': 5,
+}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_config():
+    config = {**DEFAULTS, **getattr(settings, 'QUERY_BUDGET', {})}
+    if config['ENABLED'] is None:
+        config['ENABLED'] = settings.DEBUG
+    return config
+
+
+def normalize_sql(sql):
+    """Collapse literals, placeholders and IN lists so repeated statements group together"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def _origin():
+    """Innermost project frame and the serializer field being rendered, if any"""
+    origin = None
+    serializer_field = None
+    frame = sys._getframe(2)
+    while frame is not None and (origin is None or serializer_field is None):
+        filename = frame.f_code.co_filename
+        if origin is None and filename.startswith(PROJECT_ROOT) and filename != _THIS_FILE:
+            origin = f'{Path(filename).relative_to(PROJECT_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        if serializer_field is None and frame.f_code.co_name == 'to_representation':
+            field = frame.f_locals.get('field')
+            owner = frame.f_locals.get('self')
+            if field is not None and owner is not None and hasattr(field, 'field_name'):
+                serializer_field = f'{type(owner).__name__}.{field.field_name}'
+        frame = frame.f_back
+    return origin, serializer_field
+
+
+class QueryInspector:
+    def __init__(self, using=None, n_plus_one_threshold=None):
+        self.aliases = [using] if using else list(connections)
+        self.threshold = n_plus_one_threshold or get_config()['N_PLUS_ONE_THRESHOLD']
+        self.queries = []
+        self._wrappers = []
+
+    def __enter__(self):
+        for alias in self.aliases:
+            wrapper = connections[alias].execute_wrapper(self._record)
+            wrapper.__enter__()
+            self._wrappers.append(wrapper)
+        return self
+
+    def __exit__(self, *exc_info):
+        while self._wrappers:
+            self._wrappers.pop().__exit__(*exc_info)
+
+    def _record(self, execute, sql, params, many, context):
+        origin, serializer_field = _origin()
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'normalized': normalize_sql(sql),
+                'duration': time.perf_counter() - start,
+                'origin': origin,
+                'serializer_field': serializer_field,
+            })
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def grouped(self):
+        groups = defaultdict(list)
+        for query in self.queries:
+            groups[query['normalized']].append(query)
+        return groups
+
+    def n_plus_one(self):
+        """Statements repeated at least ``threshold`` times, with where they came from"""
+        suspects = []
+        for normalized, queries in self.grouped().items():
+            if len(queries) < self.threshold:
+                continue
+            suspects.append({
+                'sql': normalized,
+                'count': len(queries),
+                'total_duration': round(sum(query['duration'] for query in queries), 6),
+                'origins': sorted({query['origin'] for query in queries if query['origin']}),
+                'serializer_fields': sorted(
+                    {query['serializer_field'] for query in queries if query['serializer_field']}
+                ),
+            })
+        return sorted(suspects, key=lambda suspect: suspect['count'], reverse=True)
+
+    def report(self, budget=None, endpoint=None):
+        return {
+            'endpoint': endpoint,
+            'query_count': self.count,
+            'budget': budget,
+            'n_plus_one': self.n_plus_one(),
+        }
+
+    def assert_within_budget(self, budget, endpoint=None):
+        if self.count > budget:
+            raise QueryBudgetExceeded(self.describe(budget, endpoint))
+
+    def describe(self, budget=None, endpoint=None):
+        lines = [f'{endpoint or "block"} ran {self.count} queries (budget {budget})']
+        for suspect in self.n_plus_one():
+            fields = ', '.join(suspect['serializer_fields']) or 'no serializer field'
+            origins = ', '.join(suspect['origins']) or 'unknown origin'
+            lines.append(f'  N+1 x{suspect["count"]} [{fields}] from {origins}: {suspect["sql"]}')
+        return '\n'.join(lines)
+
+
+class QueryBudgetMiddleware:
+    """
+    Records the SQL issued by each request and enforces per-endpoint query budgets.
+
+    Budgets come from settings.QUERY_BUDGET['ENDPOINTS'] keyed by URL name, then a
+    ``query_budget`` attribute on the view class, then DEFAULT_BUDGET. ON_EXCEED is
+    'warn' (log) or 'raise' (QueryBudgetExceeded).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+
+        with QueryInspector(n_plus_one_threshold=config['N_PLUS_ONE_THRESHOLD']) as inspector:
+            response = self.get_response(request)
+
+        endpoint, budget = self._budget(request, config)
+        response['X-Query-Count'] = str(inspector.count)
+        suspects = inspector.n_plus_one()
+        if inspector.count > budget or suspects:
+            message = inspector.describe(budget, endpoint)
+            if inspector.count > budget and config['ON_EXCEED'] == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def _budget(self, request, config):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return request.path, config['DEFAULT_BUDGET']
+        endpoint = match.view_name
+        if endpoint in config['ENDPOINTS']:
+            return endpoint, config['ENDPOINTS'][endpoint]
+        view_class = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+        return endpoint, getattr(view_class, 'query_budget', config['DEFAULT_BUDGET'])
@@ -0,0 +1,106 @@
+"""
+Registry of hot query paths and helpers to inspect their SQLite query plans.
+
+Each entry builds the queryset a busy endpoint runs; the query plan tests assert that
+none of them falls back to a full table scan.
+"""
+import re
+import uuid
+from datetime import date
+from django.utils import timezone
+
+HOT_QUERIES = {}
+
+FULL_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)\b(?! USING (?:COVERING |INTEGER PRIMARY KEY )?INDEX)')
+
+
+def hot_query(name):
+    """Register a zero-argument function returning a queryset under ``name``"""
+    def decorator(func):
+        HOT_QUERIES[name] = func
+        return func
+    return decorator
+
+
+def explain_query_plan(queryset):
+    """Return the EXPLAIN QUERY PLAN detail lines for a queryset"""
+    return [line.strip() for line in queryset.explain().splitlines() if line.strip()]
+
+
+def full_table_scans(queryset):
+    """Tables the query plan reads with a full scan instead of an index"""
+    scans = []
+    for line in explain_query_plan(queryset):
+        match = FULL_SCAN.search(line)
+        if match:
+            scans.append(match.group(1))
+    return scans
+
+
+@hot_query('students.attendance_by_date_status')
+def attendance_by_date_status():
+    from students.models import StudentAttendance
+    return StudentAttendance.objects.filter(date=date.today(), status='P')
+
+
+@hot_query('students.attendance_report_range')
+def attendance_report_range():
+    from students.models import AttendanceDailyAggregate
+    return AttendanceDailyAggregate.objects.filter(date__gte=date.today().replace(day=1), date__lte=date.today())
+
+
+@hot_query('teachers.attendance_by_date')
+def teacher_attendance_by_date():
+    from teachers.models import TeacherAttendance
+    return TeacherAttendance.objects.filter(date=date.today(), status='P')
+
+
+@hot_query('academics.results_by_exam_grade')
+def results_by_exam_grade():
+    from academics.models import Result
+    return Result.objects.filter(exam_id=1, grade='A')
+
+
+@hot_query('fees.student_fees_by_status_due')
+def student_fees_by_status_due():
+    from fees.models import StudentFee
+    return StudentFee.objects.filter(
+        school_id=uuid.uuid4(), payment_status='overdue', due_date__lt=date.today()
+    )
+
+
+@hot_query('library.overdue_borrows')
+def overdue_borrows():
+    from library.models import BorrowRecord
+    return BorrowRecord.objects.filter(status='active', due_date__lt=timezone.now())
+
+
+@hot_query('courses.teacher_day_schedule')
+def teacher_day_schedule():
+    from courses.models import Schedule
+    return Schedule.objects.filter(teacher_id=1, day_of_week='MON', is_active=True)
+
+
+@hot_query('courses.current_period')
+def current_period():
+    from courses.models import Schedule
+    from django.db.models import Q
+    return Schedule.objects.filter(
+        Q(day_of_week_num=2, end_time__gt='10:00') | Q(day_of_week_num__gt=2), is_active=True,
+    ).order_by('day_of_week_num', 'start_time')[:2]
+
+
+@hot_query('academics.results_keyset_page')
+def results_keyset_page():
+    from academics.models import Result
+    from .pagination import keyset_filter
+    ordering = ('-created_at', '-id')
+    return Result.objects.filter(keyset_filter(ordering, [timezone.now(), 1])).order_by(*ordering)[:20]
+
+
+@hot_query('students.attendance_keyset_page')
+def attendance_keyset_page():
+    from students.models import StudentAttendance
+    from .pagination import keyset_filter
+    ordering = ('-date', '-id')
+    return StudentAttendance.objects.filter(keyset_filter(ordering, [date.today(), 1])).order_by(*ordering)[:20]
@@ -0,0 +1,164 @@
+"""
+Read-through cache for small, rarely changing lookup tables.
+
+Names of Grade, Section, Subject, ExamType and Department rows are served from a
+process-local LRU with a TTL, backed by a Django cache backend shared between
+processes. On a miss the whole lookup table is loaded in one query, since these
+tables only hold a handful of rows. Saves and deletes invalidate the entry locally
+and in the shared backend; other processes pick the change up once their local
+entry expires.
+
+Configure through settings.REFERENCE_CACHE (CACHE_ALIAS, TIMEOUT, MAX_ENTRIES).
+"""
+import threading
+import time
+from collections import OrderedDict
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_save, post_delete
+from rest_framework import serializers
+
+REFERENCE_MODELS = {
+    'students.Grade': 'name',
+    'students.Section': 'name',
+    'courses.Subject': 'name',
+    'academics.ExamType': 'name',
+    'teachers.Department': 'name',
+}
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+    'MAX_ENTRIES': 2048,
+}
+
+
+class ReferenceCache:
+    def __init__(self, cache_alias='default', timeout=300, max_entries=2048):
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.backend_hits = 0
+        self.evictions = 0
+
+    @property
+    def backend(self):
+        return caches[self.cache_alias] if self.cache_alias else None
+
+    def _key(self, label, pk):
+        return f'reference:{label}:{pk}'
+
+    def _store(self, key, value, now):
+        self._entries[key] = (value, now + self.timeout)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_name(self, label, pk):
+        """Display name of the ``label`` row with primary key ``pk`` (None if missing)"""
+        if pk is None:
+            return None
+        key = self._key(label, pk)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        backend = self.backend
+        name = backend.get(key) if backend is not None else None
+        if name is not None:
+            with self._lock:
+                self.backend_hits += 1
+                self._store(key, name, now)
+            return name
+
+        names = {self._key(label, row_pk): value for row_pk, value in self._load(label)}
+        if backend is not None and names:
+            backend.set_many(names, self.timeout)
+        with self._lock:
+            for row_key, value in names.items():
+                self._store(row_key, value, now)
+        return names.get(key)
+
+    def _load(self, label):
+        model = apps.get_model(label)
+        return model.objects.order_by().values_list('pk', REFERENCE_MODELS[label])
+
+    def invalidate(self, label, pk):
+        key = self._key(label, pk)
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.backend is not None:
+            self.backend.delete(key)
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._entries)
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.delete_many(keys)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'backend_hits': self.backend_hits,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0,
+            }
+
+
+def _build_cache():
+    config = {**DEFAULTS, **getattr(settings, 'REFERENCE_CACHE', {})}
+    return ReferenceCache(
+        cache_alias=config['CACHE_ALIAS'],
+        timeout=config['TIMEOUT'],
+        max_entries=config['MAX_ENTRIES'],
+    )
+
+
+reference_cache = _build_cache()
+
+
+def _invalidate_reference(sender, instance, **kwargs):
+    reference_cache.invalidate(sender._meta.label, instance.pk)
+
+
+def connect_signals():
+    """Invalidate on every save/delete of a reference row; called from SchoolManagementConfig.ready()"""
+    for label in REFERENCE_MODELS:
+        post_save.connect(_invalidate_reference, sender=label, dispatch_uid=f'reference_cache_save_{label}')
+        post_delete.connect(_invalidate_reference, sender=label, dispatch_uid=f'reference_cache_delete_{label}')
+
+
+class ReferenceNameField(serializers.ReadOnlyField):
+    """
+    Read-only name of a reference row, looked up through the reference cache.
+
+    ``source`` points at the foreign key id (e.g. ``'grade_id'`` or ``'exam.subject_id'``)
+    so the related row itself never has to be fetched.
+    """
+
+    def __init__(self, model_label, **kwargs):
+        self.model_label = model_label
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return reference_cache.get_name(self.model_label, value)
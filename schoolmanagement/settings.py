@@ -50,6 +50,8 @@ INSTALLED_APPS = [
     'fees',
     'library',
     'transport',
+    'employee',
+    'schoolmanagement',
     
     
     
@@ -64,8 +66,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    
-    
+    'schoolmanagement.query_inspector.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'schoolmanagement.urls'
@@ -161,4 +162,71 @@ REST_FRAMEWORK = {
     ],
 }
 
-CORS_ALLOW_ALL_ORIGINS = True
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS = True
+
+# Read-through cache for Grade/Section/Subject/ExamType/Department names
+# (see schoolmanagement/reference_cache.py). Point CACHE_ALIAS at a shared
+# backend such as Redis or Memcached in production.
+REFERENCE_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+    'MAX_ENTRIES': 2048,
+}
+# Precompiled weekly timetables for the section/teacher/room schedule views
+# (see courses/timetables.py), rebuilt whenever a Schedule or a name they show
+# changes. Rebuilds reach only the writing process's cache, so other processes
+# see a change once TIMEOUT expires their copy; point CACHE_ALIAS at a shared
+# backend such as Redis or Memcached in production.
+TIMETABLE_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+# Per-request query budgets and N+1 detection
+# (see schoolmanagement/query_inspector.py). Runs whenever DEBUG is on unless
+# ENABLED is set. ENDPOINTS maps URL names to a maximum query count; ON_EXCEED
+# is 'warn' (log) or 'raise'.
+QUERY_BUDGET = {
+    'DEFAULT_BUDGET': 50,
+    'ENDPOINTS': {
+        'exam-list': 10,
+        'exam-results-summary': 10,
+    },
+    'ON_EXCEED': 'warn',
+    'N_PLUS_ONE_THRESHOLD': 5,
+}
+
+# Late fines assessed by the overdue sweepers (fees/overdue.py, library/overdue.py)
+FEES_OVERDUE_FINE = {
+    'FLAT': '0.00',
+    'PERCENT': '0',
+}
+LIBRARY_FINE_PER_DAY = '0.00'
+
+# Library catalogue search (see library/search.py). BACKEND None picks SQLite FTS5
+# on SQLite and the icontains fallback elsewhere; set a dotted path to plug in
+# another backend.
+LIBRARY_SEARCH = {
+    'BACKEND': None,
+    'MAX_RESULTS': 500,
+}
+
+# Periodic jobs for celery beat; schoolmanagement/celery.py loads every CELERY_*
+# setting and autodiscovers the tasks modules named here.
+CELERY_BEAT_SCHEDULE = {
+    'sweep-overdue-student-fees': {
+        'task': 'fees.tasks.sweep_overdue_student_fees',
+        'schedule': 60 * 60,
+    },
+    'sweep-overdue-borrow-records': {
+        'task': 'library.tasks.sweep_overdue_borrow_records',
+        'schedule': 60 * 60,
+    },
+    'expire-library-reservations': {
+        'task': 'library.tasks.expire_library_reservations',
+        'schedule': 60 * 60,
+    },
+    'run-due-task-schedules': {
+        'task': 'employee.tasks.run_due_task_schedules',
+        'schedule': 60,
+    },
+}
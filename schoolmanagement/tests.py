@@ -0,0 +1,119 @@
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+from .query_plans import HOT_QUERIES, explain_query_plan, full_table_scans
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN checks target SQLite')
+class HotQueryPlanTest(TestCase):
+    def test_hot_queries_use_indexes(self):
+        for name, build_queryset in HOT_QUERIES.items():
+            with self.subTest(query=name):
+                queryset = build_queryset()
+                self.assertEqual(
+                    full_table_scans(queryset), [],
+                    f"{name} falls back to a full table scan:\n" + "\n".join(explain_query_plan(queryset))
+                )
+
+    def test_full_scan_detection(self):
+        from students.models import StudentAttendance
+        self.assertEqual(
+            full_table_scans(StudentAttendance.objects.filter(remarks='late bus')),
+            ['students_studentattendance']
+        )
+
+
+class ReferenceCacheTest(TestCase):
+    def setUp(self):
+        from .reference_cache import ReferenceCache
+        self.cache = ReferenceCache(cache_alias=None, timeout=60, max_entries=2)
+
+    def test_read_through_and_invalidation(self):
+        from students.models import Grade
+        first = Grade.objects.create(name='Grade 1', level=1)
+        second = Grade.objects.create(name='Grade 2', level=2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.cache.get_name('students.Grade', first.pk), 'Grade 1')
+            self.assertEqual(self.cache.get_name('students.Grade', second.pk), 'Grade 2')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        self.cache.invalidate('students.Grade', first.pk)
+        Grade.objects.filter(pk=first.pk).update(name='Grade One')
+        self.assertEqual(self.cache.get_name('students.Grade', first.pk), 'Grade One')
+
+    def test_lru_eviction(self):
+        from students.models import Grade
+        grades = [Grade.objects.create(name=f'Grade {level}', level=level) for level in range(1, 4)]
+        self.cache.get_name('students.Grade', grades[0].pk)
+        self.assertEqual(self.cache.stats()['size'], 2)
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_save_signal_invalidates_shared_cache(self):
+        from students.models import Grade
+        from .reference_cache import reference_cache
+        grade = Grade.objects.create(name='Grade 7', level=7)
+        self.assertEqual(reference_cache.get_name('students.Grade', grade.pk), 'Grade 7')
+        grade.name = 'Grade Seven'
+        grade.save()
+        self.assertEqual(reference_cache.get_name('students.Grade', grade.pk), 'Grade Seven')
+
+    def test_receivers_are_connected_at_startup(self):
+        from django.apps import apps
+        from django.db.models.signals import post_save, post_delete
+        from django.dispatch.dispatcher import _make_id
+        from .reference_cache import REFERENCE_MODELS
+        for label in REFERENCE_MODELS:
+            sender = _make_id(apps.get_model(label))
+            self.assertIn((f'reference_cache_save_{label}', sender), {key for key, *_ in post_save.receivers})
+            self.assertIn((f'reference_cache_delete_{label}', sender), {key for key, *_ in post_delete.receivers})
+
+
+class QueryInspectorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+        from students.models import Grade
+        cls.user = User.objects.create_user(username='admin', password='pass')
+        for level in range(1, 7):
+            Grade.objects.create(name=f'Grade {level}', level=level)
+
+    def test_normalize_sql_groups_repeated_statements(self):
+        from .query_inspector import normalize_sql
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'  AND level > 3"),
+            normalize_sql('SELECT * FROM t WHERE id IN (%s) AND name = %s AND level > %s'),
+        )
+
+    def test_n_plus_one_is_attributed_to_serializer_field(self):
+        from students.models import Grade
+        from students.serializers import GradeSerializer
+        from .query_inspector import QueryInspector, QueryBudgetExceeded
+
+        with QueryInspector() as inspector:
+            GradeSerializer(Grade.objects.all(), many=True).data
+
+        self.assertEqual(inspector.count, 7)
+        [suspect] = inspector.n_plus_one()
+        self.assertEqual(suspect['count'], 6)
+        self.assertEqual(suspect['serializer_fields'], ['GradeSerializer.sections_count'])
+        self.assertTrue(suspect['origins'][0].startswith('students/serializers.py'))
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'GradeSerializer.sections_count'):
+            inspector.assert_within_budget(3)
+
+    def test_middleware_enforces_endpoint_budget(self):
+        from django.test import override_settings
+        from rest_framework.test import APIClient
+        from .query_inspector import QueryBudgetExceeded
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        config = {'ENABLED': True, 'ENDPOINTS': {'grade-list': 3}, 'ON_EXCEED': 'raise'}
+        with override_settings(QUERY_BUDGET=config):
+            with self.assertRaises(QueryBudgetExceeded):
+                client.get('/api/students/grades/')
+        with override_settings(QUERY_BUDGET={**config, 'ON_EXCEED': 'warn'}):
+            with self.assertLogs('schoolmanagement.queries', 'WARNING') as logs:
+                response = client.get('/api/students/grades/')
+        self.assertEqual(response['X-Query-Count'], '8')
+        self.assertIn('grade-list ran 8 queries (budget 3)', logs.output[0])
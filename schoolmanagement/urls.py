@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from .views import reference_cache_stats
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -10,6 +11,8 @@ urlpatterns = [
     path('api/courses/', include('courses.urls')),
     path('api/academics/', include('academics.urls')),
     path('api/library/', include('library.urls')),
+    path('api/employee/', include('employee.urls')),
+    path('api/reference-cache/stats/', reference_cache_stats, name='reference_cache_stats'),
 
 ]
 
@@ -0,0 +1,10 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from .reference_cache import reference_cache
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def reference_cache_stats(request):
+    return Response(reference_cache.stats())
@@ -4,7 +4,8 @@ from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import Grade, Section, Student, StudentAttendance
+from .models import Grade, Section, Student, StudentAttendance, AttendanceDailyAggregate
+from .attendance import with_attendance_summary, set_attendance_status
 
 
 @admin.register(Grade)
@@ -114,21 +115,24 @@ class StudentAdmin(admin.ModelAdmin):
         return "No image"
     profile_picture_preview.short_description = 'Profile Picture Preview'
     
+    def get_queryset(self, request):
+        return with_attendance_summary(
+            super().get_queryset(request).select_related('user', 'grade', 'section')
+        )
+    
     def attendance_summary(self, obj):
-        total_days = obj.attendances.count()
+        total_days = obj.total_days
         if total_days == 0:
             return "No records"
         
-        present_days = obj.attendances.filter(status='P').count()
-        late_days = obj.attendances.filter(status='L').count()
-        
-        attendance_rate = ((present_days + late_days) / total_days) * 100
+        attended_days = obj.present_days + obj.late_days
+        attendance_rate = (attended_days / total_days) * 100
         
         color = 'green' if attendance_rate >= 90 else 'orange' if attendance_rate >= 75 else 'red'
         
         return format_html(
-            '<span style="color: {}; font-weight: bold;">{:.1f}%</span> ({}/{})',
-            color, attendance_rate, present_days + late_days, total_days
+            '<span style="color: {}; font-weight: bold;">{}%</span> ({}/{})',
+            color, f'{attendance_rate:.1f}', attended_days, total_days
         )
     attendance_summary.short_description = 'Attendance'
     
@@ -192,26 +196,39 @@ class StudentAttendanceAdmin(admin.ModelAdmin):
     actions = ['mark_present', 'mark_absent', 'mark_late', 'mark_excused']
     
     def mark_present(self, request, queryset):
-        updated = queryset.update(status='P')
+        updated = set_attendance_status(queryset, 'P')
         self.message_user(request, f'{updated} attendance record(s) marked as Present.')
     mark_present.short_description = "Mark selected records as Present"
     
     def mark_absent(self, request, queryset):
-        updated = queryset.update(status='A')
+        updated = set_attendance_status(queryset, 'A')
         self.message_user(request, f'{updated} attendance record(s) marked as Absent.')
     mark_absent.short_description = "Mark selected records as Absent"
     
     def mark_late(self, request, queryset):
-        updated = queryset.update(status='L')
+        updated = set_attendance_status(queryset, 'L')
         self.message_user(request, f'{updated} attendance record(s) marked as Late.')
     mark_late.short_description = "Mark selected records as Late"
     
     def mark_excused(self, request, queryset):
-        updated = queryset.update(status='E')
+        updated = set_attendance_status(queryset, 'E')
         self.message_user(request, f'{updated} attendance record(s) marked as Excused.')
     mark_excused.short_description = "Mark selected records as Excused"
 
 
+@admin.register(AttendanceDailyAggregate)
+class AttendanceDailyAggregateAdmin(admin.ModelAdmin):
+    list_display = ['date', 'grade', 'section', 'status', 'count']
+    list_filter = ['status', 'grade', 'section']
+    date_hierarchy = 'date'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # Customize the admin site header and title
 admin.site.site_header = "Student Management System"
 admin.site.site_title = "SMS Admin"
@@ -0,0 +1,219 @@
+from datetime import datetime
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from schoolmanagement.batching import batch_size, lookup_in_chunks
+from .models import Student, StudentAttendance, AttendanceDailyAggregate
+
+STATUS_FIELDS = {
+    'present_days': 'P',
+    'late_days': 'L',
+    'absent_days': 'A',
+    'excused_days': 'E',
+}
+
+
+def parse_date_range(query_params):
+    """
+    Read optional start_date/end_date (YYYY-MM-DD) from request query params.
+
+    Raises ValueError naming the parameter when a date is malformed or the range is reversed.
+    """
+    dates = []
+    for key in ('start_date', 'end_date'):
+        value = query_params.get(key)
+        try:
+            dates.append(datetime.strptime(value, '%Y-%m-%d').date() if value else None)
+        except ValueError:
+            raise ValueError(f'{key} must be a date in YYYY-MM-DD format')
+    if dates[0] and dates[1] and dates[0] > dates[1]:
+        raise ValueError('start_date must not be after end_date')
+    return tuple(dates)
+
+
+def attendance_counts(prefix='attendances__', start_date=None, end_date=None):
+    """
+    Build total/present/late/absent/excused Count expressions over attendance rows.
+
+    With the default prefix the expressions annotate a Student queryset; pass an
+    empty prefix to aggregate a StudentAttendance queryset directly.
+    """
+    date_filter = Q()
+    if start_date:
+        date_filter &= Q(**{f'{prefix}date__gte': start_date})
+    if end_date:
+        date_filter &= Q(**{f'{prefix}date__lte': end_date})
+
+    counts = {'total_days': Count(f'{prefix}id', filter=date_filter)}
+    for field, code in STATUS_FIELDS.items():
+        counts[field] = Count(f'{prefix}id', filter=date_filter & Q(**{f'{prefix}status': code}))
+    return counts
+
+
+def with_attendance_summary(queryset, start_date=None, end_date=None):
+    """Annotate a Student queryset with attendance counts in one grouped query"""
+    return queryset.annotate(**attendance_counts(start_date=start_date, end_date=end_date))
+
+
+def student_attendance_summary(student, start_date=None, end_date=None):
+    """Attendance counts for a single student as a dict"""
+    return StudentAttendance.objects.filter(student=student).aggregate(
+        **attendance_counts(prefix='', start_date=start_date, end_date=end_date)
+    )
+
+
+def attendance_percentage(present_days, total_days):
+    return round((present_days / total_days * 100) if total_days > 0 else 0, 2)
+
+
+def summary_row(student, counts=None):
+    """Serialize an annotated student (or a counts dict) into the summary payload"""
+    if counts is None:
+        counts = {field: getattr(student, field) for field in ['total_days', *STATUS_FIELDS]}
+    return {
+        'student_id': student.student_id,
+        'student_name': student.user.get_full_name(),
+        **counts,
+        'attendance_percentage': attendance_percentage(counts['present_days'], counts['total_days']),
+    }
+
+
+def ingest_attendance(attendance_date, rows, recorded_by=None):
+    """
+    Upsert a day's attendance rows in bulk.
+
+    Every row is reported back: accepted rows carry the resolved student, rejected
+    rows carry the reason (unknown student_id, invalid status, duplicate row).
+    Returns (attendance objects, accepted, rejected).
+    """
+    valid_statuses = {code for code, _ in StudentAttendance.STATUS_CHOICES}
+    # student_id -> (pk, section_id)
+    student_map = lookup_in_chunks(
+        Student.objects.all(), 'student_id', {row.get('student_id') for row in rows if row.get('student_id')},
+        'id', 'section_id',
+    )
+
+    attendances = []
+    accepted, rejected = [], []
+    seen = set()
+    for index, row in enumerate(rows):
+        student_id = row.get('student_id')
+        status = row.get('status')
+        if not student_id:
+            error = 'student_id is required'
+        elif student_id not in student_map:
+            error = 'Student not found'
+        elif status not in valid_statuses:
+            error = f'Invalid status "{status}"'
+        elif student_id in seen:
+            error = 'Duplicate student_id in request'
+        else:
+            error = None
+
+        if error:
+            rejected.append({'row': index, 'student_id': student_id, 'error': error})
+            continue
+
+        seen.add(student_id)
+        attendances.append(StudentAttendance(
+            student_id=student_map[student_id][0],
+            date=attendance_date,
+            status=status,
+            remarks=row.get('remarks', ''),
+            recorded_by=recorded_by,
+        ))
+        accepted.append({'row': index, 'student_id': student_id, 'status': status})
+
+    if attendances:
+        fields = ['student_id', 'date', 'status', 'remarks', 'recorded_by_id', 'created_at']
+        with transaction.atomic():
+            StudentAttendance.objects.bulk_create(
+                attendances,
+                batch_size=batch_size(fields, attendances),
+                update_conflicts=True,
+                unique_fields=['student', 'date'],
+                update_fields=['status', 'remarks', 'recorded_by'],
+            )
+            refresh_attendance_aggregates(
+                {(attendance_date, student_map[row['student_id']][1]) for row in accepted}
+            )
+
+    return attendances, accepted, rejected
+
+
+def refresh_attendance_aggregates(keys):
+    """
+    Recompute the AttendanceDailyAggregate buckets for the given (date, section_id) keys.
+
+    Only the touched date x section slices are recounted, so the cost follows the size
+    of the write rather than the size of the attendance table.
+    """
+    keys = {key for key in keys if key and key[1] is not None}
+    if not keys:
+        return
+
+    rows = StudentAttendance.objects.filter(
+        date__in={attendance_date for attendance_date, _ in keys},
+        student__section_id__in={section_id for _, section_id in keys},
+    ).values('date', 'student__section__grade_id', 'student__section_id', 'status').annotate(
+        count=Count('id')
+    ).order_by()
+
+    buckets = [
+        AttendanceDailyAggregate(
+            date=row['date'],
+            grade_id=row['student__section__grade_id'],
+            section_id=row['student__section_id'],
+            status=row['status'],
+            count=row['count'],
+        )
+        for row in rows
+        if (row['date'], row['student__section_id']) in keys
+    ]
+
+    stale = Q()
+    for attendance_date, section_id in keys:
+        stale |= Q(date=attendance_date, section_id=section_id)
+
+    with transaction.atomic():
+        AttendanceDailyAggregate.objects.filter(stale).delete()
+        AttendanceDailyAggregate.objects.bulk_create(
+            buckets,
+            update_conflicts=True,
+            unique_fields=['date', 'section', 'status'],
+            update_fields=['grade', 'count'],
+        )
+
+
+def rebuild_attendance_aggregates(batch_days=31):
+    """Rebuild the whole aggregate table from StudentAttendance, a date window at a time"""
+    AttendanceDailyAggregate.objects.all().delete()
+    dates = sorted(StudentAttendance.objects.values_list('date', flat=True).distinct())
+    for start in range(0, len(dates), batch_days):
+        window = dates[start:start + batch_days]
+        keys = StudentAttendance.objects.filter(date__in=window).values_list(
+            'date', 'student__section_id'
+        ).distinct()
+        refresh_attendance_aggregates(set(keys))
+    return len(dates)
+
+
+def set_attendance_status(queryset, status):
+    """queryset.update(status=...) that keeps the aggregate table in sync"""
+    keys = set(queryset.values_list('date', 'student__section_id').distinct())
+    with transaction.atomic():
+        updated = queryset.update(status=status)
+        refresh_attendance_aggregates(keys)
+    return updated
+
+
+def attendance_report(start_date, end_date=None):
+    """Total and per-status counts for a date (or inclusive date range) from the aggregate table"""
+    buckets = AttendanceDailyAggregate.objects.filter(date__gte=start_date, date__lte=end_date or start_date)
+    totals = dict(buckets.values_list('status').annotate(total=Sum('count')).order_by())
+    return {
+        'total_records': sum(totals.values()),
+        'present': totals.get('P', 0),
+        'absent': totals.get('A', 0),
+        'late': totals.get('L', 0),
+        'excused': totals.get('E', 0),
+    }
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from students.attendance import rebuild_attendance_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the AttendanceDailyAggregate table from StudentAttendance'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-days', type=int, default=31,
+                            help='Number of distinct dates recounted per batch')
+
+    def handle(self, *args, **options):
+        days = rebuild_attendance_aggregates(batch_days=options['batch_days'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt attendance aggregates for {days} day(s)'))
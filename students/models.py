@@ -83,6 +83,28 @@ class StudentAttendance(models.Model):
 
     class Meta:
         unique_together = ['student', 'date']
+        indexes = [
+            models.Index(fields=['date', 'status'], name='student_att_date_status_idx'),
+            models.Index(fields=['-date', '-id'], name='student_att_keyset_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.student} - {self.date} - {self.get_status_display()}"
\ No newline at end of file
+        return f"{self.student} - {self.date} - {self.get_status_display()}"
+
+class AttendanceDailyAggregate(models.Model):
+    """Pre-aggregated attendance counts per date x section x status, kept in sync on write"""
+    date = models.DateField()
+    grade = models.ForeignKey(Grade, on_delete=models.CASCADE, related_name='attendance_aggregates')
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name='attendance_aggregates')
+    status = models.CharField(max_length=1, choices=StudentAttendance.STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['date', 'section', 'status']
+        indexes = [
+            models.Index(fields=['date', 'status']),
+            models.Index(fields=['grade', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.section} - {self.get_status_display()}: {self.count}"
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from schoolmanagement.reference_cache import ReferenceNameField
 from .models import Grade, Section, Student, StudentAttendance
+from .attendance import ingest_attendance
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -18,7 +20,7 @@ class GradeSerializer(serializers.ModelSerializer):
         return obj.sections.count()
 
 class SectionSerializer(serializers.ModelSerializer):
-    grade_name = serializers.CharField(source='grade.name', read_only=True)
+    grade_name = ReferenceNameField('students.Grade', source='grade_id')
     students_count = serializers.SerializerMethodField()
 
     class Meta:
@@ -30,8 +32,8 @@ class SectionSerializer(serializers.ModelSerializer):
 
 class StudentSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
-    grade_name = serializers.CharField(source='grade.name', read_only=True)
-    section_name = serializers.CharField(source='section.name', read_only=True)
+    grade_name = ReferenceNameField('students.Grade', source='grade_id')
+    section_name = ReferenceNameField('students.Section', source='section_id')
     full_name = serializers.CharField(source='user.get_full_name', read_only=True)
     age = serializers.SerializerMethodField()
 
@@ -83,34 +85,10 @@ class BulkAttendanceSerializer(serializers.Serializer):
     )
 
     def create(self, validated_data):
-        date = validated_data['date']
-        attendances_data = validated_data['attendances']
         user = self.context['request'].user
-        
-        attendance_objects = []
-        for attendance_data in attendances_data:
-            student_id = attendance_data['student_id']
-            status = attendance_data['status']
-            remarks = attendance_data.get('remarks', '')
-            
-            try:
-                student = Student.objects.get(student_id=student_id)
-                attendance, created = StudentAttendance.objects.get_or_create(
-                    student=student,
-                    date=date,
-                    defaults={
-                        'status': status,
-                        'remarks': remarks,
-                        'recorded_by': user
-                    }
-                )
-                if not created:
-                    attendance.status = status
-                    attendance.remarks = remarks
-                    attendance.recorded_by = user
-                    attendance.save()
-                attendance_objects.append(attendance)
-            except Student.DoesNotExist:
-                continue
-        
-        return attendance_objects
\ No newline at end of file
+        attendances, self.accepted, self.rejected = ingest_attendance(
+            validated_data['date'],
+            validated_data['attendances'],
+            recorded_by=user if user.is_authenticated else None
+        )
+        return attendances
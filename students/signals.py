@@ -0,0 +1,75 @@
+import threading
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from schoolmanagement.batching import lookup_in_chunks
+from .models import Student, StudentAttendance
+from .attendance import refresh_attendance_aggregates
+
+# Attendance rows removed by one delete() call, keyed by its origin, so the
+# buckets are recounted once per call rather than once per cascaded row
+_deletes = threading.local()
+
+
+@receiver(pre_save, sender=StudentAttendance)
+def remember_previous_bucket(sender, instance, **kwargs):
+    instance._previous_bucket = None
+    if instance.pk:
+        instance._previous_bucket = StudentAttendance.objects.filter(pk=instance.pk).values_list(
+            'date', 'student__section_id'
+        ).first()
+
+
+@receiver(post_save, sender=StudentAttendance)
+def refresh_aggregate_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    keys = {(instance.date, instance.student.section_id)}
+    if getattr(instance, '_previous_bucket', None):
+        keys.add(instance._previous_bucket)
+    refresh_attendance_aggregates(keys)
+
+
+@receiver(pre_delete, sender=StudentAttendance)
+def count_pending_delete(sender, instance, origin=None, **kwargs):
+    # The collector sends pre_delete for every row before it deletes any of them
+    pending = vars(_deletes).setdefault('pending', {})
+    entry = pending.setdefault(id(origin), {'origin': origin, 'remaining': 0, 'rows': set()})
+    entry['remaining'] += 1
+
+
+@receiver(post_delete, sender=StudentAttendance)
+def refresh_aggregate_on_delete(sender, instance, origin=None, **kwargs):
+    pending = vars(_deletes).setdefault('pending', {})
+    entry = pending.get(id(origin)) or {'remaining': 1, 'rows': set()}
+    entry['rows'].add((instance.date, instance.student_id))
+    entry['remaining'] -= 1
+    if entry['remaining'] > 0:
+        return
+    pending.pop(id(origin), None)
+    # Dependents are deleted before their parents, so the students are still there
+    student_ids = {student_id for _, student_id in entry['rows']}
+    sections = lookup_in_chunks(Student.objects.all(), 'id', student_ids, 'section_id')
+    refresh_attendance_aggregates({
+        (attendance_date, sections.get(student_id)) for attendance_date, student_id in entry['rows']
+    })
+
+
+@receiver(pre_save, sender=Student)
+def remember_previous_section(sender, instance, **kwargs):
+    instance._previous_section_id = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_section_id = Student.objects.filter(pk=instance.pk).values_list(
+            'section_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Student)
+def move_aggregates_with_section(sender, instance, raw=False, **kwargs):
+    """A student changing section moves their attendance rows out of the old buckets and into the new ones"""
+    previous = getattr(instance, '_previous_section_id', None)
+    if raw or previous is None or previous == instance.section_id:
+        return
+    dates = StudentAttendance.objects.filter(student=instance).values_list('date', flat=True).distinct()
+    refresh_attendance_aggregates({
+        (attendance_date, section_id) for attendance_date in dates for section_id in (previous, instance.section_id)
+    })
@@ -1,3 +1,208 @@
+from datetime import date
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from .attendance import attendance_report, ingest_attendance, set_attendance_status
+from .models import Grade, Section, Student, StudentAttendance, AttendanceDailyAggregate
 
-# Create your tests here.
+
+class AttendanceFixtureMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='teacher', password='pass')
+        cls.grade = Grade.objects.create(name='Grade 5', level=5)
+        cls.section = Section.objects.create(name='A', grade=cls.grade)
+        cls.other_section = Section.objects.create(name='B', grade=cls.grade)
+        cls.students = [cls.create_student(i) for i in range(3)]
+
+    @classmethod
+    def create_student(cls, index, section=None):
+        user = User.objects.create_user(username=f'student{index}', first_name='Student', last_name=str(index))
+        return Student.objects.create(
+            user=user, student_id=f'S{index}', grade=cls.grade, section=section or cls.section,
+            roll_number=str(index), admission_number=f'ADM{index}', admission_date=date(2024, 4, 1),
+            date_of_birth=date(2014, 1, 1), gender='F', phone_number='9800000000', address='Street',
+            emergency_contact='9800000000', parent_name='Parent', parent_email='parent@example.com',
+            parent_phone='9800000000',
+        )
+
+    @classmethod
+    def mark(cls, student, day, status='P'):
+        return StudentAttendance.objects.create(student=student, date=day, status=status)
+
+
+class AttendanceSummaryRangeTest(AttendanceFixtureMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        student = cls.students[0]
+        cls.mark(student, date(2026, 9, 1), 'P')
+        cls.mark(student, date(2026, 9, 2), 'A')
+        cls.mark(student, date(2026, 9, 3), 'L')
+        cls.mark(student, date(2026, 10, 1), 'P')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_student_summary_counts_only_the_requested_range(self):
+        response = self.client.get(
+            f'/api/students/{self.students[0].pk}/attendance_summary/',
+            {'start_date': '2026-09-01', 'end_date': '2026-09-02'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_days'], 2)
+        self.assertEqual(response.data['present_days'], 1)
+        self.assertEqual(response.data['absent_days'], 1)
+        self.assertEqual(response.data['attendance_percentage'], 50.0)
+        self.assertNotIn('current_month', response.data)
+
+    def test_student_summary_defaults_to_the_current_month(self):
+        response = self.client.get(f'/api/students/{self.students[0].pk}/attendance_summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['start_date'], date.today().replace(day=1))
+        self.assertEqual(response.data['current_month'], date.today().strftime('%B %Y'))
+
+    def test_section_summary_annotates_every_student(self):
+        response = self.client.get(
+            f'/api/students/sections/{self.section.pk}/attendance_summary/', {'start_date': '2026-09-02'}
+        )
+        self.assertEqual(response.status_code, 200)
+        rows = {row['student_id']: row for row in response.data}
+        self.assertEqual(set(rows), {'S0', 'S1', 'S2'})
+        self.assertEqual(rows['S0']['total_days'], 3)
+        self.assertEqual(rows['S0']['late_days'], 1)
+        self.assertEqual(rows['S1']['total_days'], 0)
+
+    def test_malformed_or_reversed_range_is_rejected(self):
+        url = f'/api/students/{self.students[0].pk}/attendance_summary/'
+        for params in ({'start_date': '2026-13-01'}, {'end_date': 'yesterday'},
+                       {'start_date': '2026-09-03', 'end_date': '2026-09-01'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+        response = self.client.get(
+            f'/api/students/sections/{self.section.pk}/attendance_summary/', {'start_date': 'x'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class IngestAttendanceTest(AttendanceFixtureMixin, TestCase):
+    day = date(2026, 9, 1)
+
+    def test_rows_are_upserted_and_bad_rows_reported(self):
+        self.mark(self.students[0], self.day, 'A')
+        attendances, accepted, rejected = ingest_attendance(self.day, [
+            {'student_id': 'S0', 'status': 'P', 'remarks': 'Arrived'},
+            {'student_id': 'S1', 'status': 'L'},
+            {'student_id': 'S1', 'status': 'P'},
+            {'student_id': 'S9', 'status': 'P'},
+            {'student_id': 'S2', 'status': 'X'},
+            {'status': 'P'},
+        ], recorded_by=self.user)
+
+        self.assertEqual([row['student_id'] for row in accepted], ['S0', 'S1'])
+        self.assertEqual({row['row']: row['error'] for row in rejected}, {
+            2: 'Duplicate student_id in request',
+            3: 'Student not found',
+            4: 'Invalid status "X"',
+            5: 'student_id is required',
+        })
+        self.assertEqual(len(attendances), 2)
+        rows = dict(StudentAttendance.objects.filter(date=self.day).values_list('student__student_id', 'status'))
+        self.assertEqual(rows, {'S0': 'P', 'S1': 'L'})
+        self.assertEqual(StudentAttendance.objects.get(student=self.students[0], date=self.day).remarks, 'Arrived')
+
+    def test_reingest_updates_the_aggregate_buckets(self):
+        ingest_attendance(self.day, [{'student_id': 'S0', 'status': 'P'}, {'student_id': 'S1', 'status': 'P'}])
+        ingest_attendance(self.day, [{'student_id': 'S1', 'status': 'A'}])
+        buckets = dict(AttendanceDailyAggregate.objects.filter(date=self.day).values_list('status', 'count'))
+        self.assertEqual(buckets, {'P': 1, 'A': 1})
+
+
+class AttendanceAggregateTest(AttendanceFixtureMixin, TestCase):
+    day = date(2026, 9, 1)
+
+    def buckets(self, section=None):
+        return dict(
+            AttendanceDailyAggregate.objects.filter(date=self.day, section=section or self.section)
+            .values_list('status', 'count')
+        )
+
+    def assertBucketsMatchRecount(self):
+        recount = {}
+        for key in StudentAttendance.objects.values_list('date', 'student__section_id', 'status'):
+            recount[key] = recount.get(key, 0) + 1
+        stored = {
+            (day, section_id, status): count
+            for day, section_id, status, count in AttendanceDailyAggregate.objects.values_list(
+                'date', 'section_id', 'status', 'count'
+            )
+        }
+        self.assertEqual(stored, recount)
+
+    def test_save_and_status_update_keep_buckets_in_sync(self):
+        first = self.mark(self.students[0], self.day, 'P')
+        self.mark(self.students[1], self.day, 'P')
+        first.status = 'A'
+        first.save()
+        self.assertEqual(self.buckets(), {'P': 1, 'A': 1})
+
+        set_attendance_status(StudentAttendance.objects.filter(date=self.day), 'L')
+        self.assertEqual(self.buckets(), {'L': 2})
+        self.assertEqual(attendance_report(self.day)['late'], 2)
+
+    def test_section_change_moves_rows_between_buckets(self):
+        self.mark(self.students[0], self.day, 'P')
+        self.mark(self.students[1], self.day, 'P')
+        student = self.students[0]
+        student.section = self.other_section
+        student.save()
+        self.assertEqual(self.buckets(), {'P': 1})
+        self.assertEqual(self.buckets(self.other_section), {'P': 1})
+        self.assertBucketsMatchRecount()
+
+    def test_cascade_delete_recounts_once(self):
+        for student in self.students:
+            for day in range(1, 11):
+                self.mark(student, date(2026, 9, day), 'P')
+        with CaptureQueriesContext(connection) as bulk:
+            self.students[0].delete()
+        self.assertBucketsMatchRecount()
+        with CaptureQueriesContext(connection) as single:
+            StudentAttendance.objects.filter(student=self.students[1], date=self.day).delete()
+        self.assertBucketsMatchRecount()
+        # Ten deleted rows cost no more than one: a section lookup and one recount
+        self.assertLessEqual(len(bulk) - len(single), 3)
+
+    def test_queryset_delete_recounts_every_touched_bucket(self):
+        self.mark(self.students[0], self.day, 'P')
+        self.mark(self.students[1], self.day, 'A')
+        self.mark(self.students[2], date(2026, 9, 2), 'P')
+        StudentAttendance.objects.filter(status='P').delete()
+        self.assertEqual(self.buckets(), {'A': 1})
+        self.assertBucketsMatchRecount()
+
+
+class AttendanceReportApiTest(AttendanceFixtureMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_monthly_report_reads_the_aggregates(self):
+        self.mark(self.students[0], date(2026, 9, 1), 'P')
+        self.mark(self.students[1], date(2026, 9, 30), 'A')
+        self.mark(self.students[2], date(2026, 10, 1), 'P')
+        response = self.client.get('/api/students/attendance/monthly_report/', {'month': 9, 'year': 2026})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_records'], 2)
+        self.assertEqual(response.data['absent'], 1)
+
+    def test_invalid_month_or_date_is_rejected(self):
+        for params in ({'month': 13, 'year': 2026}, {'month': 'sept', 'year': 2026}, {'year': ''}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/students/attendance/monthly_report/', params)
+                self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/students/attendance/daily_report/', {'date': '01/09/2026'})
+        self.assertEqual(response.status_code, 400)
@@ -3,8 +3,14 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Count, Q
+import calendar
 from datetime import date, timedelta
+from schoolmanagement.pagination import OptInKeysetPagination
 from .models import Grade, Section, Student, StudentAttendance
+from .attendance import (
+    parse_date_range, with_attendance_summary, student_attendance_summary, summary_row,
+    attendance_report
+)
 from .serializers import (
     GradeSerializer, SectionSerializer, StudentSerializer, 
     StudentCreateSerializer, StudentAttendanceSerializer, BulkAttendanceSerializer
@@ -57,21 +63,17 @@ class SectionViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def attendance_summary(self, request, pk=None):
         section = self.get_object()
-        students = Student.objects.filter(section=section, is_active=True)
+        try:
+            start_date, end_date = parse_date_range(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        students = with_attendance_summary(
+            Student.objects.filter(section=section, is_active=True).select_related('user'),
+            start_date=start_date,
+            end_date=end_date
+        )
         
-        summary = []
-        for student in students:
-            total_days = StudentAttendance.objects.filter(student=student).count()
-            present_days = StudentAttendance.objects.filter(student=student, status='P').count()
-            attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
-            
-            summary.append({
-                'student_id': student.student_id,
-                'student_name': student.user.get_full_name(),
-                'total_days': total_days,
-                'present_days': present_days,
-                'attendance_percentage': round(attendance_percentage, 2)
-            })
+        summary = [summary_row(student) for student in students]
         
         return Response(summary)
 
@@ -98,45 +100,25 @@ class StudentViewSet(viewsets.ModelViewSet):
     def attendance_summary(self, request, pk=None):
         student = self.get_object()
         
-        # Current month
-        today = date.today()
-        first_day = today.replace(day=1)
-        
-        total_days = StudentAttendance.objects.filter(
-            student=student, 
-            date__gte=first_day
-        ).count()
-        
-        present_days = StudentAttendance.objects.filter(
-            student=student, 
-            date__gte=first_day, 
-            status='P'
-        ).count()
-        
-        late_days = StudentAttendance.objects.filter(
-            student=student, 
-            date__gte=first_day, 
-            status='L'
-        ).count()
-        
-        absent_days = StudentAttendance.objects.filter(
-            student=student, 
-            date__gte=first_day, 
-            status='A'
-        ).count()
+        # Current month unless an explicit range is requested
+        try:
+            start_date, end_date = parse_date_range(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        current_month = start_date is None and end_date is None
+        if current_month:
+            start_date = date.today().replace(day=1)
         
-        attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
+        counts = student_attendance_summary(student, start_date=start_date, end_date=end_date)
         
-        return Response({
-            'student_id': student.student_id,
-            'student_name': student.user.get_full_name(),
-            'current_month': today.strftime('%B %Y'),
-            'total_days': total_days,
-            'present_days': present_days,
-            'late_days': late_days,
-            'absent_days': absent_days,
-            'attendance_percentage': round(attendance_percentage, 2)
-        })
+        summary = {
+            **summary_row(student, counts),
+            'start_date': start_date,
+            'end_date': end_date,
+        }
+        if current_month:
+            summary['current_month'] = start_date.strftime('%B %Y')
+        return Response(summary)
 
     @action(detail=True, methods=['post'])
     def deactivate(self, request, pk=None):
@@ -200,6 +182,8 @@ class StudentAttendanceViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['student', 'date', 'status', 'student__grade', 'student__section']
     ordering = ['-date', 'student__roll_number']
+    pagination_class = OptInKeysetPagination
+    keyset_ordering = ('-date', '-id')
 
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
@@ -208,7 +192,9 @@ class StudentAttendanceViewSet(viewsets.ModelViewSet):
             attendances = serializer.save()
             return Response({
                 'message': f'Successfully recorded attendance for {len(attendances)} students',
-                'count': len(attendances)
+                'count': len(attendances),
+                'accepted': serializer.accepted,
+                'rejected': serializer.rejected
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -217,17 +203,14 @@ class StudentAttendanceViewSet(viewsets.ModelViewSet):
         report_date = request.query_params.get('date', date.today())
         if isinstance(report_date, str):
             from datetime import datetime
-            report_date = datetime.strptime(report_date, '%Y-%m-%d').date()
-        
-        attendances = StudentAttendance.objects.filter(date=report_date)
+            try:
+                report_date = datetime.strptime(report_date, '%Y-%m-%d').date()
+            except ValueError:
+                return Response({'error': 'date must be in YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
         
         summary = {
             'date': report_date,
-            'total_records': attendances.count(),
-            'present': attendances.filter(status='P').count(),
-            'absent': attendances.filter(status='A').count(),
-            'late': attendances.filter(status='L').count(),
-            'excused': attendances.filter(status='E').count(),
+            **attendance_report(report_date),
         }
         
         return Response(summary)
@@ -237,19 +220,16 @@ class StudentAttendanceViewSet(viewsets.ModelViewSet):
         month = request.query_params.get('month', date.today().month)
         year = request.query_params.get('year', date.today().year)
         
-        attendances = StudentAttendance.objects.filter(
-            date__month=month,
-            date__year=year
-        )
+        try:
+            first_day = date(int(year), int(month), 1)
+        except (TypeError, ValueError):
+            return Response({'error': 'month and year must form a valid month'}, status=status.HTTP_400_BAD_REQUEST)
+        last_day = first_day.replace(day=calendar.monthrange(first_day.year, first_day.month)[1])
         
         summary = {
             'month': month,
             'year': year,
-            'total_records': attendances.count(),
-            'present': attendances.filter(status='P').count(),
-            'absent': attendances.filter(status='A').count(),
-            'late': attendances.filter(status='L').count(),
-            'excused': attendances.filter(status='E').count(),
+            **attendance_report(first_day, last_day),
         }
         
         return Response(summary)
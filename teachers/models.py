@@ -71,6 +71,10 @@ class TeacherAttendance(models.Model):
 
     class Meta:
         unique_together = ['teacher', 'date']
+        indexes = [
+            models.Index(fields=['date', 'status'], name='teacher_att_date_status_idx'),
+            models.Index(fields=['-date', '-id'], name='teacher_att_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.teacher} - {self.date} - {self.get_status_display()}"
\ No newline at end of file
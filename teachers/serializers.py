@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from schoolmanagement.reference_cache import ReferenceNameField
 from .models import Department, Teacher, TeacherAttendance
 
 class DepartmentSerializer(serializers.ModelSerializer):
@@ -14,7 +15,7 @@ class DepartmentSerializer(serializers.ModelSerializer):
         return obj.teachers.filter(is_active=True).count()
 
 class TeacherSerializer(serializers.ModelSerializer):
-    department_name = serializers.CharField(source='department.name', read_only=True)
+    department_name = ReferenceNameField('teachers.Department', source='department_id')
     full_name = serializers.CharField(source='user.get_full_name', read_only=True)
     age = serializers.SerializerMethodField()
     subjects_list = serializers.StringRelatedField(source='subjects', many=True, read_only=True)
@@ -52,7 +53,7 @@ class TeacherCreateSerializer(serializers.ModelSerializer):
 class TeacherAttendanceSerializer(serializers.ModelSerializer):
     teacher_name = serializers.CharField(source='teacher.user.get_full_name', read_only=True)
     teacher_id = serializers.CharField(source='teacher.teacher_id', read_only=True)
-    department_name = serializers.CharField(source='teacher.department.name', read_only=True)
+    department_name = ReferenceNameField('teachers.Department', source='teacher.department_id')
 
     class Meta:
         model = TeacherAttendance
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Count, Avg, Sum
 from datetime import date, timedelta
+from schoolmanagement.pagination import OptInKeysetPagination
 from .models import Department, Teacher, TeacherAttendance
 from .serializers import DepartmentSerializer, TeacherSerializer, TeacherCreateSerializer, TeacherAttendanceSerializer
 
@@ -98,6 +99,8 @@ class TeacherAttendanceViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['teacher', 'date', 'status', 'teacher__department']
     ordering = ['-date']
+    pagination_class = OptInKeysetPagination
+    keyset_ordering = ('-date', '-id')
 
     @action(detail=False, methods=['get'])
     def daily_report(self, request):